@@ -0,0 +1,103 @@
+"""
+스키마 인덱스용 FAISS 인덱스 종류(flat, ivf, hnsw, pq)를 비교하는 벤치마크입니다.
+합성 스키마 벡터(데이터베이스별 군집 + 테이블별 잡음)를 만들고,
+flat(정확 검색) 결과 대비 recall@k, 질의 지연 시간, 인덱스 메모리를 출력합니다.
+
+사용법: (backend 폴더에서)
+    python -m benchmarks.ann_benchmark --sizes 1000 10000 100000 --k 10
+"""
+
+import argparse
+import time
+
+import numpy as np
+
+from langgraph_.ann_index import build_index, index_memory_bytes, INDEX_TYPES
+
+
+def make_synthetic_schema(
+    n_tables: int, dim: int, tables_per_db: int = 100, seed: int = 0
+) -> np.ndarray:
+    """데이터베이스마다 하나의 중심을 두고, 테이블 벡터는 그 주변에 흩어지도록 생성합니다."""
+    rng = np.random.default_rng(seed)
+    n_dbs = max(1, n_tables // tables_per_db)
+    centers = rng.standard_normal((n_dbs, dim)).astype(np.float32)
+    db_ids = rng.integers(0, n_dbs, size=n_tables)
+    vectors = centers[db_ids] + 0.6 * rng.standard_normal((n_tables, dim)).astype(
+        np.float32
+    )
+    # OpenAI 임베딩처럼 단위 벡터로 정규화
+    return vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+
+
+def make_queries(vectors: np.ndarray, n_queries: int, seed: int = 1) -> np.ndarray:
+    """임의의 테이블 벡터에 잡음을 더해 질문 임베딩을 흉내냅니다."""
+    rng = np.random.default_rng(seed)
+    picked = vectors[rng.integers(0, len(vectors), size=n_queries)]
+    queries = picked + 0.3 * rng.standard_normal(picked.shape).astype(np.float32)
+    return queries / np.linalg.norm(queries, axis=1, keepdims=True)
+
+
+def recall_at_k(ground_truth: np.ndarray, result: np.ndarray) -> float:
+    hits = sum(
+        len(set(gt_row) & set(res_row)) for gt_row, res_row in zip(ground_truth, result)
+    )
+    return hits / ground_truth.size
+
+
+def run(sizes, dim, k, n_queries, nprobe, ef_search, pq_m):
+    header = f"{'tables':>8} {'index':>6} {'build(s)':>9} {'recall@'+str(k):>10} {'ms/query':>9} {'memory(MB)':>11}"
+    print(header)
+    print("-" * len(header))
+
+    for n_tables in sizes:
+        vectors = make_synthetic_schema(n_tables, dim)
+        queries = make_queries(vectors, n_queries)
+        ground_truth = None
+
+        for index_type in INDEX_TYPES:
+            start = time.perf_counter()
+            index = build_index(
+                vectors,
+                index_type=index_type,
+                nprobe=nprobe,
+                ef_search=ef_search,
+                pq_m=pq_m,
+            )
+            build_time = time.perf_counter() - start
+
+            start = time.perf_counter()
+            # 실제 서비스처럼 질문을 하나씩 검색
+            result = np.vstack([index.search(q[None, :], k)[1] for q in queries])
+            latency_ms = (time.perf_counter() - start) / n_queries * 1000
+
+            if index_type == "flat":
+                ground_truth = result
+            recall = recall_at_k(ground_truth, result)  # type: ignore
+
+            print(
+                f"{n_tables:>8} {index_type:>6} {build_time:>9.2f} {recall:>10.3f} "
+                f"{latency_ms:>9.3f} {index_memory_bytes(index) / 1e6:>11.1f}"
+            )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1000, 10000, 100000])
+    parser.add_argument("--dim", type=int, default=1536)  # text-embedding-3-small 차원
+    parser.add_argument("--k", type=int, default=10)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--nprobe", type=int, default=8)
+    parser.add_argument("--ef_search", type=int, default=64)
+    parser.add_argument("--pq_m", type=int, default=64)
+    args = parser.parse_args()
+
+    run(
+        args.sizes,
+        args.dim,
+        args.k,
+        args.queries,
+        args.nprobe,
+        args.ef_search,
+        args.pq_m,
+    )
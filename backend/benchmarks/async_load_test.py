@@ -0,0 +1,303 @@
+"""
+동시 대화 수에 따른 /llm_workflow 처리량을 비교하는 부하 테스트입니다.
+LLM은 지연 시간만 흉내 내는 stub 체인으로, 스키마 검색은 고정 context를 돌려주는 stub으로 바꾸고,
+쿼리는 임시 sqlite 데이터베이스에서 실제로 실행합니다. (OpenAI API, FAISS 인덱스, MySQL 불필요)
+
+- async: 비동기 엔드포인트(async def /llm_workflow, ainvoke)를 ASGI로 직접 호출
+- sync: 이전 방식(def 엔드포인트)처럼 동기 그래프(invoke)를 FastAPI 기본 스레드 풀 크기(40)에서 실행
+- --multiturn: 대화마다 추가 질문에 한 번 답하고 피드백까지 보내, 여러 대화의 요청이 섞여도
+  각 대화의 상태(checkpoint)가 유지되는지 함께 확인
+
+사용법: (backend 폴더에서)
+    python -m benchmarks.async_load_test --concurrency 50 200 --llm-latency 0.5
+    python -m benchmarks.async_load_test --concurrency 50 --multiturn
+"""
+
+import os
+import time
+import random
+import asyncio
+import argparse
+import tempfile
+import sqlite3
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Dict
+
+import numpy as np
+
+# 외부 서비스를 쓰는 캐시/분류기는 끄고, 데이터베이스는 임시 sqlite(aiosqlite)를 사용
+os.environ.setdefault("OPENAI_API_KEY", "stub")
+os.environ["QUESTION_CACHE"] = "false"
+os.environ["QUERY_CACHE"] = "false"
+os.environ["QUESTION_CLASSIFIER"] = "false"
+os.environ["LLM_MEMO_PATH"] = ""
+DB_DIR = tempfile.mkdtemp(prefix="async_load_test_")
+os.environ["URL"] = f"sqlite:///{DB_DIR}"
+# stub 응답이 분류기 학습 데이터(logs/)에 섞이지 않도록 로그는 임시 폴더에 쓴다.
+os.environ["LOG_DIR"] = os.path.join(DB_DIR, "logs")
+os.environ["QUESTION_EVAL_LOG"] = "false"
+
+import httpx
+from langchain_core.runnables import RunnableLambda
+
+from langgraph_ import prompt_registry, retriever
+from langgraph_.prompt_registry import PromptRegistry, context_list
+from langgraph_.schema_catalog import SchemaCatalog
+from langgraph_.graph import make_graph
+from langgraph_.db_engine import adispose_engines
+from langgraph_.llm_memo import llm_run
+from langgraph_.speculation import speculative_run
+from langgraph_.utils import get_runnable_config
+
+TABLE_CONTEXT = "CREATE TABLE main.orders (id INTEGER, region TEXT, amount REAL);"
+SQL_ANSWER = (
+    "```sql\nSELECT region, SUM(amount) AS total FROM main.orders GROUP BY region;\n```"
+)
+
+CLARIFY_QUESTION = "어느 기간의 매출을 볼까요?"
+
+# 노드별 stub 응답 (함수이면 체인 입력으로 응답을 만든다)
+STUB_OUTPUTS = {
+    "question_evaluation": "1",
+    "general_conversation": "안녕하세요.",
+    "question_analysis": "- 목적: 지역별 매출\n- [확인필요]: 기간",
+    "additional_question": "종료",
+    "question_refinement": "지역별 전체 매출 합계를 알려줘",
+    "table_selection": context_list(ids=[0]),
+    "query_creation": SQL_ANSWER,
+    "sql_conversation": "지역별 매출은 다음과 같습니다.",
+}
+
+
+def make_stub_registry(latency: float, multiturn: bool = False) -> PromptRegistry:
+    """
+    모든 노드의 체인을 latency(초 +-20%) 후 고정 응답을 돌려주는 stub으로 바꾼 registry.
+    multiturn이면 대화마다 추가 질문을 한 번 하고, 답변을 받은 뒤에 종료한다.
+    """
+    outputs = dict(STUB_OUTPUTS)
+    if multiturn:
+        outputs["additional_question"] = lambda inputs: (
+            "종료" if inputs["collected_questions"] else CLARIFY_QUESTION
+        )
+
+    def builder(node: str):
+        output = outputs[node]
+
+        def respond(inputs):
+            return output(inputs) if callable(output) else output
+
+        def invoke(inputs):
+            time.sleep(latency * random.uniform(0.8, 1.2))
+            return respond(inputs)
+
+        async def ainvoke(inputs):
+            await asyncio.sleep(latency * random.uniform(0.8, 1.2))
+            return respond(inputs)
+
+        return lambda registry, version: RunnableLambda(invoke, afunc=ainvoke)
+
+    return PromptRegistry({node: builder(node) for node in outputs})
+
+
+class StubRetriever:
+    version = "stub"
+    schema_version = "stub"
+    catalog = SchemaCatalog({"main.orders": ["id", "region", "amount"]})
+
+    def search(self, question, k, department=None, token_budget=None):
+        return [TABLE_CONTEXT]
+
+
+def setup_database() -> None:
+    connection = sqlite3.connect(os.path.join(DB_DIR, "INFORMATION_SCHEMA"))
+    connection.execute("CREATE TABLE orders (id INTEGER, region TEXT, amount REAL)")
+    connection.executemany(
+        "INSERT INTO orders VALUES (?, ?, ?)",
+        [(i, f"region_{i % 5}", i * 1.5) for i in range(1000)],
+    )
+    connection.commit()
+    connection.close()
+
+
+def request_body(i: int) -> Dict:
+    return {
+        "user_question": f"지역별 매출 합계 {i}",
+        "initial_question": 1,
+        "thread_id": f"load-{i}",
+        "last_snapshot_values": None,
+        "llm_api": "ChatGPT-4o",
+    }
+
+
+def answer_body(i: int, snapshot: Dict) -> Dict:
+    """추가 질문에 대한 사용자 답변 요청입니다. (프론트엔드처럼 직전 응답을 그대로 돌려준다)"""
+    return {
+        **request_body(i),
+        "user_question": f"최근 {i}개월",
+        "initial_question": 0,
+        "last_snapshot_values": snapshot,
+    }
+
+
+def check_conversation(i: int, outputs: Dict, multiturn: bool) -> None:
+    """대화가 끝까지 진행되었고, 다른 대화의 상태가 섞이지 않았는지 확인합니다."""
+    assert outputs.get("final_answer"), outputs
+    if multiturn:
+        assert outputs["collected_questions"] == [
+            f"{CLARIFY_QUESTION}\n답변: 최근 {i}개월",
+            "종료",
+        ], outputs["collected_questions"]
+
+
+class ThreadSampler:
+    """실행 중 최대 스레드 수를 기록합니다."""
+
+    def __init__(self):
+        self.peak = threading.active_count()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+
+    def _run(self):
+        while not self._stop.wait(0.01):
+            self.peak = max(self.peak, threading.active_count())
+
+    def __enter__(self):
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self._stop.set()
+        self._thread.join()
+
+
+async def run_async(app, concurrency: int, multiturn: bool = False) -> List[float]:
+    """
+    비동기 엔드포인트로 concurrency개의 대화를 동시에 보냅니다.
+    multiturn이면 추가 질문에 답하는 요청과 피드백 요청도 보내므로, 여러 대화의 요청이 서로 섞여 처리된다.
+    """
+    latencies: List[float] = []
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(
+        transport=transport, base_url="http://load-test", timeout=None
+    ) as client:
+
+        async def conversation(i: int):
+            start = time.perf_counter()
+            response = await client.post("/llm_workflow", json=request_body(i))
+            response.raise_for_status()
+            outputs = response.json()
+            if multiturn:
+                assert outputs.get("ask_user") == 1, outputs
+                response = await client.post(
+                    "/llm_workflow", json=answer_body(i, outputs)
+                )
+                response.raise_for_status()
+                outputs = response.json()
+            check_conversation(i, outputs, multiturn)
+            if multiturn:
+                response = await client.post(
+                    "/user_feedback",
+                    json={"user_feedback": 0, "thread_id": f"load-{i}"},
+                )
+                response.raise_for_status()
+            latencies.append(time.perf_counter() - start)
+
+        await asyncio.gather(*(conversation(i) for i in range(concurrency)))
+    # 커넥션 풀은 이벤트 루프에 묶이므로 다음 asyncio.run 전에 정리
+    await adispose_engines()
+    return latencies
+
+
+def run_sync(concurrency: int, workers: int, multiturn: bool = False) -> List[float]:
+    """이전 def 엔드포인트처럼 동기 그래프를 스레드 풀(workers개)에서 실행합니다."""
+    latencies: List[float] = []
+
+    # 스레드를 기다린 시간도 포함하도록 제출 시각부터 측정
+    start = time.perf_counter()
+
+    def conversation(i: int):
+        body = request_body(i)
+        inputs = {
+            "user_question": body["user_question"],
+            "context_cnt": 10,
+            "max_query_fix": 2,
+            "query_fix_cnt": -1,
+            "sample_info": 5,
+            "llm_api": body["llm_api"],
+            "user_department": None,
+        }
+        graph = make_graph()
+        config = get_runnable_config(30, body["thread_id"])
+        with llm_run(body["thread_id"]), speculative_run(body["thread_id"]):
+            outputs = graph.invoke(
+                inputs, config=config, interrupt_before=["human_feedback"]
+            )
+        if multiturn:
+            body = answer_body(i, outputs)
+            values = body["last_snapshot_values"]
+            values["collected_questions"][-1] += f"\n답변: {body['user_question']}"
+            graph.update_state(config, values, "additional_questions")
+            with llm_run(body["thread_id"]), speculative_run(body["thread_id"]):
+                outputs = graph.invoke(
+                    None, config=config, interrupt_before=["human_feedback"]
+                )
+        check_conversation(i, outputs, multiturn)
+        latencies.append(time.perf_counter() - start)
+
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        list(executor.map(conversation, range(concurrency)))
+    return latencies
+
+
+def report(mode: str, concurrency: int, elapsed: float, latencies, peak_threads):
+    print(
+        f"{mode:>6} {concurrency:>6} {elapsed:>9.2f} {concurrency / elapsed:>11.1f} "
+        f"{np.percentile(latencies, 50):>8.2f} {np.percentile(latencies, 95):>8.2f} "
+        f"{peak_threads:>8}"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description="비동기/동기 그래프 부하 테스트")
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[50, 200])
+    parser.add_argument(
+        "--llm-latency", type=float, default=0.5, help="stub LLM 호출 지연(초)"
+    )
+    parser.add_argument(
+        "--sync-workers",
+        type=int,
+        default=40,
+        help="동기 모드 스레드 수 (FastAPI 기본 스레드 풀 크기)",
+    )
+    parser.add_argument("--modes", nargs="+", default=["sync", "async"])
+    parser.add_argument(
+        "--multiturn",
+        action="store_true",
+        help="대화마다 추가 질문 답변과 피드백까지 보냄",
+    )
+    args = parser.parse_args()
+
+    setup_database()
+    prompt_registry._registry = make_stub_registry(args.llm_latency, args.multiturn)
+    retriever._retriever = StubRetriever()  # type: ignore
+    from main import app
+
+    print(
+        f"{'mode':>6} {'convs':>6} {'total(s)':>9} {'convs/sec':>11} "
+        f"{'p50(s)':>8} {'p95(s)':>8} {'threads':>8}"
+    )
+    for concurrency in args.concurrency:
+        for mode in args.modes:
+            with ThreadSampler() as sampler:
+                start = time.perf_counter()
+                if mode == "async":
+                    latencies = asyncio.run(run_async(app, concurrency, args.multiturn))
+                else:
+                    latencies = run_sync(concurrency, args.sync_workers, args.multiturn)
+                elapsed = time.perf_counter() - start
+            report(mode, concurrency, elapsed, latencies, sampler.peak)
+
+
+if __name__ == "__main__":
+    main()
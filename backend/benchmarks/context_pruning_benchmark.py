@@ -0,0 +1,155 @@
+"""
+테이블 context 축약(컬럼 인덱스 + 토큰 예산) 전후를 replay set으로 비교하는 벤치마크입니다.
+replay set은 /user_feedback으로 저장된 logs/user_feedback_*.csv 중 좋아요(1)를 받은 질문입니다.
+
+- 토큰 수: 검색된 테이블 context 전체의 토큰 수 (평균, p50, p95)
+- 테이블 recall: 기록된 정답 테이블이 검색된 context에 포함된 비율
+- 컬럼 recall: 기록된 SQL이 참조하는 컬럼이 context의 DDL에 남아 있는 비율
+- 실행 정확도(--generate): 각 context로 SQL을 생성/실행한 결과가 기록된 결과와 같은 비율
+  (OpenAI API와 데이터베이스 접속이 필요합니다)
+
+사용법: (backend 폴더에서)
+    python -m benchmarks.context_pruning_benchmark --budget 4000 --k 10
+    python -m benchmarks.context_pruning_benchmark --budget 4000 --generate
+"""
+
+import argparse
+import ast
+import csv
+import glob
+import re
+from typing import List, Dict, Set
+
+import numpy as np
+from dotenv import load_dotenv
+
+from langgraph_.context_pruning import count_tokens
+from langgraph_.retriever import get_schema_retriever
+from langgraph_.task import extract_context, create_query, get_query_result
+from langgraph_.utils import extract_context_tables
+
+CONSTRAINT_KEYWORDS = (
+    "PRIMARY",
+    "FOREIGN",
+    "UNIQUE",
+    "KEY",
+    "INDEX",
+    "CONSTRAINT",
+    "CHECK",
+)
+
+
+def load_replay_set(log_dir: str = "logs", feedback: str = "1") -> List[Dict[str, str]]:
+    rows = []
+    for path in sorted(glob.glob(f"{log_dir}/user_feedback_*.csv")):
+        with open(path, newline="", encoding="utf-8") as f:
+            rows += [row for row in csv.DictReader(f) if row["feedback"] == feedback]
+    return rows
+
+
+def ddl_column_names(table_contexts: List[str]) -> Set[str]:
+    """context의 DDL에 정의된 컬럼 이름(샘플 행 제외)을 모읍니다."""
+    names = set()
+    for table_context in table_contexts:
+        ddl = table_context.split("\n/*\n", 1)[0]
+        for name in re.findall(r"^\t`?([^\s`,]+)`?\s", ddl, re.MULTILINE):
+            if name.upper() not in CONSTRAINT_KEYWORDS:
+                names.add(name.lower())
+    return names
+
+
+def sql_identifiers(sql_query: str) -> Set[str]:
+    return {name.lower() for name in re.findall(r"[A-Za-z_][A-Za-z0-9_]*", sql_query)}
+
+
+def all_table_names(table_contexts: List[str]) -> Set[str]:
+    return set(extract_context_tables(table_contexts, list(range(len(table_contexts)))))
+
+
+def execution_match(question: str, table_contexts: List[str], expected: str) -> bool:
+    try:
+        ids = extract_context(user_question=question, table_contexts=table_contexts)
+        sql_query = create_query(question, table_contexts, ids, "ChatGPT-4o")
+        return (
+            get_query_result(command=sql_query, fetch="stream", include_columns=True)
+            == expected
+        )
+    except Exception:
+        return False
+
+
+def summarize(name: str, tokens: List[int], metrics: Dict[str, List[float]]):
+    line = (
+        f"{name:>8} {np.mean(tokens):>10.0f} {np.percentile(tokens, 50):>8.0f} "
+        f"{np.percentile(tokens, 95):>8.0f}"
+    )
+    for values in metrics.values():
+        line += f" {np.mean(values) if values else float('nan'):>10.3f}"
+    print(line)
+
+
+def run(budget: int, k: int, generate: bool, log_dir: str):
+    replay_set = load_replay_set(log_dir)
+    if not replay_set:
+        print(f"{log_dir}/user_feedback_*.csv 에 좋아요를 받은 질문이 없습니다.")
+        return
+    print(f"replay set: {len(replay_set)}개 질문, k={k}, budget={budget}\n")
+
+    retriever = get_schema_retriever()
+    modes = {"full": 0, "pruned": budget}
+    tokens: Dict[str, List[int]] = {mode: [] for mode in modes}
+    metrics: Dict[str, Dict[str, List[float]]] = {
+        mode: {"table_recall": [], "column_recall": [], "exec_acc": []}
+        for mode in modes
+    }
+
+    for row in replay_set:
+        question = row["user_question"]
+        expected_tables = {
+            t.lower() for t in ast.literal_eval(row["table_names"] or "[]")
+        }
+        sql_query = row.get("sql_query") or ""
+
+        contexts = {
+            mode: retriever.search(question, k=k, token_budget=mode_budget)
+            for mode, mode_budget in modes.items()
+        }
+        # 정답 SQL이 참조하는 컬럼 = 전체 DDL의 컬럼 중 SQL에 등장하는 것
+        referenced = sql_identifiers(sql_query) & ddl_column_names(contexts["full"])
+
+        for mode, table_contexts in contexts.items():
+            tokens[mode].append(sum(count_tokens(c) for c in table_contexts))
+            if expected_tables:
+                found = {t.lower() for t in all_table_names(table_contexts)}
+                metrics[mode]["table_recall"].append(
+                    len(expected_tables & found) / len(expected_tables)
+                )
+            if referenced:
+                kept = referenced & ddl_column_names(table_contexts)
+                metrics[mode]["column_recall"].append(len(kept) / len(referenced))
+            if generate:
+                metrics[mode]["exec_acc"].append(
+                    execution_match(question, table_contexts, row["query_result"])
+                )
+
+    header = f"{'mode':>8} {'tokens':>10} {'p50':>8} {'p95':>8}"
+    header += "".join(f" {name:>10}" for name in metrics["full"])
+    print(header)
+    print("-" * len(header))
+    for mode in modes:
+        summarize(mode, tokens[mode], metrics[mode])
+    print(
+        f"\n토큰 감소율: {1 - np.mean(tokens['pruned']) / max(np.mean(tokens['full']), 1):.1%}"
+    )
+
+
+if __name__ == "__main__":
+    load_dotenv()
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--budget", type=int, default=4000)
+    parser.add_argument("--k", type=int, default=10)
+    parser.add_argument("--generate", action="store_true")
+    parser.add_argument("--log_dir", type=str, default="logs")
+    args = parser.parse_args()
+
+    run(args.budget, args.k, args.generate, args.log_dir)
@@ -0,0 +1,126 @@
+"""
+검색 전용 shard 인덱스를 여러 워커가 불러올 때의 메모리 사용량을 비교하는 벤치마크입니다. (Linux 전용)
+합성 벡터를 저장한 뒤 워커 프로세스 여러 개가 동시에 불러와 검색하고, 각 워커의
+RSS, PSS(공유 페이지를 나눠 계산한 값), Private(워커 혼자 쓰는 메모리)를 /proc/self/smaps_rollup에서 읽어 출력합니다.
+
+- mmap: MmapFlatIndex (np.load(mmap_mode="r")) - 검색 전용 flat shard가 사용하는 방식
+- memory: 벡터를 프로세스 메모리로 모두 읽음
+- faiss-mmap: faiss.read_index(IO_FLAG_MMAP | IO_FLAG_READ_ONLY) (faiss가 설치된 경우만)
+
+mmap은 RSS에 공유 페이지가 포함되어 커지지만, Private은 거의 늘지 않아야 합니다.
+
+사용법: (backend 폴더에서)
+    python -m benchmarks.shard_memory --tables 200000 --dim 1536 --workers 2
+"""
+
+import os
+import argparse
+import tempfile
+import multiprocessing as mp
+from typing import Dict
+
+import numpy as np
+
+from langgraph_.mmap_index import MmapFlatIndex
+
+MODES = ("mmap", "memory", "faiss-mmap")
+
+
+def memory_mb() -> Dict[str, float]:
+    """현재 프로세스의 RSS, PSS, Private 메모리(MB)."""
+    values: Dict[str, float] = {}
+    with open("/proc/self/smaps_rollup") as f:
+        for line in f:
+            parts = line.split()
+            if parts[0].rstrip(":") in (
+                "Rss",
+                "Pss",
+                "Private_Clean",
+                "Private_Dirty",
+            ):
+                values[parts[0].rstrip(":")] = int(parts[1]) / 1024
+    return {
+        "rss": values["Rss"],
+        "pss": values["Pss"],
+        "private": values["Private_Clean"] + values["Private_Dirty"],
+    }
+
+
+def load_index(mode: str, folder: str):
+    if mode == "mmap":
+        return MmapFlatIndex.load(os.path.join(folder, "vectors.npy"))
+    if mode == "memory":
+        return MmapFlatIndex(np.load(os.path.join(folder, "vectors.npy")))
+    import faiss
+
+    return faiss.read_index(
+        os.path.join(folder, "index.faiss"),
+        faiss.IO_FLAG_MMAP | faiss.IO_FLAG_READ_ONLY,
+    )
+
+
+def worker(mode: str, folder: str, queries: np.ndarray, barrier, results) -> None:
+    before = memory_mb()
+    index = load_index(mode, folder)
+    index.search(queries, 10)
+    # 모든 워커가 인덱스를 불러온 상태에서 측정해야 공유 페이지가 PSS에 나뉘어 잡힌다.
+    barrier.wait()
+    after = memory_mb()
+    results.put({key: after[key] - before[key] for key in after})
+    barrier.wait()
+
+
+def run(mode: str, folder: str, queries: np.ndarray, workers: int):
+    context = mp.get_context("spawn")
+    barrier = context.Barrier(workers)
+    results = context.Queue()
+    processes = [
+        context.Process(target=worker, args=(mode, folder, queries, barrier, results))
+        for _ in range(workers)
+    ]
+    for process in processes:
+        process.start()
+    measured = [results.get() for _ in processes]
+    for process in processes:
+        process.join()
+    return measured
+
+
+def main():
+    parser = argparse.ArgumentParser(description="검색 전용 shard 인덱스 메모리 비교")
+    parser.add_argument("--tables", type=int, default=200000)
+    parser.add_argument("--dim", type=int, default=1536)
+    parser.add_argument("--workers", type=int, default=2)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    vectors = rng.standard_normal((args.tables, args.dim), dtype=np.float32)
+    queries = rng.standard_normal((4, args.dim), dtype=np.float32)
+    folder = tempfile.mkdtemp(prefix="shard_memory_")
+    np.save(os.path.join(folder, "vectors.npy"), vectors)
+    modes = ["mmap", "memory"]
+    try:
+        import faiss
+
+        index = faiss.IndexFlatL2(args.dim)
+        index.add(vectors)
+        faiss.write_index(index, os.path.join(folder, "index.faiss"))
+        modes.append("faiss-mmap")
+    except ImportError:
+        print("faiss가 설치되어 있지 않아 faiss-mmap은 건너뜁니다.")
+    print(f"벡터 크기: {vectors.nbytes / 2**20:.0f}MB, 워커 {args.workers}개")
+    del vectors
+
+    print(
+        f"{'mode':>10} {'worker':>6} {'RSS(MB)':>9} {'PSS(MB)':>9} {'Private(MB)':>12}"
+    )
+    for mode in modes:
+        for i, measured in enumerate(run(mode, folder, queries, args.workers)):
+            print(
+                f"{mode:>10} {i:>6} {measured['rss']:>9.0f} {measured['pss']:>9.0f} "
+                f"{measured['private']:>12.0f}"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,115 @@
+import os
+from typing import Dict, Any
+
+import faiss
+import numpy as np
+
+INDEX_TYPES = ("flat", "ivf", "hnsw", "pq")
+
+
+def get_index_config() -> Dict[str, Any]:
+    """
+    환경변수에서 FAISS 인덱스 설정을 읽어옵니다.
+
+    - FAISS_INDEX_TYPE: flat(기본, 정확 검색), ivf, hnsw, pq(IVF + product quantization)
+    - FAISS_IVF_NLIST: IVF 클러스터 수 (0이면 벡터 수에 맞춰 자동 결정)
+    - FAISS_NPROBE: IVF 검색 시 살펴볼 클러스터 수
+    - FAISS_HNSW_M / FAISS_EF_SEARCH: HNSW 그래프 연결 수 / 검색 폭
+    - FAISS_PQ_M: PQ 서브벡터 수 (벡터 차원을 나누어 떨어뜨려야 함)
+    - FAISS_MIN_ANN_SIZE: 이보다 벡터 수가 적은 shard는 flat 인덱스를 그대로 사용
+    """
+    index_type = os.getenv("FAISS_INDEX_TYPE", "flat").lower()
+    if index_type not in INDEX_TYPES:
+        raise ValueError(f"지원하지 않는 FAISS_INDEX_TYPE 입니다: {index_type}")
+    return {
+        "index_type": index_type,
+        "nlist": int(os.getenv("FAISS_IVF_NLIST", 0)),
+        "nprobe": int(os.getenv("FAISS_NPROBE", 8)),
+        "hnsw_m": int(os.getenv("FAISS_HNSW_M", 32)),
+        "ef_search": int(os.getenv("FAISS_EF_SEARCH", 64)),
+        "pq_m": int(os.getenv("FAISS_PQ_M", 64)),
+        "min_ann_size": int(os.getenv("FAISS_MIN_ANN_SIZE", 1000)),
+    }
+
+
+# 저장된 인덱스에 반영되는 설정. 바뀌면 검색용 인덱스를 다시 만들어야 한다. (nprobe, ef_search는 불러올 때 적용)
+BUILD_CONFIG_KEYS = ("index_type", "nlist", "hnsw_m", "pq_m", "min_ann_size")
+
+
+def get_build_config() -> Dict[str, Any]:
+    """검색용 인덱스를 만들 때 사용하는 설정만 반환합니다. (manifest에 기록하여 설정 변경을 감지)"""
+    config = get_index_config()
+    return {key: config[key] for key in BUILD_CONFIG_KEYS}
+
+
+def get_nlist(ntotal: int, nlist: int = 0) -> int:
+    """IVF 클러스터 수. 지정하지 않으면 4*sqrt(N)을 사용하되, 학습에 필요한 벡터 수(클러스터당 39개)를 넘지 않게 합니다."""
+    if nlist <= 0:
+        nlist = int(4 * np.sqrt(ntotal))
+    return max(1, min(nlist, ntotal // 39))
+
+
+def build_index(
+    vectors: np.ndarray,
+    index_type: str = "flat",
+    nlist: int = 0,
+    hnsw_m: int = 32,
+    pq_m: int = 64,
+    **search_params,
+) -> faiss.Index:
+    """
+    주어진 벡터로 FAISS 인덱스를 학습/생성합니다. 모든 인덱스는 L2 거리를 사용하므로
+    기존 flat 인덱스와 같은 순서의 id(0..N-1)와 같은 거리 척도로 검색 결과를 반환합니다.
+
+    Args:
+        vectors: (N, d) float32 벡터
+        index_type: flat, ivf, hnsw, pq 중 하나
+
+    Returns:
+        faiss.Index: 벡터가 추가된 인덱스
+    """
+    vectors = np.ascontiguousarray(vectors, dtype=np.float32)
+    ntotal, dim = vectors.shape
+
+    if index_type == "flat":
+        index = faiss.IndexFlatL2(dim)
+    elif index_type == "hnsw":
+        index = faiss.IndexHNSWFlat(dim, hnsw_m)
+    elif index_type == "ivf":
+        index = faiss.index_factory(dim, f"IVF{get_nlist(ntotal, nlist)},Flat")
+    elif index_type == "pq":
+        index = faiss.index_factory(dim, f"IVF{get_nlist(ntotal, nlist)},PQ{pq_m}")
+    else:
+        raise ValueError(f"지원하지 않는 인덱스 종류입니다: {index_type}")
+
+    if not index.is_trained:
+        index.train(vectors)
+    index.add(vectors)
+    set_search_params(index, **search_params)
+    return index
+
+
+def set_search_params(index: faiss.Index, nprobe: int = 8, ef_search: int = 64, **_):
+    """인덱스 종류에 맞는 검색 파라미터를 설정합니다."""
+    if isinstance(index, faiss.IndexHNSW):
+        index.hnsw.efSearch = ef_search
+    ivf = faiss.try_extract_index_ivf(index)
+    if ivf is not None:
+        ivf.nprobe = nprobe
+
+
+def build_search_index(flat_index: faiss.Index) -> faiss.Index | None:
+    """
+    flat 인덱스의 벡터로 설정된 종류의 검색용 ANN 인덱스를 만듭니다.
+    flat 설정이거나 벡터 수가 FAISS_MIN_ANN_SIZE보다 작으면 None을 반환합니다.
+    """
+    config = get_index_config()
+    if config["index_type"] == "flat" or flat_index.ntotal < config["min_ann_size"]:
+        return None
+    vectors = flat_index.reconstruct_n(0, flat_index.ntotal)
+    return build_index(vectors, **config)
+
+
+def index_memory_bytes(index: faiss.Index) -> int:
+    """직렬화한 인덱스 크기로 메모리 사용량을 추정합니다."""
+    return int(faiss.serialize_index(index).nbytes)
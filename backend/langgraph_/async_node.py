@@ -0,0 +1,193 @@
+"""
+node.py의 비동기 버전 노드입니다. 비동기 그래프(make_graph(asynchronous=True))에서 ainvoke로 실행되며,
+LLM/모델 서버/데이터베이스 응답을 기다리는 동안 이벤트 루프가 다른 대화를 처리합니다.
+그래프 상태, 라우터, 상태 구성 함수는 node.py의 것을 그대로 사용합니다.
+"""
+
+from typing import Dict, Any
+
+from .node import (
+    GraphState,
+    question_cache_state,
+    table_selection_inputs,
+    query_creation_inputs,
+    query_error_state,
+)
+from .task import check_need_clarification, check_leading_question
+from .async_task import (
+    aevaluate_user_question,
+    asimple_conversation,
+    aanalyze_user_question,
+    aclarify_user_question,
+    arefine_user_question,
+    afind_cached_query,
+    aselect_relevant_tables,
+    aextract_context,
+    acreate_query,
+    arun_query,
+    abusiness_conversation,
+)
+from .sql_validator import validate_sql
+from .speculation import speculate, aclaim, discard_speculation
+from .query_candidates import candidate_settings, first_valid_candidate
+from .retriever import get_schema_retriever
+
+
+async def question_cache_lookup(state: GraphState) -> GraphState:
+    user_question = state["user_question"]
+    cached = await afind_cached_query(
+        user_question, get_schema_retriever(), state.get("user_department")
+    )
+    return question_cache_state(user_question, cached)
+
+
+async def question_evaluation(state: GraphState) -> GraphState:
+    user_question = state["user_question"]
+    # 평가 결과와 상관없는 질문 분석을 평가와 동시에 미리 시작
+    # (테이블 검색은 구체화된 질문으로 하므로 미리 시작하지 않는다)
+    speculate(
+        ("question_analysis", user_question), aanalyze_user_question, user_question
+    )
+    user_question_eval = await aevaluate_user_question(user_question)
+    if user_question_eval != "1":
+        discard_speculation()
+
+    return GraphState(user_question_eval=user_question_eval)  # type: ignore
+
+
+async def non_sql_conversation(state: GraphState) -> GraphState:
+    final_answer = await asimple_conversation(state["user_question"])
+
+    return GraphState(final_answer=final_answer)  # type: ignore
+
+
+async def question_analyze(state: GraphState) -> GraphState:
+    user_question = state["user_question"]
+    analyze_question = await aclaim(("question_analysis", user_question))
+    if analyze_question is None:
+        analyze_question = await aanalyze_user_question(user_question)
+
+    return GraphState(
+        user_question_analyze=analyze_question,
+        need_clarification=check_need_clarification(analyze_question),
+    )  # type: ignore
+
+
+async def question_clarify(state: GraphState) -> GraphState:
+    collected_questions = state.get("collected_questions", [])
+
+    leading_question = await aclarify_user_question(
+        state["user_question"], state["user_question_analyze"], collected_questions
+    )
+    ask_user = check_leading_question(leading_question)
+    collected_questions.append(leading_question)
+
+    return GraphState(collected_questions=collected_questions, ask_user=ask_user)  # type: ignore
+
+
+async def human_feedback(state: GraphState) -> GraphState:
+
+    return state
+
+
+async def question_refine(state: GraphState) -> GraphState:
+    user_question_analyze = state["collected_questions"][-1]
+    refine_question = await arefine_user_question(
+        state["user_question"], user_question_analyze
+    )
+
+    return GraphState(user_question=refine_question)  # type: ignore
+
+
+async def table_selection(state: GraphState) -> GraphState:
+    user_question = state["user_question"]
+    retriever = get_schema_retriever()
+    table_contexts = await aselect_relevant_tables(
+        user_question=user_question,
+        context_cnt=state["context_cnt"],
+        retriever=retriever,
+        department=state.get("user_department"),
+    )
+    table_contexts_ids = await aextract_context(
+        **table_selection_inputs(state, table_contexts)
+    )
+    return GraphState(
+        table_contexts=table_contexts,
+        table_contexts_ids=table_contexts_ids,
+        flow_status=state.get("flow_status", "KEEP"),
+    )  # type: ignore
+
+
+async def query_creation(state: GraphState) -> GraphState:
+    inputs = query_creation_inputs(state)
+    query_fix_cnt = state.get("query_fix_cnt") + 1  # type: ignore
+    settings = candidate_settings(inputs["llm_api"])
+    if len(settings) == 1:
+        sql_query = await acreate_query(**inputs)
+
+        return GraphState(
+            sql_query=sql_query,
+            query_fix_cnt=query_fix_cnt,
+            flow_status=state.get("flow_status", "KEEP"),
+            validated_sql="",
+        )  # type: ignore
+
+    # SQL 후보를 동시에 만들고 검사/실행하여, 가장 먼저 결과를 낸 후보를 사용
+    async def attempt(llm_api: str, temperature: float | None):
+        sql_query = await acreate_query(
+            **{**inputs, "llm_api": llm_api}, temperature=temperature
+        )
+        return sql_query, await try_query(sql_query)
+
+    index, sql_query, outcome = await first_valid_candidate(settings, attempt)
+    llm_api, temperature = settings[index]
+
+    return GraphState(
+        **query_outcome_state(outcome, query_fix_cnt, state["max_query_fix"]),
+        sql_query=sql_query,
+        query_fix_cnt=query_fix_cnt,
+        validated_sql=sql_query,
+        query_candidate={
+            "index": index,
+            "llm_api": llm_api,
+            "temperature": temperature,
+            "candidates": len(settings),
+        },
+    )  # type: ignore
+
+
+async def try_query(sql_query: str) -> Dict[str, Any] | Exception:
+    """쿼리를 검사/실행합니다. 쿼리 오류는 발생시키지 않고 반환합니다."""
+    try:
+        validate_sql(sql_query, get_schema_retriever().catalog)
+        return await arun_query(sql_query)
+    except Exception as e:
+        return e
+
+
+def query_outcome_state(
+    outcome: Dict[str, Any] | Exception, query_fix_cnt: int, max_query_fix: int
+) -> GraphState:
+    if isinstance(outcome, Exception):
+        return query_error_state(outcome, query_fix_cnt, max_query_fix)
+    return GraphState(**outcome, flow_status="KEEP")  # type: ignore
+
+
+async def query_validation(state: GraphState) -> GraphState:
+    sql_query = state["sql_query"]
+    if state.get("validated_sql") == sql_query:
+        # 쿼리 생성 단계에서 후보를 동시에 검사/실행한 결과를 그대로 사용
+        return GraphState(flow_status=state["flow_status"])  # type: ignore
+
+    outcome = await try_query(sql_query)
+    return query_outcome_state(outcome, state["query_fix_cnt"], state["max_query_fix"])
+
+
+async def sql_conversation(state: GraphState) -> GraphState:
+    final_answer = await abusiness_conversation(
+        state["user_question"],
+        sql_query=state["sql_query"],
+        query_result=state["query_result"],
+    )
+
+    return GraphState(final_answer=final_answer)  # type: ignore
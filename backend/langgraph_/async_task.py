@@ -0,0 +1,193 @@
+"""
+task.py의 비동기 버전입니다. 비동기 그래프(make_graph(asynchronous=True))의 노드에서 사용합니다.
+LLM은 chain.ainvoke, 로컬 모델 서버는 httpx.AsyncClient, 쿼리 실행은 AsyncEngine(aiomysql)으로 호출하므로
+응답을 기다리는 동안 스레드를 점유하지 않습니다.
+프롬프트 구성과 결과 처리는 task.py의 함수를 그대로 사용하여 동기 그래프와 같은 결과를 냅니다.
+"""
+
+import asyncio
+from typing import List, Any, Dict
+
+from .retriever import SchemaRetriever
+from .prompt_registry import get_prompt_registry
+from .db_engine import get_async_engine, async_read_only_connection
+from .llm_memo import memoize_llm
+from .utils import save_question_evaluation
+from .task import (
+    classify_user_question,
+    find_cached_query,
+    select_relevant_tables,
+    build_table_selection_inputs,
+    build_query_creation_prompt,
+    query_creation_chain,
+    build_sql_conversation_prompt,
+    get_local_model_url,
+    build_local_model_payload,
+    extract_sql,
+    run_query,
+)
+
+
+async def aevaluate_user_question(user_question: str) -> str:
+    label = classify_user_question(user_question)
+    if label is not None:
+        return label
+
+    return await ajudge_user_question(user_question)
+
+
+@memoize_llm("question_evaluation")
+async def ajudge_user_question(user_question: str) -> str:
+    chain = get_prompt_registry().chain("question_evaluation")
+
+    output = await chain.ainvoke({"user_question": user_question})
+    # 로그 파일 잠금을 기다리는 동안 이벤트 루프가 멈추지 않도록 스레드에서 기록
+    await asyncio.to_thread(
+        save_question_evaluation, user_question, output.strip(), "llm"
+    )
+    return output
+
+
+@memoize_llm("general_conversation")
+async def asimple_conversation(user_question: str) -> str:
+    chain = get_prompt_registry().chain("general_conversation")
+
+    return await chain.ainvoke({"user_question": user_question})
+
+
+@memoize_llm("question_analysis")
+async def aanalyze_user_question(user_question: str) -> str:
+    analyze_chain = get_prompt_registry().chain("question_analysis")
+
+    return await analyze_chain.ainvoke({"user_question": user_question})
+
+
+@memoize_llm("additional_question")
+async def aclarify_user_question(
+    user_question: str, user_question_analyze: str, collected_questions: List[str]
+) -> str:
+    chain = get_prompt_registry().chain("additional_question")
+    chat_history = "\n".join(f"{i+1}. {q}" for i, q in enumerate(collected_questions))
+
+    return await chain.ainvoke(
+        {
+            "user_question": user_question,
+            "user_question_analyze": user_question_analyze,
+            "collected_questions": chat_history,
+        }
+    )
+
+
+@memoize_llm("question_refinement")
+async def arefine_user_question(user_question: str, user_question_analyze: str) -> str:
+    refine_chain = get_prompt_registry().chain("question_refinement")
+
+    return await refine_chain.ainvoke(
+        {"user_question": user_question, "user_question_analyze": user_question_analyze}
+    )
+
+
+async def afind_cached_query(
+    user_question: str, retriever: SchemaRetriever, department: str | None = None
+) -> Dict[str, Any] | None:
+    # 질문 임베딩(모델 서버 호출)과 캐시 조회는 블로킹 호출이므로 스레드에서 실행
+    return await asyncio.to_thread(
+        find_cached_query, user_question, retriever, department
+    )
+
+
+async def aselect_relevant_tables(
+    user_question: str,
+    context_cnt: int,
+    retriever: SchemaRetriever,
+    department: str | None = None,
+) -> List[str]:
+    # FAISS 검색과 context 축약은 CPU 작업이므로 이벤트 루프를 막지 않도록 스레드에서 실행
+    return await asyncio.to_thread(
+        select_relevant_tables,
+        user_question=user_question,
+        context_cnt=context_cnt,
+        retriever=retriever,
+        department=department,
+    )
+
+
+@memoize_llm("table_selection")
+async def aextract_context(
+    user_question: str,
+    table_contexts: List[str],
+    flow_status: str = "KEEP",
+    prev_list: List[int] = [],
+    prev_query: str = "",
+    error_msg: str = "",
+) -> List[int]:
+    if not table_contexts:
+        return []
+
+    chain = get_prompt_registry().chain("table_selection")
+
+    output = await chain.ainvoke(
+        build_table_selection_inputs(
+            user_question, table_contexts, flow_status, prev_list, prev_query, error_msg
+        )
+    )
+    return output.ids  # type: ignore
+
+
+@memoize_llm("query_creation")
+async def acreate_query(
+    user_question,
+    table_contexts,
+    table_contexts_ids,
+    llm_api,
+    flow_status="KEEP",
+    prev_query="",
+    error_msg="",
+    temperature=None,
+):
+    registry = get_prompt_registry()
+    system_prompt = build_query_creation_prompt(
+        table_contexts, table_contexts_ids, flow_status, prev_query, error_msg
+    )
+    chain = query_creation_chain(temperature)
+    inputs = {"system_prompt": system_prompt, "user_question": user_question}
+
+    if llm_api == "Local":
+        response = await registry.async_http_session.post(
+            get_local_model_url(),
+            json=build_local_model_payload(user_question, system_prompt),
+        )
+        if response.status_code == 200:
+            output = response.json()["response"]
+        else:
+            print(
+                f"Got Unexpected Response from Model Server, Status Code={response.status_code}"
+            )
+            output = await chain.ainvoke(inputs)
+    else:
+        output = await chain.ainvoke(inputs)
+
+    return extract_sql(output)
+
+
+async def arun_query(sql_query: str) -> Dict[str, Any]:
+    """
+    run_query의 비동기 버전입니다.
+    AsyncEngine에서 빌린 읽기 전용 커넥션 하나로 run_sync를 통해 run_query를 실행하므로
+    실행 전 검사, 결과 캐시, 스트리밍 직렬화 로직은 동기 그래프와 같고 DB I/O만 비동기로 기다립니다.
+    """
+    engine = get_async_engine("INFORMATION_SCHEMA")
+    async with async_read_only_connection(engine) as connection:
+        return await connection.run_sync(
+            lambda sync_connection: run_query(sql_query, sync_connection)
+        )
+
+
+@memoize_llm("sql_conversation")
+async def abusiness_conversation(user_question, sql_query, query_result) -> str:
+    instruction = build_sql_conversation_prompt(sql_query, query_result)
+    chain = get_prompt_registry().chain("sql_conversation")
+
+    return await chain.ainvoke(
+        {"system_prompt": instruction, "user_question": user_question}
+    )
@@ -0,0 +1,115 @@
+import os
+import json
+from typing import List, Dict, Tuple, Iterable
+
+import numpy as np
+from langchain_core.documents import Document
+from langchain_core.embeddings import Embeddings
+
+COLUMN_VECTORS_FILE = "columns.npy"
+COLUMN_IDS_FILE = "columns.json"
+
+
+def column_text(db_name: str, table_name: str, column: Dict) -> str:
+    """컬럼 임베딩에 사용할 텍스트. 테이블 이름과 컬럼 정의, 설명을 함께 넣습니다."""
+    text = f"{db_name}.{table_name}.{column['ddl']}"
+    if column.get("comment"):
+        text += f" -- {column['comment']}"
+    return text
+
+
+def iter_column_texts(documents: Iterable[Document]) -> Iterable[Tuple[str, str]]:
+    """테이블 문서들의 메타데이터에서 (컬럼 id, 임베딩할 텍스트)를 순서대로 만듭니다."""
+    for doc in documents:
+        db_name, table_name = doc.metadata["db"], doc.metadata["table"]
+        for column in doc.metadata.get("columns", []):
+            yield (
+                f"{db_name}.{table_name}.{column['name']}",
+                column_text(db_name, table_name, column),
+            )
+
+
+class ColumnIndex:
+    """컬럼 단위 임베딩 인덱스입니다.
+    테이블 검색으로 고른 테이블 안에서 질문과 관련 있는 컬럼을 고르는 데만 쓰므로,
+    FAISS 없이 테이블별 연속 구간으로 정렬된 행렬에서 내적으로 점수를 계산합니다.
+    """
+
+    def __init__(self, ids: List[str], vectors: np.ndarray):
+        self.ids = ids
+        self.vectors = vectors
+        # "DB.테이블" -> 해당 테이블 컬럼들의 행 구간
+        self.ranges: Dict[str, Tuple[int, int]] = {}
+        for position, column_id in enumerate(ids):
+            table_id = column_id.rsplit(".", 1)[0]
+            start, _ = self.ranges.get(table_id, (position, position))
+            self.ranges[table_id] = (start, position + 1)
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    def score(self, query_vector: List[float], table_id: str) -> Dict[str, float]:
+        """
+        테이블의 각 컬럼과 질문의 코사인 유사도를 계산합니다.
+
+        Args:
+            query_vector: 질문 임베딩
+            table_id: "DB.테이블" 형식의 문서 id
+
+        Returns:
+            Dict[str, float]: 컬럼 이름 -> 유사도
+        """
+        if table_id not in self.ranges:
+            return {}
+        start, end = self.ranges[table_id]
+        query = np.asarray(query_vector, dtype=np.float32)
+        query = query / (np.linalg.norm(query) or 1.0)
+        scores = np.asarray(self.vectors[start:end]) @ query
+        return {
+            self.ids[position].rsplit(".", 1)[1]: float(score)
+            for position, score in zip(range(start, end), scores)
+        }
+
+    def save(self, folder_path: str) -> None:
+        np.save(os.path.join(folder_path, COLUMN_VECTORS_FILE), self.vectors)
+        with open(
+            os.path.join(folder_path, COLUMN_IDS_FILE), "w", encoding="utf-8"
+        ) as f:
+            json.dump(self.ids, f, ensure_ascii=False)
+
+    @classmethod
+    def load(cls, folder_path: str) -> "ColumnIndex":
+        """저장된 컬럼 인덱스를 불러옵니다. 벡터는 메모리 매핑하여 여러 워커가 공유합니다."""
+        ids_path = os.path.join(folder_path, COLUMN_IDS_FILE)
+        if not os.path.exists(ids_path):
+            return cls([], np.zeros((0, 0), dtype=np.float32))
+        with open(ids_path, "r", encoding="utf-8") as f:
+            ids = json.load(f)
+        vectors = np.load(os.path.join(folder_path, COLUMN_VECTORS_FILE), mmap_mode="r")
+        return cls(ids, vectors)
+
+
+def build_column_index(
+    documents: Iterable[Document], embeddings: Embeddings
+) -> ColumnIndex:
+    """
+    테이블 문서들의 컬럼 정보로 컬럼 인덱스를 만듭니다.
+    임베딩 캐시를 거치므로 새로 생기거나 바뀐 컬럼만 실제로 임베딩됩니다.
+
+    Args:
+        documents: 테이블 문서 (메타데이터에 "columns"가 있어야 함)
+        embeddings: 임베딩 객체
+
+    Returns:
+        ColumnIndex: 컬럼 인덱스
+    """
+    # 같은 테이블의 컬럼이 연속된 구간에 놓이도록 id 순으로 정렬
+    pairs = sorted(iter_column_texts(documents))
+    if not pairs:
+        return ColumnIndex([], np.zeros((0, 0), dtype=np.float32))
+    ids = [column_id for column_id, _ in pairs]
+    vectors = np.asarray(
+        embeddings.embed_documents([text for _, text in pairs]), dtype=np.float32
+    )
+    vectors /= np.linalg.norm(vectors, axis=1, keepdims=True).clip(min=1e-12)
+    return ColumnIndex(ids, vectors)
@@ -0,0 +1,160 @@
+import os
+from functools import lru_cache
+from typing import List, Dict, Any, Set
+
+import tiktoken
+from langchain_core.documents import Document
+
+from .schema_extract import format_sample_rows
+from .utils import str2bool
+
+
+def get_pruning_config() -> Dict[str, Any]:
+    """
+    환경변수에서 테이블 context 축약 설정을 읽어옵니다.
+
+    - CONTEXT_TOKEN_BUDGET: 검색된 모든 테이블 context의 토큰 예산 (0이면 축약하지 않고 전체 DDL 사용)
+    - CONTEXT_MIN_COLUMNS: 예산과 관계없이 테이블마다 남길 질문 관련 상위 컬럼 수 (기본키/외래키 제외)
+    - CONTEXT_SAMPLE_ROWS: 축약된 context에 포함할 샘플 행 수
+    - CONTEXT_TOKEN_METRICS: 검색할 때마다 반환한/전체 context의 토큰 수를 세어 /metrics에 보고할지 여부
+      (검색마다 전체 DDL을 토큰화하므로 축약 효과를 측정할 때만 켬)
+    """
+    return {
+        "token_budget": int(os.getenv("CONTEXT_TOKEN_BUDGET", 4000)),
+        "min_columns": int(os.getenv("CONTEXT_MIN_COLUMNS", 3)),
+        "sample_rows": int(os.getenv("CONTEXT_SAMPLE_ROWS", 3)),
+        "token_metrics": str2bool(os.getenv("CONTEXT_TOKEN_METRICS", "false")),
+    }
+
+
+@lru_cache(maxsize=1)
+def get_encoding() -> tiktoken.Encoding | None:
+    # gpt-4o 계열이 사용하는 토크나이저
+    try:
+        return tiktoken.get_encoding("o200k_base")
+    except Exception as e:
+        # 토크나이저 파일을 내려받을 수 없는 환경에서는 글자 수로 근사
+        print(f"tiktoken 인코딩을 불러오지 못해 토큰 수를 근사합니다: {e}")
+        return None
+
+
+def count_tokens(text: str) -> int:
+    encoding = get_encoding()
+    if encoding is None:
+        return len(text.encode("utf-8")) // 4 + 1
+    return len(encoding.encode(text))
+
+
+def render_table_context(
+    metadata: Dict, keep: Set[str] | None = None, sample_rows: int | None = None
+) -> str:
+    """
+    테이블 메타데이터로 "DB:...\\nDDL:..." 형식의 context를 만듭니다.
+    keep이 주어지면 해당 컬럼만 DDL과 샘플 행에 남기고, 생략한 컬럼 수를 주석으로 표시합니다.
+
+    Args:
+        metadata: extract_table_doc이 만든 테이블 메타데이터
+        keep: 남길 컬럼 이름 (None이면 전체)
+        sample_rows: 포함할 샘플 행 수 (None이면 저장된 전체)
+    """
+    columns = metadata.get("columns")
+    if not columns:
+        # 컬럼 정보가 없는 이전 형식의 문서는 전체 context를 그대로 사용
+        return metadata["context"]
+
+    kept = [column for column in columns if keep is None or column["name"] in keep]
+    column_lines = ", \n\t".join(column["ddl"] for column in kept)
+    omitted = len(columns) - len(kept)
+    if omitted:
+        column_lines += f" \n\t/* {omitted} more columns omitted */"
+    table_context = (
+        f"{metadata['ddl_header']}\n\t"
+        + ", \n\t".join([column_lines] + metadata["constraints"])
+        + f"\n{metadata['ddl_footer']}"
+    )
+
+    sample_info = metadata.get("sample_info", 0)
+    if sample_rows is not None:
+        sample_info = min(sample_info, sample_rows)
+    if sample_info > 0:
+        rows = [
+            [column["samples"][idx] for column in kept]
+            for idx in range(min(sample_info, len(kept[0]["samples"]) if kept else 0))
+        ]
+        sample_rows_str = format_sample_rows(
+            metadata["table"], [column["name"] for column in kept], rows, sample_info
+        )
+        table_context += f"\n\n/*\n{sample_rows_str}\n*/"
+
+    return f"DB:{metadata['db']}\nDDL:\n{table_context}"
+
+
+def column_cost(column: Dict, sample_rows: int) -> int:
+    """컬럼 하나를 context에 추가할 때 늘어나는 토큰 수(정의 + 샘플 값)를 추정합니다."""
+    return count_tokens(column["ddl"]) + sum(
+        count_tokens(value) + 1 for value in column["samples"][:sample_rows]
+    )
+
+
+def prune_table_contexts(
+    documents: List[Document],
+    column_scores: List[Dict[str, float]],
+    token_budget: int,
+    min_columns: int = 3,
+    sample_rows: int = 3,
+) -> List[str]:
+    """
+    검색된 테이블들의 DDL을 질문에 맞춰 줄여 전체 토큰 수가 예산 안에 들도록 만듭니다.
+    - 기본키/외래키 컬럼은 조인에 필요하므로 항상 남깁니다.
+    - 테이블마다 질문과 가장 유사한 min_columns개 컬럼을 남깁니다.
+    - 남은 예산은 모든 테이블의 나머지 컬럼을 유사도 순으로 채웁니다.
+
+    Args:
+        documents: 검색된 테이블 문서 (검색 순서)
+        column_scores: 문서별 컬럼 이름 -> 질문과의 유사도
+        token_budget: 전체 context 토큰 예산
+        min_columns: 테이블마다 남길 최소 상위 컬럼 수
+        sample_rows: 포함할 샘플 행 수
+
+    Returns:
+        List[str]: 축약된 테이블 context 리스트 (documents와 같은 순서)
+    """
+    keeps: List[Set[str] | None] = []
+    candidates = []
+    used_tokens = 0
+    for position, (doc, scores) in enumerate(zip(documents, column_scores)):
+        columns = doc.metadata.get("columns")
+        if not columns:
+            keeps.append(None)
+            used_tokens += count_tokens(doc.metadata["context"])
+            continue
+
+        keep = {column["name"] for column in columns if column["key"]}
+        ranked = sorted(
+            (column for column in columns if column["name"] not in keep),
+            key=lambda column: scores.get(column["name"], 0.0),
+            reverse=True,
+        )
+        keep.update(column["name"] for column in ranked[:min_columns])
+        keeps.append(keep)
+        used_tokens += count_tokens(
+            render_table_context(doc.metadata, keep, sample_rows)
+        )
+        candidates += [
+            (scores.get(column["name"], 0.0), position, column)
+            for column in ranked[min_columns:]
+        ]
+
+    # 남은 예산 안에서 질문과 유사한 컬럼부터 추가
+    candidates.sort(key=lambda candidate: candidate[0], reverse=True)
+    for _, position, column in candidates:
+        cost = column_cost(column, sample_rows)
+        if used_tokens + cost > token_budget:
+            continue
+        keeps[position].add(column["name"])  # type: ignore
+        used_tokens += cost
+
+    return [
+        render_table_context(doc.metadata, keep, sample_rows)
+        for doc, keep in zip(documents, keeps)
+    ]
@@ -0,0 +1,275 @@
+import os
+import threading
+from contextlib import contextmanager, asynccontextmanager
+from typing import Dict, Any, Callable, Iterator, AsyncIterator, List
+
+from sqlalchemy import create_engine, event
+from sqlalchemy.engine import Engine, Connection, make_url
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncConnection, create_async_engine
+from sqlalchemy.pool import QueuePool
+
+from .utils import str2bool
+
+
+def get_engine_config() -> Dict[str, Any]:
+    """
+    환경변수에서 쿼리 실행용 커넥션 풀 설정을 읽어옵니다.
+
+    - DB_POOL_SIZE: 풀에 유지할 커넥션 수
+    - DB_MAX_OVERFLOW: 풀이 가득 찼을 때 추가로 만들 수 있는 커넥션 수
+    - DB_POOL_TIMEOUT: 풀에서 커넥션을 얻기까지 기다리는 최대 시간(초)
+    - DB_POOL_RECYCLE: 커넥션을 다시 만드는 주기(초). MySQL wait_timeout보다 짧게 설정
+    - DB_POOL_PRE_PING: 커넥션을 꺼낼 때 끊어졌는지 확인할지 여부
+    """
+    return {
+        "pool_size": int(os.getenv("DB_POOL_SIZE", 5)),
+        "max_overflow": int(os.getenv("DB_MAX_OVERFLOW", 10)),
+        "pool_timeout": float(os.getenv("DB_POOL_TIMEOUT", 10)),
+        "pool_recycle": int(os.getenv("DB_POOL_RECYCLE", 1800)),
+        "pool_pre_ping": str2bool(os.getenv("DB_POOL_PRE_PING", "true")),
+    }
+
+
+# 동기 드라이버 -> asyncio 드라이버
+ASYNC_DRIVERS = {"mysql": "mysql+aiomysql", "sqlite": "sqlite+aiosqlite"}
+
+
+def to_async_url(url: str) -> str:
+    """URL 환경변수의 접속 URL을 같은 서버에 접속하는 asyncio 드라이버 URL로 바꿉니다."""
+    parsed = make_url(url)
+    backend = parsed.get_backend_name()
+    if backend not in ASYNC_DRIVERS:
+        raise ValueError(f"asyncio driver is not configured for '{backend}'")
+    return parsed.set(drivername=ASYNC_DRIVERS[backend]).render_as_string(
+        hide_password=False
+    )
+
+
+class EngineRegistry:
+    """접속 URL별로 하나의 SQLAlchemy 엔진(커넥션 풀)을 프로세스 전체에서 공유합니다.
+    쿼리를 실행할 때마다 엔진을 만들지 않으므로 MySQL 접속(handshake) 비용은 풀이 커넥션을 새로 만들 때만 듭니다.
+    asynchronous=True이면 asyncio 드라이버(aiomysql)의 AsyncEngine을 만듭니다.
+    """
+
+    def __init__(self, asynchronous: bool = False):
+        self.asynchronous = asynchronous
+        self._engines: Dict[str, Any] = {}
+        self._counters: Dict[str, Dict[str, int]] = {}
+        self._lock = threading.Lock()
+
+    def get(self, url: str) -> Any:
+        engine = self._engines.get(url)
+        if engine is not None:
+            return engine
+        with self._lock:
+            if url not in self._engines:
+                self._engines[url] = self._create(url)
+            return self._engines[url]
+
+    def _create(self, url: str) -> Any:
+        config = get_engine_config()
+        create = create_async_engine if self.asynchronous else create_engine
+        if self.asynchronous:
+            url = to_async_url(url)
+        if url.startswith("sqlite"):
+            # sqlite(테스트용)는 QueuePool 옵션을 사용하지 않는다.
+            engine = create(url, pool_pre_ping=config["pool_pre_ping"])
+        else:
+            engine = create(url, **config)
+        # 이벤트와 풀 상태는 AsyncEngine이 감싸고 있는 동기 엔진에서 다룬다.
+        sync_engine = engine.sync_engine if self.asynchronous else engine
+
+        counters = {"connects": 0, "checkouts": 0}
+        self._counters[url] = counters
+
+        @event.listens_for(sync_engine, "connect")
+        def on_connect(dbapi_connection, connection_record):
+            counters["connects"] += 1
+
+        @event.listens_for(sync_engine, "checkout")
+        def on_checkout(dbapi_connection, connection_record, connection_proxy):
+            counters["checkouts"] += 1
+
+        return engine
+
+    def stats(self) -> Dict[str, Dict[str, Any]]:
+        stats = {}
+        for url, engine in list(self._engines.items()):
+            if self.asynchronous:
+                engine = engine.sync_engine
+            pool = engine.pool
+            pool_stats: Dict[str, Any] = dict(self._counters[url])
+            if isinstance(pool, QueuePool):
+                pool_stats.update(
+                    size=pool.size(),
+                    checked_in=pool.checkedin(),
+                    checked_out=pool.checkedout(),
+                    overflow=pool.overflow(),
+                )
+            stats[engine.url.render_as_string(hide_password=True)] = pool_stats
+        return stats
+
+    def dispose(self) -> None:
+        with self._lock:
+            for engine in self._engines.values():
+                engine.dispose()
+            self._engines.clear()
+            self._counters.clear()
+
+    async def adispose(self) -> None:
+        """AsyncEngine의 커넥션은 이벤트 루프 안에서 닫아야 한다."""
+        with self._lock:
+            engines = list(self._engines.values())
+            self._engines.clear()
+            self._counters.clear()
+        for engine in engines:
+            await engine.dispose()
+
+
+class BatchEngines:
+    """일괄 작업(스키마 추출, 샘플 행 조회)에서 데이터베이스별 엔진을 처음 쓸 때 만들고,
+    그 데이터베이스의 작업이 모두 끝나면 바로 dispose합니다.
+    데이터베이스마다 스레드 수만큼의 풀을 끝까지 들고 있지 않으므로, 열려 있는 커넥션은
+    작업 중인 데이터베이스의 것뿐입니다. (with 블록을 나가면 남은 엔진도 정리)
+    """
+
+    def __init__(
+        self, DB_SERVER: str, tables_by_db: Dict[str, List[str]], max_workers: int
+    ):
+        self.DB_SERVER = DB_SERVER
+        self.max_workers = max_workers
+        self._remaining = {
+            db_name: len(tables) for db_name, tables in tables_by_db.items()
+        }
+        self._engines: Dict[str, Engine] = {}
+        self._lock = threading.Lock()
+
+    def run(self, db_name: str, func: Callable, *args) -> Any:
+        """db_name 엔진으로 func(engine, *args)를 실행합니다. 테이블 하나당 한 번 호출합니다."""
+        try:
+            return func(self._get(db_name), *args)
+        finally:
+            self._done(db_name)
+
+    def _get(self, db_name: str) -> Engine:
+        with self._lock:
+            if db_name not in self._engines:
+                self._engines[db_name] = create_engine(
+                    os.path.join(self.DB_SERVER, db_name),
+                    # 테이블 수보다 큰 풀은 필요 없다.
+                    pool_size=max(1, min(self.max_workers, self._remaining[db_name])),
+                    max_overflow=0,
+                    pool_pre_ping=True,
+                )
+            return self._engines[db_name]
+
+    def _done(self, db_name: str) -> None:
+        with self._lock:
+            self._remaining[db_name] -= 1
+            engine = (
+                self._engines.pop(db_name, None)
+                if self._remaining[db_name] == 0
+                else None
+            )
+        if engine is not None:
+            engine.dispose()
+
+    def __enter__(self) -> "BatchEngines":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        with self._lock:
+            engines = list(self._engines.values())
+            self._engines.clear()
+        for engine in engines:
+            engine.dispose()
+
+
+_registry = EngineRegistry()
+_async_registry = EngineRegistry(asynchronous=True)
+
+
+def get_engine(database: str = "INFORMATION_SCHEMA") -> Engine:
+    """
+    URL 환경변수의 서버에서 database에 접속하는 공유 엔진을 반환합니다.
+
+    Args:
+        database: 접속할 데이터베이스 이름
+
+    Returns:
+        Engine: 프로세스 전체에서 공유되는 SQLAlchemy 엔진
+    """
+    return _registry.get(os.path.join(os.getenv("URL"), database))  # type: ignore
+
+
+def get_async_engine(database: str = "INFORMATION_SCHEMA") -> AsyncEngine:
+    """
+    get_engine과 같은 서버/데이터베이스에 접속하는 공유 AsyncEngine을 반환합니다(비동기 그래프용).
+
+    Args:
+        database: 접속할 데이터베이스 이름
+
+    Returns:
+        AsyncEngine: 프로세스 전체에서 공유되는 SQLAlchemy asyncio 엔진
+    """
+    return _async_registry.get(os.path.join(os.getenv("URL"), database))  # type: ignore
+
+
+def get_pool_stats() -> Dict[str, Dict[str, Any]]:
+    """엔진별 커넥션 풀 상태와 누적 접속/대여 횟수를 반환합니다."""
+    return {
+        **_registry.stats(),
+        **{f"async:{url}": stats for url, stats in _async_registry.stats().items()},
+    }
+
+
+def dispose_engines() -> None:
+    _registry.dispose()
+
+
+async def adispose_engines() -> None:
+    """동기/비동기 엔진을 모두 정리합니다(서버 종료 시)."""
+    _registry.dispose()
+    await _async_registry.adispose()
+
+
+@contextmanager
+def read_only_connection(engine: Engine) -> Iterator[Connection]:
+    """
+    읽기 전용 트랜잭션에서 쿼리를 실행하는 커넥션을 제공합니다.
+    생성된 SQL이 데이터를 바꾸려 하면 데이터베이스가 오류를 내며, 끝나면 항상 롤백합니다.
+    """
+    with engine.connect() as connection:
+        dialect = engine.dialect.name
+        if dialect == "sqlite":
+            connection.exec_driver_sql("PRAGMA query_only = ON")
+        else:
+            # MySQL: 다음에 시작되는 트랜잭션(생성된 쿼리)에 적용
+            connection.exec_driver_sql("SET TRANSACTION READ ONLY")
+        try:
+            yield connection
+        finally:
+            connection.rollback()
+            if dialect == "sqlite":
+                connection.exec_driver_sql("PRAGMA query_only = OFF")
+                connection.commit()
+
+
+@asynccontextmanager
+async def async_read_only_connection(
+    engine: AsyncEngine,
+) -> AsyncIterator[AsyncConnection]:
+    """read_only_connection의 asyncio 버전입니다."""
+    async with engine.connect() as connection:
+        dialect = engine.dialect.name
+        if dialect == "sqlite":
+            await connection.exec_driver_sql("PRAGMA query_only = ON")
+        else:
+            await connection.exec_driver_sql("SET TRANSACTION READ ONLY")
+        try:
+            yield connection
+        finally:
+            await connection.rollback()
+            if dialect == "sqlite":
+                await connection.exec_driver_sql("PRAGMA query_only = OFF")
+                await connection.commit()
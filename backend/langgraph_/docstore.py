@@ -0,0 +1,98 @@
+import json
+import sqlite3
+import threading
+from typing import Dict
+
+from langchain_core.documents import Document
+from langchain_community.docstore.base import Docstore
+from langchain_community.docstore.in_memory import InMemoryDocstore
+
+DOCSTORE_FILE = "docstore.sqlite"
+
+
+def write_docstore(
+    path: str, docstore: Docstore, index_to_docstore_id: Dict[int, str]
+) -> None:
+    """
+    FAISS 인덱스 위치(position)와 함께 문서들을 sqlite 파일로 저장합니다.
+    pickle을 사용하지 않으므로 불러올 때 임의 코드가 실행될 위험이 없습니다.
+    """
+    conn = sqlite3.connect(path)
+    try:
+        conn.execute("""
+            CREATE TABLE docs (
+                id TEXT PRIMARY KEY,
+                position INTEGER NOT NULL,
+                page_content TEXT NOT NULL,
+                metadata TEXT NOT NULL
+            )
+            """)
+        rows = []
+        for position, doc_id in index_to_docstore_id.items():
+            doc = docstore.search(doc_id)
+            rows.append(
+                (
+                    doc_id,
+                    position,
+                    doc.page_content,  # type: ignore
+                    json.dumps(doc.metadata, ensure_ascii=False),  # type: ignore
+                )
+            )
+        conn.executemany("INSERT INTO docs VALUES (?, ?, ?, ?)", rows)
+        conn.commit()
+    finally:
+        conn.close()
+
+
+def read_index_to_docstore_id(path: str) -> Dict[int, str]:
+    """인덱스 위치 -> 문서 id 매핑만 읽어옵니다(문서 내용은 읽지 않음)."""
+    conn = sqlite3.connect(f"file:{path}?mode=ro", uri=True)
+    try:
+        rows = conn.execute("SELECT position, id FROM docs").fetchall()
+    finally:
+        conn.close()
+    return {position: doc_id for position, doc_id in rows}
+
+
+def read_in_memory_docstore(path: str) -> InMemoryDocstore:
+    """증분 갱신처럼 문서를 추가/삭제해야 하는 경우를 위해 모든 문서를 메모리로 불러옵니다."""
+    conn = sqlite3.connect(f"file:{path}?mode=ro", uri=True)
+    try:
+        rows = conn.execute("SELECT id, page_content, metadata FROM docs").fetchall()
+    finally:
+        conn.close()
+    return InMemoryDocstore(
+        {
+            doc_id: Document(page_content=page_content, metadata=json.loads(metadata))
+            for doc_id, page_content, metadata in rows
+        }
+    )
+
+
+class SqliteDocstore(Docstore):
+    """검색 결과로 필요한 문서만 id로 sqlite에서 읽어오는 읽기 전용 docstore입니다.
+    문서 내용은 프로세스 메모리가 아니라 OS 페이지 캐시에 올라가므로 여러 워커가 함께 사용합니다.
+    문서를 추가/삭제하는 증분 갱신은 read_in_memory_docstore로 불러온 docstore에서만 합니다.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._local = threading.local()
+
+    def _conn(self) -> sqlite3.Connection:
+        # sqlite 커넥션은 스레드 간 공유하지 않고 스레드마다 하나씩 연다.
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(f"file:{self.path}?mode=ro", uri=True)
+            self._local.conn = conn
+        return conn
+
+    def search(self, search: str) -> Document | str:
+        row = (
+            self._conn()
+            .execute("SELECT page_content, metadata FROM docs WHERE id = ?", (search,))
+            .fetchone()
+        )
+        if row is None:
+            return f"ID {search} not found."
+        return Document(page_content=row[0], metadata=json.loads(row[1]))
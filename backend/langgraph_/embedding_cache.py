@@ -0,0 +1,142 @@
+import os
+import time
+import sqlite3
+import hashlib
+import threading
+from array import array
+from typing import List, Dict, Iterable
+
+from langchain_core.embeddings import Embeddings
+
+EMBEDDING_CACHE_PATH = "embedding_cache.sqlite"
+
+# sqlite의 바인딩 변수 개수 제한을 넘지 않도록 조회를 나누어 진행
+LOOKUP_CHUNK_SIZE = 500
+
+
+def make_cache_key(model_name: str, text: str) -> str:
+    """모델 이름과 문서 내용으로 content-addressed key를 만듭니다."""
+    return hashlib.sha256(f"{model_name}\0{text}".encode("utf-8")).hexdigest()
+
+
+class CachedEmbeddings(Embeddings):
+    """스키마 문서 임베딩 결과를 디스크(sqlite)에 저장해 두고 재사용하는 임베딩 래퍼입니다.
+    캐시 key는 모델 이름과 문서 내용의 해시이므로, 바뀌지 않은 테이블은 다시 임베딩하지 않습니다.
+    사용자 질문(embed_query)은 캐시하지 않고 그대로 전달합니다.
+    """
+
+    def __init__(
+        self,
+        embeddings: Embeddings,
+        model_name: str,
+        cache_path: str = EMBEDDING_CACHE_PATH,
+        batch_size: int | None = None,
+    ):
+        self.embeddings = embeddings
+        self.model_name = model_name
+        self.cache_path = cache_path
+        # 캐시에 없는 문서를 한 번에 임베딩 요청할 개수
+        self.batch_size = batch_size or int(os.getenv("EMBEDDING_BATCH_SIZE", 256))
+        self.hits = 0
+        self.misses = 0
+
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(cache_path, check_same_thread=False)
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS embeddings (
+                key TEXT PRIMARY KEY,
+                model TEXT NOT NULL,
+                vector BLOB NOT NULL,
+                last_used REAL NOT NULL
+            )
+            """)
+        self._conn.commit()
+
+    def _lookup(self, keys: List[str]) -> Dict[str, List[float]]:
+        found = {}
+        now = time.time()
+        with self._lock:
+            for i in range(0, len(keys), LOOKUP_CHUNK_SIZE):
+                chunk = keys[i : i + LOOKUP_CHUNK_SIZE]
+                placeholders = ",".join("?" * len(chunk))
+                rows = self._conn.execute(
+                    f"SELECT key, vector FROM embeddings WHERE key IN ({placeholders})",
+                    chunk,
+                ).fetchall()
+                for key, blob in rows:
+                    found[key] = array("f", blob).tolist()
+                self._conn.execute(
+                    f"UPDATE embeddings SET last_used = ? WHERE key IN ({placeholders})",
+                    [now, *chunk],
+                )
+            self._conn.commit()
+        return found
+
+    def _store(self, items: Dict[str, List[float]]) -> None:
+        now = time.time()
+        with self._lock:
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO embeddings (key, model, vector, last_used) VALUES (?, ?, ?, ?)",
+                [
+                    (key, self.model_name, array("f", vector).tobytes(), now)
+                    for key, vector in items.items()
+                ],
+            )
+            self._conn.commit()
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        keys = [make_cache_key(self.model_name, text) for text in texts]
+        cached = self._lookup(list(set(keys)))
+
+        # 캐시에 없는 문서만 중복 없이 모아서 배치 단위로 임베딩
+        missing = {}
+        for key, text in zip(keys, texts):
+            if key not in cached:
+                missing.setdefault(key, text)
+        # 적중/실패 모두 중복을 뺀 문서 수로 센다.
+        self.hits += len(cached)
+        self.misses += len(missing)
+
+        missing_keys = list(missing)
+        for i in range(0, len(missing_keys), self.batch_size):
+            batch_keys = missing_keys[i : i + self.batch_size]
+            vectors = self.embeddings.embed_documents(
+                [missing[key] for key in batch_keys]
+            )
+            new_items = dict(zip(batch_keys, vectors))
+            self._store(new_items)
+            cached.update(new_items)
+
+        return [cached[key] for key in keys]
+
+    def embed_query(self, text: str) -> List[float]:
+        return self.embeddings.embed_query(text)
+
+    def evict_unreferenced(self, referenced_texts: Iterable[str]) -> int:
+        """현재 인덱스에서 더 이상 참조하지 않는 캐시 항목을 삭제합니다.
+
+        Args:
+            referenced_texts: 현재 인덱스에 들어있는 문서 내용
+
+        Returns:
+            int: 삭제된 항목 수
+        """
+        referenced = {
+            make_cache_key(self.model_name, text) for text in referenced_texts
+        }
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT key FROM embeddings WHERE model = ?", (self.model_name,)
+            ).fetchall()
+            stale = [(key,) for (key,) in rows if key not in referenced]
+            self._conn.executemany("DELETE FROM embeddings WHERE key = ?", stale)
+            self._conn.commit()
+        return len(stale)
+
+    def stats(self) -> Dict[str, float]:
+        total = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / total, 4) if total else 0.0,
+        }
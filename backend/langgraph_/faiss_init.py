@@ -1,18 +1,58 @@
 import pandas as pd
 import os
-import time
-import shutil
 from typing import List, Dict, Tuple
 
-from langchain_core.vectorstores import VectorStore
-from langchain_community.vectorstores import FAISS
+from langchain_core.embeddings import Embeddings, DeterministicFakeEmbedding
 from langchain_openai import OpenAIEmbeddings
-from langchain_community.utilities import SQLDatabase
-from langchain_community.vectorstores.utils import DistanceStrategy
 
-from sqlalchemy import create_engine, inspect
+from sqlalchemy import create_engine
 from dotenv import load_dotenv
 
+from .schema_extract import extract_table_docs, attach_sample_rows
+from .sample_store import SampleRowStore
+from .embedding_cache import CachedEmbeddings
+from .sharded_store import ShardedVectorStore
+from .ann_index import get_build_config
+from .join_graph import JoinGraph, build_join_graph
+from .column_index import ColumnIndex, build_column_index, iter_column_texts
+from .schema_catalog import SchemaCatalog, build_schema_catalog
+from .index_store import (
+    new_version_id,
+    version_path,
+    get_current_version,
+    publish_version,
+)
+from .schema_refresh import (
+    get_table_states,
+    load_manifest,
+    save_manifest,
+    diff_table_states,
+    group_by_db,
+)
+
+LOCAL_FAISS_PATH = "local_faiss"
+# 데이터베이스별 shard(메모리 매핑용 .npy 벡터 포함) + 컬럼 인덱스, 컬럼 정보가 포함된 문서
+INDEX_FORMAT = "sharded-v4"
+DEFAULT_EMBEDDING_MODEL = "text-embedding-3-small"
+
+
+def get_embeddings() -> CachedEmbeddings:
+    """
+    스키마 문서 임베딩에 사용할 임베딩 객체를 생성합니다.
+    EMBEDDING_MODEL 환경변수가 "fake"인 경우 외부 호출 없이 결정적인 가짜 임베딩을 사용합니다(테스트용).
+
+    Returns:
+        CachedEmbeddings: 디스크 캐시가 적용된 임베딩 객체
+    """
+    model_name = os.getenv("EMBEDDING_MODEL", DEFAULT_EMBEDDING_MODEL)
+    embeddings: Embeddings
+    if model_name == "fake":
+        embeddings = DeterministicFakeEmbedding(size=1536)
+    else:
+        # OpenAI 임베딩을 사용하여 텍스트 정보를 벡터로 변환
+        embeddings = OpenAIEmbeddings(model=model_name)
+    return CachedEmbeddings(embeddings, model_name)
+
 
 def get_db_names(engine) -> List[str]:
     """
@@ -40,104 +80,250 @@ def get_db_names(engine) -> List[str]:
     return db_names
 
 
-def embed_db_info(
-    db_names: str | None, DB_SERVER: str, sample_info: int
-) -> VectorStore:
+def load_vector_store(
+    version: str, local_path: str = LOCAL_FAISS_PATH
+) -> ShardedVectorStore:
+    """발행된 특정 버전의 FAISS 인덱스를 검색용으로 불러옵니다.
+    FAISS_INDEX_TYPE으로 학습된 ANN 인덱스가 있으면 그것을 사용합니다.
+    """
+    return ShardedVectorStore.load_local(
+        version_path(local_path, version), get_embeddings(), search_only=True
+    )
+
+
+def load_join_graph(version: str, local_path: str = LOCAL_FAISS_PATH) -> JoinGraph:
+    """발행된 특정 버전의 테이블 조인 그래프를 불러옵니다."""
+    return JoinGraph.load(version_path(local_path, version))
+
+
+def load_column_index(version: str, local_path: str = LOCAL_FAISS_PATH) -> ColumnIndex:
+    """발행된 특정 버전의 컬럼 인덱스를 불러옵니다."""
+    return ColumnIndex.load(version_path(local_path, version))
+
+
+def load_schema_catalog(
+    version: str, local_path: str = LOCAL_FAISS_PATH
+) -> SchemaCatalog:
+    """발행된 특정 버전의 스키마 카탈로그(테이블별 컬럼 이름)를 불러옵니다."""
+    return SchemaCatalog.load(version_path(local_path, version))
+
+
+def get_index_build_config(embeddings: Embeddings) -> Dict:
+    """인덱스 버전에 반영되는 설정. 임베딩 모델과 검색용 ANN 인덱스 설정(FAISS_INDEX_TYPE 등)입니다."""
+    return {
+        "embedding_model": getattr(embeddings, "model_name", type(embeddings).__name__),
+        **get_build_config(),
+    }
+
+
+def save_vector_store(
+    vector_store: ShardedVectorStore,
+    local_path: str,
+    table_states: Dict[str, Dict],
+    join_graph: JoinGraph,
+) -> str:
+    """
+    FAISS 인덱스, 컬럼 인덱스, 스키마 카탈로그를 새 버전 폴더에 저장한 뒤 현재 버전으로 발행합니다.
+    서비스 중인 버전 폴더는 건드리지 않으므로, 저장 도중 읽거나 중단되어도 기존 인덱스는 그대로 남습니다.
+
+    Returns:
+        str: 발행된 버전 id
+    """
+    version = new_version_id()
+    path = version_path(local_path, version)
+    os.makedirs(path)
+    vector_store.save_local(path)
+    join_graph.save(path)
+    # 컬럼 인덱스는 매번 전체를 다시 만들지만, 바뀌지 않은 컬럼은 임베딩 캐시에서 가져온다.
+    build_column_index(
+        vector_store.iter_documents(), vector_store.embedding_function
+    ).save(path)
+    # 생성된 SQL을 로컬에서 검사할 때 쓰는 테이블/컬럼 이름 목록
+    build_schema_catalog(vector_store.iter_documents()).save(path)
+    save_manifest(
+        path,
+        table_states,
+        INDEX_FORMAT,
+        get_index_build_config(vector_store.embedding_function),
+    )
+    publish_version(local_path, version)
+
+    # 인덱스에서 빠진 문서의 임베딩은 캐시에서도 제거
+    embeddings = vector_store.embedding_function
+    if isinstance(embeddings, CachedEmbeddings):
+        documents = list(vector_store.iter_documents())
+        referenced_texts = [doc.page_content for doc in documents]
+        referenced_texts += [text for _, text in iter_column_texts(documents)]
+        evicted = embeddings.evict_unreferenced(referenced_texts)
+        print(f"임베딩 캐시: {embeddings.stats()}, 제거된 항목 {evicted}개")
+
+    return version
+
+
+def refresh_vector_store(
+    vector_store: ShardedVectorStore,
+    added: List[str],
+    changed: List[str],
+    dropped: List[str],
+    table_states: Dict[str, Dict],
+    DB_SERVER: str,
+    sample_info: int,
+    sample_store: SampleRowStore,
+) -> None:
+    """
+    변경된 테이블만 FAISS 인덱스에 반영합니다.
+    새로 생기거나 변경된 테이블은 다시 임베딩하고, 삭제된 테이블의 벡터는 인덱스에서 제거합니다.
+    """
+    # 변경/삭제된 테이블의 기존 벡터 제거
+    vector_store.delete(ids=changed + dropped)
+
+    # 추가/변경된 테이블만 다시 임베딩
+    texts, metadatas, ids = extract_table_docs(
+        DB_SERVER,
+        group_by_db(added + changed, table_states),
+        sample_info,
+        sample_store.get(added + changed),
+    )
+    if texts:
+        vector_store.add_texts(texts=texts, metadatas=metadatas, ids=ids)
+
+
+def update_sample_rows(
+    vector_store: ShardedVectorStore,
+    keys: List[str],
+    sample_store: SampleRowStore,
+    sample_info: int,
+) -> None:
+    """
+    스키마는 그대로이고 데이터만 바뀐 테이블의 샘플 행만 문서에 반영합니다.
+    DDL(임베딩 대상)이 바뀌지 않으므로 reflection과 임베딩 없이 문서 메타데이터만 교체합니다.
+    """
+    samples = sample_store.get(keys)
+    documents = vector_store.get_documents(keys)
+    for doc in documents:
+        key = f"{doc.metadata['db']}.{doc.metadata['table']}"
+        attach_sample_rows(
+            doc.metadata, doc.page_content, *samples.get(key, ([], [])), sample_info
+        )
+    vector_store.update_documents(documents)
+
+
+def embed_db_info(db_names: List[str], DB_SERVER: str, sample_info: int, engine) -> str:
     """
     FAISS 벡터 데이터베이스에 데이터베이스 정보를 임베딩합니다.
+    기존 인덱스와 manifest가 있으면 변경된 테이블만 증분 반영하고, 없으면 전체를 새로 생성합니다.
+    변경된 인덱스는 항상 새 버전으로 저장되어 원자적으로 발행됩니다.
 
     Args:
         db_names: 데이터베이스 이름 목록
         DB_SERVER: 데이터베이스 서버 경로
         sample_info: 각 테이블에서 샘플링할 행 수
+        engine: INFORMATION_SCHEMA에 연결된 SQLAlchemy 엔진 인스턴스
 
     Returns:
-        FAISS 벡터 데이터베이스 인스턴스
+        str: 최신 상태로 발행된 인덱스 버전 id
     """
+    # 이미 임베딩한 적 있는 문서는 디스크 캐시에서 바로 가져온다.
+    embeddings = get_embeddings()
+
+    local_path = LOCAL_FAISS_PATH
+
+    # 테이블별 변경 감지 정보 조회
+    table_states = get_table_states(engine, db_names)
+
+    # UPDATE_TIME이 바뀌었거나 TTL이 지난 테이블의 샘플 행만 동시에 다시 조회
+    sample_store = SampleRowStore()
+    resampled = sample_store.refresh(DB_SERVER, table_states, sample_info)
+    print(f"샘플 행 갱신: {len(resampled)}개 테이블 ({sample_store.stats()})")
+    current_version = get_current_version(local_path)
+    manifest = (
+        load_manifest(version_path(local_path, current_version))
+        if current_version
+        else None
+    )
+    index_config = get_index_build_config(embeddings)
+    # 저장 형식이나 임베딩 모델이 다른 이전 버전의 인덱스는 새로 생성
+    if manifest is not None and (
+        manifest.get("format") != INDEX_FORMAT
+        or manifest.get("index_config", {}).get("embedding_model")
+        != index_config["embedding_model"]
+    ):
+        manifest = None
+
+    # 발행된 버전과 manifest가 있는 경우 변경분만 반영
+    if manifest is not None:
+        added, changed, dropped = diff_table_states(manifest["tables"], table_states)
+        # 스키마 변경 없이 샘플 행만 바뀐 테이블
+        resampled = [
+            key for key in resampled if key in manifest["tables"] and key not in changed
+        ]
+        print(
+            f"스키마 변경 감지: 추가 {len(added)}개, 변경 {len(changed)}개, 삭제 {len(dropped)}개, "
+            f"샘플 갱신 {len(resampled)}개"
+        )
+        # ANN 인덱스 설정(FAISS_INDEX_TYPE 등)만 바뀌었으면 flat 인덱스는 그대로 두고 검색용 인덱스만 다시 만든다.
+        config_changed = manifest.get("index_config") != index_config
+        if config_changed:
+            print(
+                f"인덱스 설정 변경 감지: {manifest.get('index_config')} -> {index_config}"
+            )
+        # 변경이 없으면 인덱스를 불러올 필요 없이 현재 버전을 그대로 사용
+        if not (added or changed or dropped or resampled or config_changed):
+            return current_version  # type: ignore
 
-    def is_local_data_valid(local_path: str) -> bool:
-        """
-        로컬 데이터의 유효성과 최신성을 확인합니다.
-        데이터가 생성된지 24시간 이내라면 TRUE, 아니면 FALSE를 반환합니다.
-        """
-        if not os.path.exists(local_path):
-            return False
-
-        # 예시: 파일 생성 후 24시간 이내인지 확인
-        file_age = time.time() - os.path.getctime(local_path)
-        return file_age < 24 * 60 * 60  # 24시간
-
-    # OpenAI 임베딩을 사용하여 텍스트 정보를 벡터로 변환
-    embeddings = OpenAIEmbeddings(model="text-embedding-3-small")
-
-    local_path = "local_faiss"
-
-    # 로컬 데이터가 유효한 경우 로드
-    if is_local_data_valid(local_path):
-        print("기존 FAISS 벡터 데이터베이스 불러오는 중...")
-        vector_store = FAISS.load_local(
-            local_path,
-            embeddings,
-            allow_dangerous_deserialization=True,
-            distance_strategy=DistanceStrategy.COSINE,
+        print(
+            f"기존 FAISS 벡터 데이터베이스 불러오는 중... (version={current_version})"
+        )
+        vector_store = ShardedVectorStore.load_local(
+            version_path(local_path, current_version), embeddings
         )
         print("로컬 FAISS 벡터 데이터베이스 불러오기 완료!")
-    else:
-        # 데이터베이스와 테이블 정보를 저장할 리스트 초기화
-        db_info = []
-        db_metadata = []  # 실제 반환될 메타데이터 리스트
 
+        refresh_vector_store(
+            vector_store,
+            added,
+            changed,
+            dropped,
+            table_states,
+            DB_SERVER,
+            sample_info,
+            sample_store,
+        )
+        update_sample_rows(vector_store, resampled, sample_store, sample_info)
+        join_graph = build_join_graph(engine, db_names)
+        version = save_vector_store(vector_store, local_path, table_states, join_graph)
+        print("FAISS 벡터 데이터베이스 증분 갱신 완료!\n")
+    else:
         print("데이터 확보 중...")
-        # 주어진 모든 데이터베이스 이름에 대해 반복
-        for db_name in db_names:
-            # SQLDatabase 객체를 생성하여 데이터베이스에 연결
-            sql_db_info = SQLDatabase.from_uri(
-                os.path.join(DB_SERVER, db_name), sample_rows_in_table_info=0
-            )
-
-            sql_db_meta = SQLDatabase.from_uri(
-                os.path.join(DB_SERVER, db_name), sample_rows_in_table_info=sample_info
-            )
-
-            # 데이터베이스에서 사용할 수 있는 테이블 이름을 가져와 반복
-            for table_name in sql_db_info.get_usable_table_names():
-                # 테이블의 스키마 정보를 가져옴
-                table_schema = sql_db_info.get_table_info([table_name])
-
-                # DDL 정보만 벡터 임베딩을 위한 데이터로 사용
-                processed_schema = f"{table_schema}"
-                db_info.append(processed_schema)
-
-            # 데이터베이스에서 사용할 수 있는 테이블 이름을 가져와 반복
-            for table_name in sql_db_meta.get_usable_table_names():
-                # 테이블의 스키마 정보를 가져옴
-                table_schema = sql_db_meta.get_table_info([table_name])
-                # 메타데이터는 별도로 저장
-                metadata = {"context": f"DB:{db_name}\nDDL:{table_schema}"}
-                db_metadata.append(metadata)
+        # 모든 데이터베이스의 테이블을 한 번의 reflection으로 병렬 추출
+        # db_metadata가 실제 반환될 메타데이터 리스트
+        db_info, db_metadata, db_ids = extract_table_docs(
+            DB_SERVER,
+            group_by_db(list(table_states), table_states),
+            sample_info,
+            sample_store.get(list(table_states)),
+        )
 
         print(f"총 {len(db_info)}개의 데이터 확보")
 
         print("FAISS 벡터 데이터베이스 생성 중...")
-        # FAISS 벡터 데이터베이스 생성 및 로컬 저장
-        vector_store = FAISS.from_texts(
+        # 데이터베이스별 FAISS shard 생성 및 로컬 저장
+        vector_store = ShardedVectorStore.from_texts(
             texts=db_info,
             embedding=embeddings,
             metadatas=db_metadata,
-            distance_strategy=DistanceStrategy.COSINE,
+            ids=db_ids,
         )
 
-        # .save_local에 경우 덮어씌우기가 되지 않아서 기존에 폴더가 존재할 경우 삭제 필요
-        # FAISS 저장
-        if os.path.exists(local_path):
-            shutil.rmtree(local_path)
-        vector_store.save_local(local_path)
+        # 외래키/컬럼 이름 기반 테이블 조인 그래프 생성
+        join_graph = build_join_graph(engine, db_names)
+        version = save_vector_store(vector_store, local_path, table_states, join_graph)
         print("FAISS 벡터 데이터베이스 생성 완료!\n")
 
-    return vector_store
+    return version
 
 
-def get_vector_stores(sample_info: int = 5) -> VectorStore:
+def get_vector_stores(sample_info: int = 5) -> ShardedVectorStore:
     load_dotenv()
     DB_SERVER = os.getenv("URL")
     information_schema_path = os.path.join(DB_SERVER, "INFORMATION_SCHEMA")
@@ -148,7 +334,14 @@ def get_vector_stores(sample_info: int = 5) -> VectorStore:
     # 접근 가능한 DB 이름 얻기
     db_names = get_db_names(engine)
 
-    # FAISS 벡터 스토어 얻기
-    vector_store = embed_db_info(db_names, DB_SERVER, sample_info)
+    # 인덱스를 최신 상태로 갱신한 뒤 검색용으로 불러오기
+    version = embed_db_info(db_names, DB_SERVER, sample_info, engine)
+    vector_store = load_vector_store(version)
 
     return vector_store
+
+
+if __name__ == "__main__":
+    # 백그라운드 재색인용: 새 버전을 만들어 발행하면 실행 중인 백엔드가 자동으로 교체해 불러온다.
+    # 사용법: (backend 폴더에서) python -m langgraph_.faiss_init
+    get_vector_stores()
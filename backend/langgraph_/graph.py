@@ -4,6 +4,8 @@ from langgraph.checkpoint.memory import MemorySaver
 
 from .node import (
     GraphState,
+    question_cache_lookup,
+    question_cache_checker,
     question_evaluation,
     table_selection,
     non_sql_conversation,
@@ -20,21 +22,49 @@ from .node import (
     user_question_analyze_checker,
     query_checker,
 )
+from . import async_node
+from .speculation import timed_node
 
 
-def make_graph() -> CompiledStateGraph:
+def make_graph(asynchronous: bool = False) -> CompiledStateGraph:
+    """
+    전체 과정의 그래프를 만듭니다.
+
+    Args:
+        asynchronous: True이면 비동기 노드(async_node)로 구성하며, ainvoke로 실행해야 합니다.
+    """
     workflow = StateGraph(GraphState)
 
-    workflow.add_node("question_evaluation", question_evaluation)  # 질문 평가
-    workflow.add_node("general_conversation", non_sql_conversation)  # 일반적인 대화
-    workflow.add_node("question_analysis", question_analyze)  # 질문 분석
-    workflow.add_node("additional_questions", question_clarify)  # 추가 질문
-    workflow.add_node("human_feedback", human_feedback)  # 사용자 피드백
-    workflow.add_node("question_refinement", question_refine)  # 질문 구체화
-    workflow.add_node("table_selection", table_selection)  # 테이블 선택
-    workflow.add_node("sql_query_generation", query_creation)  # SQL 쿼리 생성
-    workflow.add_node("sql_query_validation", query_validation)  # SQL 쿼리 결과 확인
-    workflow.add_node("response", sql_conversation)  # 답변
+    # 노드별 실행 시간을 기록해 추측 실행으로 줄어든 임계 경로를 확인할 수 있게 한다.
+    nodes = {
+        "question_cache": question_cache_lookup,  # 질문-SQL 캐시 조회
+        "question_evaluation": question_evaluation,  # 질문 평가 (질문 분석을 미리 시작)
+        "general_conversation": non_sql_conversation,  # 일반적인 대화
+        "question_analysis": question_analyze,  # 질문 분석
+        "additional_questions": question_clarify,  # 추가 질문
+        "human_feedback": human_feedback,  # 사용자 피드백
+        "question_refinement": question_refine,  # 질문 구체화
+        "table_selection": table_selection,  # 테이블 선택
+        "sql_query_generation": query_creation,  # SQL 쿼리 생성
+        "sql_query_validation": query_validation,  # SQL 쿼리 결과 확인
+        "response": sql_conversation,  # 답변
+    }
+    if asynchronous:
+        # 같은 이름의 비동기 노드로 교체 (라우터와 간선은 동일)
+        nodes = {
+            name: getattr(async_node, node.__name__) for name, node in nodes.items()
+        }
+    for name, node in nodes.items():
+        workflow.add_node(name, timed_node(name, node))
+
+    workflow.add_conditional_edges(
+        "question_cache",
+        question_cache_checker,
+        {
+            True: "sql_query_validation",
+            False: "question_evaluation",
+        },
+    )
 
     workflow.add_conditional_edges(
         "question_evaluation",
@@ -81,7 +111,7 @@ def make_graph() -> CompiledStateGraph:
     workflow.add_edge("response", END)
 
     # Set the entry point
-    workflow.set_entry_point("question_evaluation")
+    workflow.set_entry_point("question_cache")
 
     # Set up memory storage for recording
     memory = MemorySaver()
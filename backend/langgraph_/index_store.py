@@ -0,0 +1,98 @@
+import os
+import shutil
+import uuid
+from datetime import datetime
+from typing import List
+
+# local_faiss/
+#   CURRENT                  <- 현재 서비스 중인 버전 id (원자적으로 교체)
+#   versions/<version_id>/   <- 버전별 FAISS 인덱스와 manifest
+CURRENT_FILE = "CURRENT"
+VERSIONS_DIR = "versions"
+
+
+def get_keep_versions() -> int:
+    """디스크에 남겨둘 버전 수(현재 버전 포함). INDEX_KEEP_VERSIONS 환경변수로 조절할 수 있습니다."""
+    return max(2, int(os.getenv("INDEX_KEEP_VERSIONS", 3)))
+
+
+def new_version_id() -> str:
+    """시간 순으로 정렬 가능한 새 버전 id를 만듭니다."""
+    return f"{datetime.now().strftime('%Y%m%d%H%M%S')}-{uuid.uuid4().hex[:6]}"
+
+
+def version_path(root: str, version: str) -> str:
+    return os.path.join(root, VERSIONS_DIR, version)
+
+
+def list_versions(root: str) -> List[str]:
+    """디스크에 존재하는 버전 id를 오래된 순서대로 반환합니다."""
+    versions_root = os.path.join(root, VERSIONS_DIR)
+    if not os.path.isdir(versions_root):
+        return []
+    return sorted(os.listdir(versions_root))
+
+
+def get_current_version(root: str) -> str | None:
+    """현재 서비스 중인 버전 id를 반환합니다. 발행된 버전이 없으면 None을 반환합니다."""
+    current_path = os.path.join(root, CURRENT_FILE)
+    if not os.path.exists(current_path):
+        return None
+    with open(current_path, "r", encoding="utf-8") as f:
+        version = f.read().strip()
+    if not version or not os.path.isdir(version_path(root, version)):
+        return None
+    return version
+
+
+def write_current(root: str, version: str) -> None:
+    """임시 파일에 버전 id를 쓴 뒤 os.replace로 CURRENT를 원자적으로 교체합니다."""
+    tmp_path = os.path.join(root, f"{CURRENT_FILE}.{uuid.uuid4().hex}.tmp")
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        f.write(version)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, os.path.join(root, CURRENT_FILE))
+
+
+def publish_version(root: str, version: str) -> None:
+    """
+    완성된 버전을 현재 버전으로 발행합니다.
+    CURRENT가 원자적으로 교체되므로, 읽는 쪽은 항상 완전히 저장된 버전만 보게 됩니다.
+    """
+    if not os.path.isdir(version_path(root, version)):
+        raise FileNotFoundError(f"존재하지 않는 인덱스 버전입니다: {version}")
+
+    write_current(root, version)
+    print(f"FAISS 인덱스 버전 발행: {version}")
+
+    prune_versions(root)
+
+
+def prune_versions(root: str) -> None:
+    """현재 버전과 롤백용 이전 버전들만 남기고 오래된 버전을 삭제합니다."""
+    current = get_current_version(root)
+    versions = list_versions(root)
+    stale = versions[: -get_keep_versions()]
+    for version in stale:
+        if version != current:
+            shutil.rmtree(version_path(root, version), ignore_errors=True)
+
+
+def rollback_version(root: str) -> str:
+    """
+    현재 버전 직전의 버전으로 되돌립니다.
+
+    Returns:
+        str: 새로 발행된(되돌아간) 버전 id
+    """
+    current = get_current_version(root)
+    versions = list_versions(root)
+    if current not in versions or versions.index(current) == 0:
+        raise ValueError("되돌릴 이전 버전이 없습니다.")
+    previous = versions[versions.index(current) - 1]
+
+    write_current(root, previous)
+    # 롤백한 버전(current)은 다시 발행될 수 있도록 삭제하지 않는다.
+    print(f"FAISS 인덱스 버전 롤백: {current} -> {previous}")
+    return previous
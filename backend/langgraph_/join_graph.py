@@ -0,0 +1,154 @@
+import os
+import json
+from collections import deque
+from typing import List, Dict, Set
+
+import pandas as pd
+from sqlalchemy import text, bindparam
+
+JOIN_GRAPH_FILE = "join_graph.json"
+
+
+def singularize(name: str) -> str:
+    """테이블 이름의 단순 복수형(customers, categories)을 단수형으로 바꿉니다."""
+    if name.endswith("ies"):
+        return name[:-3] + "y"
+    if name.endswith("s") and not name.endswith("ss"):
+        return name[:-1]
+    return name
+
+
+class JoinGraph:
+    """테이블 간 조인 가능 관계를 담은 무방향 그래프입니다.
+    노드는 "DB.테이블" 문서 id이며, 외래키와 컬럼 이름 일치로 간선을 만듭니다.
+    """
+
+    def __init__(self, edges: Dict[str, List[str]] | None = None):
+        self.adjacency: Dict[str, Set[str]] = {
+            node: set(neighbors) for node, neighbors in (edges or {}).items()
+        }
+
+    def add_edge(self, a: str, b: str) -> None:
+        if a == b:
+            return
+        self.adjacency.setdefault(a, set()).add(b)
+        self.adjacency.setdefault(b, set()).add(a)
+
+    def expand(
+        self, hit_ids: List[str], max_hops: int = 2, max_extra: int = 3
+    ) -> List[str]:
+        """
+        검색된 테이블들 사이의 조인 경로에 있는 테이블을 찾습니다.
+        각 테이블에서 max_hops 이내의 너비 우선 탐색으로 다른 검색 결과에 도달하면,
+        그 경로의 중간 테이블들을 추가 후보로 반환합니다.
+
+        Args:
+            hit_ids: 유사도 검색으로 얻은 문서 id 목록 (유사도 순)
+            max_hops: 두 테이블 사이 경로의 최대 간선 수
+            max_extra: 추가할 최대 테이블 수
+
+        Returns:
+            List[str]: 추가할 중간 테이블의 문서 id 목록
+        """
+        hits = set(hit_ids)
+        extra: List[str] = []
+
+        for source in hit_ids:
+            if source not in self.adjacency:
+                continue
+            parents = {source: None}
+            queue = deque([(source, 0)])
+            while queue:
+                node, depth = queue.popleft()
+                if depth == max_hops:
+                    continue
+                for neighbor in self.adjacency.get(node, ()):
+                    if neighbor in parents:
+                        continue
+                    parents[neighbor] = node  # type: ignore
+                    if neighbor in hits:
+                        # 다른 검색 결과에 도달하면 경로의 중간 테이블을 추가
+                        step = node
+                        while step != source:
+                            if step not in hits and step not in extra:
+                                extra.append(step)
+                            step = parents[step]
+                    else:
+                        queue.append((neighbor, depth + 1))
+            if len(extra) >= max_extra:
+                break
+
+        return extra[:max_extra]
+
+    def save(self, folder_path: str) -> None:
+        edges = {node: sorted(neighbors) for node, neighbors in self.adjacency.items()}
+        with open(
+            os.path.join(folder_path, JOIN_GRAPH_FILE), "w", encoding="utf-8"
+        ) as f:
+            json.dump(edges, f, ensure_ascii=False)
+
+    @classmethod
+    def load(cls, folder_path: str) -> "JoinGraph":
+        path = os.path.join(folder_path, JOIN_GRAPH_FILE)
+        if not os.path.exists(path):
+            return cls()
+        with open(path, "r", encoding="utf-8") as f:
+            return cls(json.load(f))
+
+
+def build_join_graph(engine, db_names: List[str]) -> JoinGraph:
+    """
+    INFORMATION_SCHEMA에서 테이블 간 조인 그래프를 만듭니다.
+    - KEY_COLUMN_USAGE의 외래키 관계
+    - 컬럼 이름 일치: 같은 DB에서 다른 테이블의 기본키와 같은 이름의 컬럼(customer_id 등),
+      또는 기본키가 id인 테이블 이름 + "_id" 형태의 컬럼
+
+    Args:
+        engine: INFORMATION_SCHEMA에 연결된 SQLAlchemy 엔진 인스턴스
+        db_names: 데이터베이스 이름 목록
+
+    Returns:
+        JoinGraph: 조인 그래프
+    """
+    graph = JoinGraph()
+    if not db_names:
+        return graph
+
+    fk_query = text("""
+        SELECT TABLE_SCHEMA AS db, TABLE_NAME AS tbl,
+               REFERENCED_TABLE_SCHEMA AS ref_db, REFERENCED_TABLE_NAME AS ref_tbl
+        FROM KEY_COLUMN_USAGE
+        WHERE TABLE_SCHEMA IN :db_names AND REFERENCED_TABLE_NAME IS NOT NULL;
+        """).bindparams(bindparam("db_names", expanding=True))
+
+    columns_query = text("""
+        SELECT TABLE_SCHEMA AS db, TABLE_NAME AS tbl, COLUMN_NAME AS col, COLUMN_KEY AS col_key
+        FROM COLUMNS
+        WHERE TABLE_SCHEMA IN :db_names;
+        """).bindparams(bindparam("db_names", expanding=True))
+
+    fk_df = pd.read_sql(fk_query, engine, params={"db_names": db_names})
+    for row in fk_df.itertuples(index=False):
+        graph.add_edge(f"{row.db}.{row.tbl}", f"{row.ref_db}.{row.ref_tbl}")
+
+    columns_df = pd.read_sql(columns_query, engine, params={"db_names": db_names})
+    for db_name, db_columns in columns_df.groupby("db"):
+        # 컬럼 이름 -> 그 컬럼을 가진 테이블 목록
+        tables_by_column: Dict[str, List[str]] = {}
+        for row in db_columns.itertuples(index=False):
+            tables_by_column.setdefault(row.col.lower(), []).append(row.tbl)
+
+        for row in db_columns[db_columns["col_key"] == "PRI"].itertuples(index=False):
+            pk = row.col.lower()
+            if pk == "id":
+                candidates = {
+                    f"{row.tbl.lower()}_id",
+                    f"{singularize(row.tbl.lower())}_id",
+                }
+            else:
+                candidates = {pk}
+            for column in candidates:
+                for other in tables_by_column.get(column, []):
+                    graph.add_edge(f"{db_name}.{row.tbl}", f"{db_name}.{other}")
+
+    return graph
@@ -0,0 +1,217 @@
+import os
+import json
+import time
+import sqlite3
+import hashlib
+import inspect
+import functools
+import threading
+from collections import Counter, deque
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Dict, Any, Callable, Iterator, Tuple
+
+from .prompt_registry import get_prompt_registry
+from .utils import str2bool
+
+# 최근 그래프 실행의 LLM 호출 기록을 몇 개까지 보관할지
+RUN_HISTORY_SIZE = 20
+
+
+def get_llm_memo_config() -> Dict[str, Any]:
+    """
+    환경변수에서 LLM 호출 memo 설정을 읽어옵니다.
+
+    - LLM_MEMO: 그래프 실행 안에서 같은 입력의 LLM 호출 결과를 재사용할지 여부 (꺼도 호출 횟수는 집계)
+    - LLM_MEMO_PATH: 호출 결과를 영구 저장할 sqlite 파일 경로 (비어 있으면 사용하지 않음)
+    """
+    return {
+        "enabled": str2bool(os.getenv("LLM_MEMO", "true")),
+        "path": os.getenv("LLM_MEMO_PATH", ""),
+    }
+
+
+class LLMMemoStore:
+    """LLM 호출 결과를 sqlite에 저장하는 영구 memo입니다(재현/테스트용).
+    LLM_MEMO_PATH가 주어졌을 때만 사용하며, 같은 입력이면 서버를 다시 시작해도 LLM을 호출하지 않습니다.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS llm_memo (
+                key TEXT PRIMARY KEY,
+                node TEXT NOT NULL,
+                output TEXT NOT NULL,
+                created_at REAL NOT NULL
+            )
+            """)
+        self._conn.commit()
+
+    def get(self, key: str) -> Any:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT output FROM llm_memo WHERE key = ?", (key,)
+            ).fetchone()
+        return None if row is None else json.loads(row[0])
+
+    def put(self, key: str, node: str, output: Any) -> None:
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO llm_memo VALUES (?, ?, ?, ?)",
+                (key, node, json.dumps(output, ensure_ascii=False), time.time()),
+            )
+            self._conn.commit()
+
+
+class LLMRun:
+    """그래프 실행 한 번 동안의 LLM 호출 memo와 노드별 호출 횟수입니다."""
+
+    def __init__(self, run_id: str):
+        self.run_id = run_id
+        self.memo: Dict[str, Any] = {}
+        self.calls: Counter = Counter()  # 실제 LLM 호출
+        self.memo_hits: Counter = Counter()  # 같은 실행 안에서 재사용
+        self.store_hits: Counter = Counter()  # 영구 memo에서 재사용
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "run_id": self.run_id,
+            "calls": dict(self.calls),
+            "memo_hits": dict(self.memo_hits),
+            "store_hits": dict(self.store_hits),
+            "total_calls": sum(self.calls.values()),
+        }
+
+
+_current_run: ContextVar[LLMRun | None] = ContextVar("llm_run", default=None)
+_history: deque = deque(maxlen=RUN_HISTORY_SIZE)
+_totals = LLMRun("total")
+_stats_lock = threading.Lock()
+_store: LLMMemoStore | None = None
+_store_lock = threading.Lock()
+
+
+def get_memo_store() -> LLMMemoStore | None:
+    """LLM_MEMO_PATH가 설정되어 있으면 영구 memo를 반환합니다."""
+    global _store
+    path = get_llm_memo_config()["path"]
+    if not path:
+        return None
+    if _store is None or _store.path != path:
+        with _store_lock:
+            if _store is None or _store.path != path:
+                _store = LLMMemoStore(path)
+    return _store
+
+
+@contextmanager
+def llm_run(run_id: str) -> Iterator[LLMRun]:
+    """
+    그래프 실행 한 번을 감싸 LLM 호출 memo 범위를 정합니다.
+    contextvars를 사용하므로 LangGraph가 노드를 다른 스레드에서 실행해도 같은 memo를 공유합니다.
+    """
+    run = LLMRun(run_id)
+    token = _current_run.set(run)
+    try:
+        yield run
+    finally:
+        _current_run.reset(token)
+        with _stats_lock:
+            _history.append(run.stats())
+
+
+def _count(counter_name: str, node: str, run: LLMRun | None) -> None:
+    with _stats_lock:
+        getattr(_totals, counter_name)[node] += 1
+        if run is not None:
+            getattr(run, counter_name)[node] += 1
+
+
+def memoize_llm(node: str) -> Callable:
+    """
+    LLM을 호출하는 task 함수의 결과를 그래프 실행 단위로 memo하는 decorator입니다.
+    key는 노드, 노드의 프롬프트 버전과 모델, 함수 입력으로 만듭니다.
+    결과는 JSON으로 저장할 수 있는 값(문자열, 리스트 등)이어야 합니다.
+
+    Args:
+        node: 프롬프트 registry의 노드 이름
+    """
+
+    def decorator(func: Callable) -> Callable:
+        signature = inspect.signature(func)
+
+        def make_key(args, kwargs) -> str:
+            bound = signature.bind(*args, **kwargs)
+            bound.apply_defaults()
+            raw = json.dumps(
+                [node, get_prompt_registry().describe(node), bound.arguments],
+                ensure_ascii=False,
+                sort_keys=True,
+                default=str,
+            )
+            return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+        def lookup(run: LLMRun | None, key: str) -> Tuple[bool, Any]:
+            if run is not None and key in run.memo:
+                _count("memo_hits", node, run)
+                return True, run.memo[key]
+            store = get_memo_store()
+            output = store.get(key) if store is not None else None
+            if output is None:
+                return False, None
+            _count("store_hits", node, run)
+            if run is not None:
+                run.memo[key] = output
+            return True, output
+
+        def remember(run: LLMRun | None, key: str, output: Any) -> None:
+            _count("calls", node, run)
+            store = get_memo_store()
+            if store is not None:
+                store.put(key, node, output)
+            if run is not None:
+                run.memo[key] = output
+
+        # 비동기 task(ainvoke)는 같은 memo와 호출 횟수를 공유하는 비동기 wrapper로 감싼다.
+        if inspect.iscoroutinefunction(func):
+
+            @functools.wraps(func)
+            async def async_wrapper(*args, **kwargs):
+                run = _current_run.get()
+                if not get_llm_memo_config()["enabled"]:
+                    _count("calls", node, run)
+                    return await func(*args, **kwargs)
+                key = make_key(args, kwargs)
+                found, output = lookup(run, key)
+                if not found:
+                    output = await func(*args, **kwargs)
+                    remember(run, key, output)
+                return output
+
+            return async_wrapper
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            run = _current_run.get()
+            if not get_llm_memo_config()["enabled"]:
+                _count("calls", node, run)
+                return func(*args, **kwargs)
+            key = make_key(args, kwargs)
+            found, output = lookup(run, key)
+            if not found:
+                output = func(*args, **kwargs)
+                remember(run, key, output)
+            return output
+
+        return wrapper
+
+    return decorator
+
+
+def get_llm_call_stats() -> Dict[str, Any]:
+    """노드별 누적 LLM 호출/재사용 횟수와 최근 그래프 실행별 기록을 반환합니다."""
+    with _stats_lock:
+        return {"total": _totals.stats(), "recent_runs": list(_history)}
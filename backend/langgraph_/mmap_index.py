@@ -0,0 +1,45 @@
+import numpy as np
+
+
+class MmapFlatIndex:
+    """메모리 매핑한 벡터 행렬로 faiss.IndexFlatL2와 같은 결과(제곱 L2 거리, 위치)를 내는 검색 전용 인덱스입니다.
+    faiss.read_index는 IO_FLAG_MMAP을 주어도 IndexFlat/HNSW의 벡터를 프로세스 메모리로 복사하므로,
+    벡터를 .npy로 저장하고 np.load(mmap_mode="r")로 열어 여러 워커가 OS 페이지 캐시의 같은 페이지를 읽게 합니다.
+    LangChain FAISS 래퍼가 사용하는 search, ntotal, d, reconstruct_n만 제공합니다.
+    """
+
+    def __init__(self, vectors: np.ndarray):
+        self.vectors = vectors
+        self.ntotal, self.d = vectors.shape
+        # 행별 제곱 노름(N개 float)만 프로세스 메모리에 둔다.
+        self._norms = np.einsum("ij,ij->i", vectors, vectors)
+
+    def search(self, x: np.ndarray, k: int):
+        x = np.asarray(x, dtype=np.float32)
+        # ||v - q||^2 = ||v||^2 - 2 v·q + ||q||^2 (벡터 행렬을 복사하지 않고 행렬곱으로 한 번 읽는다)
+        distances = (
+            self._norms[None, :]
+            - 2 * (x @ self.vectors.T)
+            + np.einsum("ij,ij->i", x, x)[:, None]
+        ).clip(min=0)
+        n = min(k, self.ntotal)
+        indices = np.argpartition(distances, n - 1, axis=1)[:, :n]
+        top = np.take_along_axis(distances, indices, axis=1)
+        order = np.argsort(top, axis=1, kind="stable")
+        indices = np.take_along_axis(indices, order, axis=1)
+
+        # faiss처럼 결과가 k개보다 적으면 -1로 채운다.
+        result_distances = np.full(
+            (len(x), k), np.finfo(np.float32).max, dtype=np.float32
+        )
+        result_indices = np.full((len(x), k), -1, dtype=np.int64)
+        result_distances[:, :n] = np.take_along_axis(top, order, axis=1)
+        result_indices[:, :n] = indices
+        return result_distances, result_indices
+
+    def reconstruct_n(self, i0: int, ni: int) -> np.ndarray:
+        return np.array(self.vectors[i0 : i0 + ni], dtype=np.float32)
+
+    @classmethod
+    def load(cls, path: str) -> "MmapFlatIndex":
+        return cls(np.load(path, mmap_mode="r"))
@@ -1,5 +1,12 @@
-from typing import TypedDict, List, Any
-from .utils import EmptyQueryResultError, NullQueryResultError
+from typing import TypedDict, List, Dict, Any
+from .utils import (
+    EmptyQueryResultError,
+    NullQueryResultError,
+    QueryRejectedError,
+    SqlValidationError,
+)
+from .sql_validator import validate_sql
+from .speculation import speculate, claim, discard_speculation
 from .task import (
     evaluate_user_question,
     simple_conversation,
@@ -9,13 +16,16 @@ from .task import (
     analyze_user_question,
     refine_user_question,
     clarify_user_question,
+    check_need_clarification,
     check_leading_question,
-    get_query_result,
+    run_query,
+    find_cached_query,
     business_conversation,
 )
 
 # FAISS 객체는 serializable 하지 않아 Graph State에 넣어 놓을 수 없다.
-from .faiss_init import get_vector_stores
+# 대신 서버 시작 시 한 번 불러온 스키마 검색 서비스를 모든 그래프 실행이 공유한다.
+from .retriever import get_schema_retriever
 
 
 # GrpahState 정의
@@ -23,7 +33,11 @@ class GraphState(TypedDict):
     # Warning!
     # 그래프 내에서 사용될 모든 key값을 정의해야 오류가 나지 않는다.
     llm_api: str  # Local, ChatGPT-4o
+    user_department: str  # 사용자 부서 (accounting, cs, common)
     user_question: str  # 사용자의 질문
+    original_question: str  # 구체화되기 전의 원래 질문
+    question_cache_hit: bool  # 질문-SQL 캐시 재사용 여부
+    question_cache_similarity: float  # 재사용한 캐시 질문과의 유사도
     user_question_eval: str  # 사용자의 질문이 SQL 관련 질문인지 여부
     user_question_analyze: str  # 사용자 질문 분석
     collected_questions: List[str]  # 사용자의 질문에 대한 추가 질문-대답 기록
@@ -41,10 +55,56 @@ class GraphState(TypedDict):
     max_query_fix: int
     query_fix_cnt: int
     query_result: List[Any]
+    query_result_stats: Dict[
+        str, Any
+    ]  # 결과 행 통계 (kept, dropped, exhausted, tokens)
+    query_guard: Dict[str, Any]  # 실행 전 검사 결과 (estimated_rows, rewrites)
+    query_cache_hit: bool  # 쿼리 결과 캐시 재사용 여부
+    validated_sql: str  # SQL 후보 동시 생성 시 쿼리 생성 단계에서 이미 검사/실행한 SQL
+    query_candidate: Dict[str, Any]  # 사용한 SQL 후보 (순번, LLM, 온도, 후보 수)
     error_msg: str
 
 
 ########################### 정의된 노드 ###########################
+def question_cache_lookup(state: GraphState) -> GraphState:
+    """이전에 좋아요를 받은 비슷한 질문의 SQL이 있으면 가져오는 노드입니다.
+    캐시에 있으면 질문 평가부터 쿼리 생성까지의 LLM 호출을 건너뛰고 바로 쿼리를 실행합니다.
+
+    Args:
+        state (GraphState): LangGraph에서 쓰이는 그래프 상태
+
+    Returns:
+        GraphState: 캐시 재사용 여부(및 재사용한 SQL, context)가 추가된 그래프 상태
+    """
+    user_question = state["user_question"]
+    cached = find_cached_query(
+        user_question, get_schema_retriever(), state.get("user_department")
+    )
+    return question_cache_state(user_question, cached)
+
+
+def question_cache_state(
+    user_question: str, cached: Dict[str, Any] | None
+) -> GraphState:
+    """질문-SQL 캐시 조회 결과를 그래프 상태로 바꿉니다."""
+    if cached is None:
+        return GraphState(original_question=user_question, question_cache_hit=False)  # type: ignore
+
+    print(f"질문-SQL 캐시 사용 ({cached['similarity']:.3f}): {cached['question']}")
+    return GraphState(
+        original_question=user_question,
+        question_cache_hit=True,
+        question_cache_similarity=cached["similarity"],
+        user_question_eval="1",
+        collected_questions=[],
+        table_contexts=cached["table_contexts"],
+        table_contexts_ids=cached["table_contexts_ids"],
+        sql_query=cached["sql_query"],
+        query_fix_cnt=0,
+        flow_status="KEEP",
+    )  # type: ignore
+
+
 def question_evaluation(state: GraphState) -> GraphState:
     """사용자의 질문을 평가하는 작업을 진행하는 노드입니다.
 
@@ -55,8 +115,15 @@ def question_evaluation(state: GraphState) -> GraphState:
         GraphState: 사용자의 질문을 평가한 결과가 추가된 그래프 상태
     """
     user_question = state["user_question"]
+    # 평가 결과와 상관없는 질문 분석을 평가와 동시에 미리 시작
+    # (테이블 검색은 구체화된 질문으로 하므로 미리 시작하지 않는다)
+    speculate(
+        ("question_analysis", user_question), analyze_user_question, user_question
+    )
     # 사용자 질문 평가
     user_question_eval = evaluate_user_question(user_question)
+    if user_question_eval != "1":
+        discard_speculation()
 
     return GraphState(user_question_eval=user_question_eval)  # type: ignore
 
@@ -83,12 +150,17 @@ def question_analyze(state: GraphState) -> GraphState:
         state (GraphState): LangGraph에서 쓰이는 그래프 상태
 
     Returns:
-        GraphState: 사용자의 질문을 분석한 대답이 추가된 그래프 상태
+        GraphState: 사용자의 질문을 분석한 대답과 추가 질문 필요 여부가 추가된 그래프 상태
     """
     user_question = state["user_question"]
-    analyze_question = analyze_user_question(user_question)
+    analyze_question = claim(("question_analysis", user_question))
+    if analyze_question is None:
+        analyze_question = analyze_user_question(user_question)
 
-    return GraphState(user_question_analyze=analyze_question)  # type: ignore
+    return GraphState(
+        user_question_analyze=analyze_question,
+        need_clarification=check_need_clarification(analyze_question),
+    )  # type: ignore
 
 
 def question_clarify(state: GraphState) -> GraphState:
@@ -147,29 +219,18 @@ def table_selection(state: GraphState) -> GraphState:
     user_question = state["user_question"]
     context_cnt = state["context_cnt"]
     flow_status = state.get("flow_status", "KEEP")
-    sample_info = state["sample_info"]
-    vector_store = get_vector_stores(sample_info)
+    retriever = get_schema_retriever()
     # 사용자 질문과 관련성이 있는 테이블+컬럼정보를 검색
     table_contexts = select_relevant_tables(
-        user_question=user_question, context_cnt=context_cnt, vector_store=vector_store
+        user_question=user_question,
+        context_cnt=context_cnt,
+        retriever=retriever,
+        department=state.get("user_department"),
     )
     # 검색된 context를 검수
-    if flow_status == "RESELECT":
-        prev_list = state["table_contexts_ids"]
-        prev_query = state["sql_query"]
-        error_msg = state["error_msg"]
-        table_contexts_ids = extract_context(
-            user_question=user_question,
-            table_contexts=table_contexts,
-            flow_status=flow_status,
-            prev_list=prev_list,
-            prev_query=prev_query,
-            error_msg=error_msg,
-        )
-    else:
-        table_contexts_ids = extract_context(
-            user_question=user_question, table_contexts=table_contexts
-        )
+    table_contexts_ids = extract_context(
+        **table_selection_inputs(state, table_contexts)
+    )
     return GraphState(
         table_contexts=table_contexts,
         table_contexts_ids=table_contexts_ids,
@@ -177,33 +238,29 @@ def table_selection(state: GraphState) -> GraphState:
     )  # type: ignore
 
 
-def query_creation(state: GraphState) -> GraphState:
-    user_question = state["user_question"]
-    table_contexts = state["table_contexts"]
-    table_contexts_ids = state["table_contexts_ids"]
-    llm_api = state["llm_api"]
+def table_selection_inputs(
+    state: GraphState, table_contexts: List[str]
+) -> Dict[str, Any]:
+    """검색된 context를 검수하는 extract_context의 인자. 재선택이면 이전 선택과 오류를 함께 넘긴다."""
+    inputs: Dict[str, Any] = {
+        "user_question": state["user_question"],
+        "table_contexts": table_contexts,
+    }
+    if state.get("flow_status", "KEEP") == "RESELECT":
+        inputs.update(
+            flow_status="RESELECT",
+            prev_list=state["table_contexts_ids"],
+            prev_query=state["sql_query"],
+            error_msg=state["error_msg"],
+        )
+    return inputs
 
+
+def query_creation(state: GraphState) -> GraphState:
     query_fix_cnt = state.get("query_fix_cnt")
     flow_status = state.get("flow_status", "KEEP")
 
-    if flow_status == "REGENERATE":
-        prev_query = state["sql_query"]
-        error_msg = state["error_msg"]
-        print("Do Query Fix!!!")
-        sql_query = create_query(
-            user_question,
-            table_contexts,
-            table_contexts_ids,
-            llm_api,
-            flow_status=flow_status,
-            prev_query=prev_query,
-            error_msg=error_msg,
-        )
-
-    else:
-        sql_query = create_query(
-            user_question, table_contexts, table_contexts_ids, llm_api
-        )
+    sql_query = create_query(**query_creation_inputs(state))
 
     return GraphState(
         sql_query=sql_query,
@@ -212,49 +269,80 @@ def query_creation(state: GraphState) -> GraphState:
     )  # type: ignore
 
 
+def query_creation_inputs(state: GraphState) -> Dict[str, Any]:
+    """create_query의 인자. 재생성이면 이전 쿼리와 오류를 함께 넘긴다."""
+    inputs: Dict[str, Any] = {
+        "user_question": state["user_question"],
+        "table_contexts": state["table_contexts"],
+        "table_contexts_ids": state["table_contexts_ids"],
+        "llm_api": state["llm_api"],
+    }
+    if state.get("flow_status", "KEEP") == "REGENERATE":
+        print("Do Query Fix!!!")
+        inputs.update(
+            flow_status="REGENERATE",
+            prev_query=state["sql_query"],
+            error_msg=state["error_msg"],
+        )
+    return inputs
+
+
 def query_validation(state: GraphState) -> GraphState:
     sql_query = state["sql_query"]
     query_fix_cnt = state["query_fix_cnt"]
     max_query_fix = state["max_query_fix"]
     try:
-        query_result = get_query_result(command=sql_query, fetch="all")
+        # 문법/테이블/컬럼 이름을 데이터베이스에 묻지 않고 먼저 검사
+        validate_sql(sql_query, get_schema_retriever().catalog)
+        # 실행 전 검사 후 실행. 같은 쿼리의 결과가 캐시에 있으면 재사용
+        query_output = run_query(sql_query)
+        return GraphState(**query_output, flow_status="KEEP")  # type: ignore
+
+    except Exception as e:
+        return query_error_state(e, query_fix_cnt, max_query_fix)
+
+
+def query_error_state(
+    e: Exception, query_fix_cnt: int, max_query_fix: int
+) -> GraphState:
+    """쿼리 검사/실행 오류에 따라 다음 단계(재선택, 재생성, 중단)를 정합니다."""
+    # 지정된 최대 재생성 횟수를 넘어서면 사이클 중단
+    if query_fix_cnt >= max_query_fix:
+
         return GraphState(
-            query_result=query_result,
             flow_status="KEEP",
+            query_result=e._message(),
         )  # type: ignore
 
-    except Exception as e:
-        # 지정된 최대 재생성 횟수를 넘어서면 사이클 중단
-        if query_fix_cnt >= max_query_fix:
+    else:
 
+        if isinstance(e, NullQueryResultError):
+            # 쿼리문 결과가 모두 NULL인 경우 -> 테이블 재선택
+            print("Null Query Result Error")
             return GraphState(
-                flow_status="KEEP",
-                query_result=e._message(),
+                flow_status="RESELECT",
+                error_msg=e._message(),
             )  # type: ignore
 
+        elif isinstance(e, EmptyQueryResultError):
+            # 쿼리문 결과가 없는 경우 -> 테이블 재선택
+            print("Empty Query Result Error")
+            return GraphState(
+                flow_status="RESELECT",
+                error_msg=e._message(),
+            )  # type: ignore
         else:
-
-            if isinstance(e, NullQueryResultError):
-                # 쿼리문 결과가 모두 NULL인 경우 -> 테이블 재선택
-                print("Null Query Result Error")
-                return GraphState(
-                    flow_status="RESELECT",
-                    error_msg=e._message(),
-                )  # type: ignore
-
-            elif isinstance(e, EmptyQueryResultError):
-                # 쿼리문 결과가 없는 경우 -> 테이블 재선택
-                print("Empty Query Result Error")
-                return GraphState(
-                    flow_status="RESELECT",
-                    error_msg=e._message(),
-                )  # type: ignore
-            else:
-                # 쿼리문의 문법 오류 -> 쿼리문 재생성
-                return GraphState(
-                    flow_status="REGENERATE",
-                    error_msg=e._message(),
-                )  # type: ignore
+            if isinstance(e, QueryRejectedError):
+                # 예상 비용이 너무 큰 쿼리 -> 거부 사유와 함께 쿼리문 재생성
+                print("Query Rejected Error")
+            elif isinstance(e, SqlValidationError):
+                # 로컬 검사에서 찾은 오류 -> 데이터베이스 호출 없이 쿼리문 재생성
+                print("SQL Validation Error")
+            # 쿼리문의 문법 오류 -> 쿼리문 재생성
+            return GraphState(
+                flow_status="REGENERATE",
+                error_msg=e._message(),
+            )  # type: ignore
 
 
 def sql_conversation(state: GraphState) -> GraphState:
@@ -281,17 +369,12 @@ def user_question_checker(state: GraphState) -> str:
     return state["user_question_eval"]
 
 
-def user_question_analyze_checker(state: GraphState) -> str:
-    user_question_analyze = state["user_question_analyze"]
-    analyze_question = analyze_user_question(user_question_analyze)
-
-    keywords = ["[불명확]", "[확인필요]", "[에러]"]
+def question_cache_checker(state: GraphState) -> bool:
+    return state["question_cache_hit"]
 
-    if any(keyword in analyze_question for keyword in keywords):
-        state["need_clarification"] = True
-    else:
-        state["need_clarification"] = False
 
+def user_question_analyze_checker(state: GraphState) -> bool:
+    # 라우터는 LLM을 호출하지 않고 question_analyze 노드가 남긴 판단만 읽는다.
     return state["need_clarification"]
 
 
@@ -0,0 +1,343 @@
+import os
+import json
+import threading
+from typing import List, Dict, Tuple, Callable, Any
+
+import httpx
+import requests
+from langchain_openai import ChatOpenAI
+from langchain_core.prompts import ChatPromptTemplate
+from langchain_core.output_parsers import StrOutputParser
+from langchain_core.messages import SystemMessage
+from langchain_core.runnables import Runnable, ConfigurableField
+from pydantic import BaseModel, Field
+
+from .utils import load_prompt, str2bool
+
+PROMPT_DIR = "prompts"
+
+# 노드별로 사용할 프롬프트 버전. PROMPT_VERSIONS 환경변수(JSON)로 일부만 바꿀 수 있다.
+# 예: '{"table_selection": "v1"}'
+DEFAULT_PROMPT_VERSIONS = {
+    "question_evaluation": "v1",
+    "general_conversation": "v1",
+    "question_analysis": "v1",
+    "additional_question": "v1",
+    "question_refinement": "v1",
+    "table_selection": "v2",
+    "query_creation": "v1",
+    "sql_conversation": "v1",
+}
+
+
+class context_list(BaseModel):
+    """Index list of the context which is necessary for answering user_question."""
+
+    ids: List[int | None] = Field(description="Ids of contexts.")
+
+
+class PromptRegistry:
+    """프롬프트, LLM 클라이언트, 체인을 한 번만 만들어 재사용하는 저장소입니다.
+    서버 시작 시 모든 노드의 체인을 미리 만들어 두므로 요청마다 프롬프트 파일을 읽거나
+    ChatPromptTemplate/ChatOpenAI/체인 객체를 새로 만들지 않습니다.
+    PROMPT_HOT_RELOAD가 켜져 있으면(개발 모드) 프롬프트 파일의 수정 시각이 바뀔 때 다시 읽고,
+    그 프롬프트를 사용하는 체인도 다시 만듭니다.
+    """
+
+    def __init__(
+        self,
+        builders: Dict[str, Callable[["PromptRegistry", str], Runnable]],
+        versions: Dict[str, str] | None = None,
+        hot_reload: bool = False,
+    ):
+        self.builders = builders
+        self.versions = dict(versions or DEFAULT_PROMPT_VERSIONS)
+        self.hot_reload = hot_reload
+        # 로컬 모델 서버 호출용 HTTP 세션 (커넥션 재사용)
+        self.http_session = requests.Session()
+        # 비동기 그래프에서 사용하는 HTTP 클라이언트 (처음 사용할 때 생성)
+        self._async_http_session: httpx.AsyncClient | None = None
+
+        self._lock = threading.RLock()
+        self._prompts: Dict[str, Tuple[float, str]] = {}
+        self._llms: Dict[Tuple, ChatOpenAI] = {}
+        # (노드, 버전) -> (체인, 체인이 사용한 프롬프트 경로 목록)
+        self._chains: Dict[Tuple[str, str], Tuple[Runnable, List[str]]] = {}
+        self._building: List[str] | None = None
+        # (노드, 버전) -> 체인이 사용하는 모델 목록 ("모델@온도")
+        self._chain_models: Dict[Tuple[str, str], List[str]] = {}
+        self._building_models: List[str] | None = None
+        self.reload_count = 0
+
+    def _is_stale(self, path: str) -> bool:
+        return os.path.getmtime(path) != self._prompts[path][0]
+
+    def prompt(self, node: str, name: str, version: str | None = None) -> str:
+        """
+        prompts/{node}/{name}_{version}.prompt 프롬프트를 반환합니다.
+        버전을 지정하지 않으면 노드에 설정된 버전을 사용합니다.
+        """
+        version = version or self.versions[node]
+        path = os.path.join(PROMPT_DIR, node, f"{name}_{version}.prompt")
+        with self._lock:
+            if self._building is not None:
+                self._building.append(path)
+            if path not in self._prompts or (self.hot_reload and self._is_stale(path)):
+                if path in self._prompts:
+                    self.reload_count += 1
+                    print(f"프롬프트 다시 읽기: {path}")
+                self._prompts[path] = (os.path.getmtime(path), load_prompt(path))
+            return self._prompts[path][1]
+
+    def llm(self, model: str, temperature: float | None = None) -> ChatOpenAI:
+        """모델/온도별로 하나의 ChatOpenAI 클라이언트를 공유합니다(HTTP 커넥션 풀 재사용)."""
+        key = (model, temperature)
+        with self._lock:
+            if self._building_models is not None:
+                self._building_models.append(f"{model}@{temperature}")
+            if key not in self._llms:
+                kwargs: Dict[str, Any] = {"model": model}
+                if temperature is not None:
+                    kwargs["temperature"] = temperature
+                self._llms[key] = ChatOpenAI(**kwargs)
+            return self._llms[key]
+
+    @property
+    def async_http_session(self) -> httpx.AsyncClient:
+        """로컬 모델 서버 호출용 비동기 HTTP 클라이언트입니다(커넥션 재사용)."""
+        if self._async_http_session is None:
+            with self._lock:
+                if self._async_http_session is None:
+                    # requests 세션과 같이 응답 시간 제한 없음 (로컬 모델 생성은 오래 걸릴 수 있음)
+                    self._async_http_session = httpx.AsyncClient(timeout=None)
+        return self._async_http_session
+
+    async def aclose(self) -> None:
+        if self._async_http_session is not None:
+            await self._async_http_session.aclose()
+            self._async_http_session = None
+
+    def chain(self, node: str, version: str | None = None) -> Runnable:
+        """
+        노드의 체인을 반환합니다. 처음 요청될 때(또는 프롬프트가 바뀌었을 때) 한 번만 만듭니다.
+
+        Args:
+            node: 노드(프롬프트 폴더) 이름
+            version: 프롬프트 버전. 지정하지 않으면 노드에 설정된 버전
+
+        Returns:
+            Runnable: 컴파일된 체인
+        """
+        version = version or self.versions[node]
+        key = (node, version)
+        with self._lock:
+            cached = self._chains.get(key)
+            if cached is not None and not (
+                self.hot_reload and any(self._is_stale(path) for path in cached[1])
+            ):
+                return cached[0]
+
+            # 체인을 만드는 동안 읽은 프롬프트를 기록해 두고 변경 감지에 사용
+            self._building = []
+            self._building_models = []
+            try:
+                chain = self.builders[node](self, version)
+                self._chains[key] = (chain, self._building)
+                self._chain_models[key] = self._building_models
+            finally:
+                self._building = None
+                self._building_models = None
+            return chain
+
+    def describe(self, node: str) -> str:
+        """
+        노드의 프롬프트 버전과 체인이 사용하는 모델을 "버전:모델@온도" 형태로 반환합니다.
+        LLM 호출 결과를 memo할 때 key에 넣어 버전이나 모델이 바뀌면 다시 호출하도록 합니다.
+        """
+        version = self.versions[node]
+        self.chain(node, version)
+        return f"{version}:{','.join(self._chain_models[(node, version)])}"
+
+    def warm_up(self) -> None:
+        """설정된 모든 노드의 체인을 미리 만들고, 요청마다 조합하는 프롬프트 조각도 미리 읽어 둡니다."""
+        for node in self.builders:
+            self.chain(node)
+            suffix = f"_{self.versions[node]}.prompt"
+            for file_name in os.listdir(os.path.join(PROMPT_DIR, node)):
+                if file_name.endswith(suffix):
+                    self.prompt(node, file_name[: -len(suffix)])
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "prompts": len(self._prompts),
+            "chains": len(self._chains),
+            "llm_clients": len(self._llms),
+            "hot_reload": self.hot_reload,
+            "reload_count": self.reload_count,
+            "versions": self.versions,
+        }
+
+
+########################### 노드별 체인 ###########################
+def build_question_evaluation(registry: PromptRegistry, version: str) -> Runnable:
+    prompt = ChatPromptTemplate.from_messages(
+        [
+            SystemMessage(
+                content=registry.prompt("question_evaluation", "main", version)
+            ),
+            ("human", "질문(user_question): {user_question}"),
+        ]
+    )
+    return prompt | registry.llm("gpt-4o-mini") | StrOutputParser()
+
+
+def build_general_conversation(registry: PromptRegistry, version: str) -> Runnable:
+    prompt = ChatPromptTemplate.from_messages(
+        [
+            SystemMessage(
+                content=registry.prompt("general_conversation", "main", version)
+            ),
+            ("human", "{user_question}"),
+        ]
+    )
+    return prompt | registry.llm("gpt-4o-mini") | StrOutputParser()
+
+
+def build_question_analysis(registry: PromptRegistry, version: str) -> Runnable:
+    prompt = ChatPromptTemplate.from_messages(
+        [
+            SystemMessage(
+                content=registry.prompt("question_analysis", "main", version)
+            ),
+            (
+                "human",
+                "사용자 질문: {user_question}"
+                + registry.prompt("question_analysis", "human", version),
+            ),
+        ]
+    )
+    return prompt | registry.llm("gpt-4o-mini", temperature=0) | StrOutputParser()
+
+
+def build_additional_question(registry: PromptRegistry, version: str) -> Runnable:
+    prompt = ChatPromptTemplate.from_messages(
+        [
+            SystemMessage(
+                content=registry.prompt("additional_question", "main", version)
+            ),
+            (
+                "human",
+                "원래 사용자 질문:\n{user_question}\n\n초기 질문 분석:\n{user_question_analyze}\n\n이전 질문 기록:\n{collected_questions}\n\n"
+                + registry.prompt("additional_question", "human_postfix", version),
+            ),
+        ]
+    )
+    return prompt | registry.llm("gpt-4o", temperature=0) | StrOutputParser()
+
+
+def build_question_refinement(registry: PromptRegistry, version: str) -> Runnable:
+    prompt = ChatPromptTemplate.from_messages(
+        [
+            SystemMessage(
+                content=registry.prompt("question_refinement", "main", version)
+            ),
+            (
+                "human",
+                """사용자 질문:
+                {user_question}
+
+                사용자 질문 분석:
+                {user_question_analyze}
+
+                구체화된 질문:""",
+            ),
+        ]
+    )
+    return prompt | registry.llm("gpt-4o-mini", temperature=0) | StrOutputParser()
+
+
+# 아래 노드들은 요청마다 system prompt가 달라지므로(context, 이전 쿼리 등)
+# system prompt를 입력 변수로 받는 체인을 한 번만 만들고, 프롬프트 조각은 registry에서 가져온다.
+def build_table_selection(registry: PromptRegistry, version: str) -> Runnable:
+    prompt = ChatPromptTemplate.from_messages(
+        [
+            ("system", "{system_prompt}"),
+            ("human", "user_question:\n{user_question}\n\ncontext:\n{context}"),
+        ]
+    )
+    return prompt | registry.llm("gpt-4o-mini").with_structured_output(context_list)
+
+
+def build_query_creation(registry: PromptRegistry, version: str) -> Runnable:
+    prompt = ChatPromptTemplate.from_messages(
+        [
+            ("system", "{system_prompt}"),
+            ("human", """user_question: {user_question}"""),
+        ]
+    )
+    # SQL 후보를 여러 개 만들 때 후보마다 온도를 바꿀 수 있도록 한다 (같은 클라이언트 공유)
+    llm = registry.llm("gpt-4o-mini", temperature=0).configurable_fields(
+        temperature=ConfigurableField(id="temperature")
+    )
+    return prompt | llm | StrOutputParser()
+
+
+def build_sql_conversation(registry: PromptRegistry, version: str) -> Runnable:
+    prompt = ChatPromptTemplate.from_messages(
+        [
+            ("system", "{system_prompt}"),
+            ("human", """user_question: {user_question}"""),
+        ]
+    )
+    return prompt | registry.llm("gpt-4o-mini") | StrOutputParser()
+
+
+CHAIN_BUILDERS: Dict[str, Callable[[PromptRegistry, str], Runnable]] = {
+    "question_evaluation": build_question_evaluation,
+    "general_conversation": build_general_conversation,
+    "question_analysis": build_question_analysis,
+    "additional_question": build_additional_question,
+    "question_refinement": build_question_refinement,
+    "table_selection": build_table_selection,
+    "query_creation": build_query_creation,
+    "sql_conversation": build_sql_conversation,
+}
+
+
+_registry: PromptRegistry | None = None
+_registry_lock = threading.Lock()
+
+
+def create_prompt_registry() -> PromptRegistry:
+    """환경변수(PROMPT_VERSIONS, PROMPT_HOT_RELOAD) 설정으로 프롬프트 registry를 만듭니다."""
+    versions = {
+        **DEFAULT_PROMPT_VERSIONS,
+        **json.loads(os.getenv("PROMPT_VERSIONS", "{}")),
+    }
+    return PromptRegistry(
+        CHAIN_BUILDERS,
+        versions,
+        hot_reload=str2bool(os.getenv("PROMPT_HOT_RELOAD", "false")),
+    )
+
+
+def init_prompt_registry() -> PromptRegistry:
+    """프롬프트 registry를 생성하고 모든 노드의 체인을 미리 만들어 프로세스 전역에 등록합니다."""
+    global _registry
+    registry = create_prompt_registry()
+    registry.warm_up()
+    with _registry_lock:
+        _registry = registry
+    return registry
+
+
+def get_prompt_registry() -> PromptRegistry:
+    """등록된 프롬프트 registry를 반환합니다.
+    서버 시작 과정을 거치지 않은 경우(스크립트 실행 등)에는 처음 호출될 때 생성합니다.
+    """
+    global _registry
+    if _registry is None:
+        with _registry_lock:
+            if _registry is None:
+                _registry = create_prompt_registry()
+    return _registry
@@ -0,0 +1,130 @@
+import os
+import asyncio
+import threading
+from collections import Counter
+from typing import Dict, Any, List, Tuple, Callable, Awaitable
+
+# 로컬 모델 서버는 온도를 받지 않으므로 후보의 온도를 무시한다.
+LOCAL_LLM_API = "Local"
+
+
+def get_query_candidates_config() -> Dict[str, Any]:
+    """
+    환경변수에서 SQL 후보 동시 생성 설정을 읽어옵니다. (비동기 그래프에서만 사용)
+
+    - QUERY_CANDIDATES: 쿼리 생성 시 동시에 만들어 검사/실행할 SQL 후보 수 (1이면 사용하지 않음)
+    - QUERY_CANDIDATE_TEMPERATURES: 두 번째 후보부터 차례로 사용할 온도 (첫 후보는 기존 체인 설정 그대로)
+    - QUERY_CANDIDATE_BACKENDS: 두 번째 후보부터 번갈아 사용할 LLM (Local, ChatGPT-4o). 비어 있으면 사용자가 고른 LLM
+    """
+    return {
+        "count": int(os.getenv("QUERY_CANDIDATES", 1)),
+        "temperatures": [
+            float(temperature)
+            for temperature in os.getenv(
+                "QUERY_CANDIDATE_TEMPERATURES", "0.4,0.8"
+            ).split(",")
+            if temperature.strip()
+        ],
+        "backends": [
+            backend.strip()
+            for backend in os.getenv("QUERY_CANDIDATE_BACKENDS", "").split(",")
+            if backend.strip()
+        ],
+    }
+
+
+def candidate_settings(llm_api: str) -> List[Tuple[str, float | None]]:
+    """
+    후보별 (LLM, 온도) 목록을 만듭니다. 첫 후보는 후보 생성을 사용하지 않을 때와 같은 설정이며,
+    같은 설정의 후보는 같은 쿼리를 만들 뿐이므로 하나만 남깁니다.
+    """
+    config = get_query_candidates_config()
+    backends = config["backends"] or [llm_api]
+    temperatures = config["temperatures"] or [None]
+    settings: List[Tuple[str, float | None]] = [(llm_api, None)]
+    for i in range(config["count"] - 1):
+        backend = backends[i % len(backends)]
+        temperature = temperatures[i % len(temperatures)]
+        setting = (backend, None if backend == LOCAL_LLM_API else temperature)
+        if setting not in settings:
+            settings.append(setting)
+    return settings
+
+
+_stats: Counter = Counter()  # races, candidates, all_failed, cancelled
+_wins: Counter = Counter()  # 이긴 후보 설정 ("LLM@온도")별 횟수
+_stats_lock = threading.Lock()
+
+
+def _record(settings, winner: int | None, cancelled: int) -> None:
+    with _stats_lock:
+        _stats["races"] += 1
+        _stats["candidates"] += len(settings)
+        _stats["cancelled"] += cancelled
+        if winner is None:
+            _stats["all_failed"] += 1
+        else:
+            backend, temperature = settings[winner]
+            _wins[f"{backend}@{temperature}"] += 1
+
+
+async def first_valid_candidate(
+    settings: List[Tuple[str, float | None]],
+    attempt: Callable[[str, float | None], Awaitable[Tuple[str, Any]]],
+) -> Tuple[int, str, Any]:
+    """
+    후보를 동시에 만들고 검사/실행하여, 가장 먼저 결과를 낸 후보를 사용하고 나머지는 취소합니다.
+
+    Args:
+        settings: 후보별 (LLM, 온도)
+        attempt: 후보 하나를 만들고 실행하는 함수. (SQL, 실행 결과 또는 쿼리 오류)를 반환한다.
+
+    Returns:
+        (후보 순번, SQL, 실행 결과). 모든 후보의 쿼리가 실패하면 생성에 성공한 가장 앞 순번 후보의 SQL과 오류를,
+        모든 후보의 생성 자체가 실패하면 첫 후보의 예외를 다시 발생시킵니다.
+    """
+    tasks = [
+        asyncio.ensure_future(attempt(backend, temperature))
+        for backend, temperature in settings
+    ]
+    pending = set(tasks)
+    winner = None
+    try:
+        while pending and winner is None:
+            done, pending = await asyncio.wait(
+                pending, return_when=asyncio.FIRST_COMPLETED
+            )
+            # 같은 순간에 끝난 후보가 여럿이면 앞 순번(기존 설정에 가까운 후보)을 사용
+            for i, task in enumerate(tasks):
+                if (
+                    task in done
+                    and task.exception() is None
+                    and not isinstance(task.result()[1], Exception)
+                ):
+                    winner = i
+                    break
+    finally:
+        for task in pending:
+            task.cancel()
+    _record(settings, winner, len(pending))
+
+    if winner is not None:
+        return (winner, *tasks[winner].result())
+    for i, task in enumerate(tasks):
+        if task.exception() is None:
+            return (i, *task.result())
+    raise tasks[0].exception()  # type: ignore
+
+
+def get_query_candidates_stats() -> Dict[str, Any]:
+    """SQL 후보 경쟁 누적 횟수와 이긴 후보 설정별 횟수를 반환합니다."""
+    config = get_query_candidates_config()
+    with _stats_lock:
+        return {
+            "count": config["count"],
+            **{
+                key: _stats[key]
+                for key in ("races", "candidates", "all_failed", "cancelled")
+            },
+            "wins": dict(_wins),
+        }
@@ -0,0 +1,233 @@
+import os
+import re
+from contextlib import nullcontext
+from typing import Dict, Any, List, Tuple
+
+import sqlglot
+from sqlglot import exp
+from sqlglot.errors import SqlglotError
+from sqlalchemy import text
+from sqlalchemy.engine import Connection
+
+from .db_engine import get_engine, read_only_connection
+from .sql_text import LITERAL_PATTERN, COMMENT_PATTERN, find_top_level_keyword
+from .utils import QueryRejectedError, str2bool
+
+# 최상위 쿼리 끝의 LIMIT 절 (LIMIT n, LIMIT m, n, LIMIT n OFFSET m)
+LIMIT_PATTERN = re.compile(
+    r"\bLIMIT\s+\d+(\s*,\s*\d+|\s+OFFSET\s+\d+)?\s*$", re.IGNORECASE
+)
+# 끝의 LIMIT 절에서 행 수 부분 (LIMIT m, n / LIMIT n OFFSET m의 n)
+BOUNDED_LIMIT_PATTERN = re.compile(
+    r"\bLIMIT\s+(?:\d+\s*,\s*)?(\d+)(?:\s+OFFSET\s+\d+)?\s*$", re.IGNORECASE
+)
+# SELECT 키워드 바로 뒤의 옵티마이저 힌트 주석
+HINT_PATTERN = re.compile(r"\s*/\*\+.*?\*/", re.DOTALL)
+# FROM/JOIN/콤마 뒤의 "테이블 [AS] 별칭"
+TABLE_ALIAS_PATTERN = re.compile(
+    r"(?:\bFROM|\bJOIN|,)\s+[`\"]?(\w+)[`\"]?(?:\s+(?:AS\s+)?(?!ON\b|WHERE\b|JOIN\b|"
+    r"INNER\b|LEFT\b|RIGHT\b|CROSS\b|GROUP\b|ORDER\b|LIMIT\b|USING\b)(\w+))?",
+    re.IGNORECASE,
+)
+
+
+def get_guard_config() -> Dict[str, Any]:
+    """
+    환경변수에서 쿼리 실행 전 검사(EXPLAIN) 설정을 읽어옵니다.
+
+    - QUERY_GUARD: 실행 전 검사 사용 여부
+    - QUERY_MAX_EXAMINED_ROWS: 예상 검사 행 수가 이보다 크면 쿼리를 거부하고 재생성 요청
+    - QUERY_LIMIT_ROWS: 예상 검사 행 수가 이보다 크고 LIMIT이 없으면 LIMIT을 붙임
+    - QUERY_AUTO_LIMIT: 붙일 LIMIT 값
+    - QUERY_MAX_EXECUTION_MS: MySQL MAX_EXECUTION_TIME 힌트 값(밀리초, 0이면 붙이지 않음)
+    """
+    return {
+        "enabled": str2bool(os.getenv("QUERY_GUARD", "true")),
+        "max_examined_rows": int(os.getenv("QUERY_MAX_EXAMINED_ROWS", 50_000_000)),
+        "limit_rows": int(os.getenv("QUERY_LIMIT_ROWS", 100_000)),
+        "auto_limit": int(os.getenv("QUERY_AUTO_LIMIT", 10_000)),
+        "max_execution_ms": int(os.getenv("QUERY_MAX_EXECUTION_MS", 30_000)),
+    }
+
+
+def estimate_mysql_rows(connection: Connection, sql_query: str) -> int:
+    """
+    MySQL EXPLAIN 결과로 검사할 행 수를 추정합니다.
+    같은 SELECT(id) 안의 테이블은 중첩 루프로 조인되므로,
+    앞선 테이블들이 넘겨주는 행 수(rows * filtered)와 곱해 더합니다.
+    """
+    rows = connection.exec_driver_sql(f"EXPLAIN {sql_query}").mappings().all()
+    examined = 0.0
+    prefix: Dict[Any, float] = {}
+    for row in rows:
+        table_rows = float(row.get("rows") or 0)
+        filtered = float(row.get("filtered") or 100) / 100
+        fanout = prefix.get(row.get("id"), 1.0)
+        examined += fanout * table_rows
+        prefix[row.get("id")] = fanout * max(table_rows * filtered, 1.0)
+    return int(examined)
+
+
+def estimate_sqlite_rows(connection: Connection, sql_query: str) -> int:
+    """
+    SQLite(로컬 테스트용)의 EXPLAIN QUERY PLAN으로 검사할 행 수를 추정합니다.
+    SQLite는 행 수를 알려주지 않으므로 SCAN하는 테이블은 전체 행 수, 인덱스 SEARCH는 1행으로 계산합니다.
+    """
+    plan = connection.exec_driver_sql(f"EXPLAIN QUERY PLAN {sql_query}").all()
+    tables = {
+        name
+        for (name,) in connection.exec_driver_sql(
+            "SELECT name FROM sqlite_master WHERE type = 'table'"
+        )
+    }
+    # 실행 계획에는 별칭이 표시되므로 별칭 -> 테이블 이름으로 바꾼다.
+    aliases = {name: name for name in tables}
+    for table_name, alias in TABLE_ALIAS_PATTERN.findall(sql_query):
+        if alias and table_name in tables:
+            aliases.setdefault(alias, table_name)
+    examined = 0
+    prefix: Dict[int, int] = {}
+    for _, parent, _, detail in plan:
+        match = re.match(r"(SCAN|SEARCH) (\S+)", detail)
+        if match is None or match.group(2) not in aliases:
+            continue
+        if match.group(1) == "SCAN":
+            table_rows = connection.execute(
+                text(f'SELECT COUNT(*) FROM "{aliases[match.group(2)]}"')
+            ).scalar_one()
+        else:
+            table_rows = 1
+        fanout = prefix.get(parent, 1)
+        examined += fanout * table_rows
+        prefix[parent] = fanout * max(table_rows, 1)
+    return examined
+
+
+def strip_comments(sql_query: str) -> str:
+    """문자열 리터럴 밖의 주석을 지웁니다. (옵티마이저 힌트 /*+ ... */는 남깁니다)"""
+    parts = LITERAL_PATTERN.split(sql_query)
+    return "".join(
+        part if idx % 2 else COMMENT_PATTERN.sub(" ", part)
+        for idx, part in enumerate(parts)
+    ).strip()
+
+
+def add_limit(sql_query: str, limit: int) -> str:
+    """최상위 쿼리에 LIMIT이 없으면 붙입니다. (끝의 주석이 LIMIT을 가리지 않도록 주석을 지운 쿼리에 사용)"""
+    if LIMIT_PATTERN.search(sql_query):
+        return sql_query
+    return f"{sql_query} LIMIT {limit}"
+
+
+def bound_rows(sql_query: str, max_rows: int, dialect: str = "mysql") -> str:
+    """
+    최상위 쿼리가 max_rows개보다 많은 행을 돌려주지 않도록 LIMIT을 붙이거나 줄입니다.
+    (기존 LIMIT이 더 작으면 그대로 둡니다.) 결과를 일부만 읽고 커서를 닫아도
+    서버가 나머지 행을 만들어 보내지 않게 하기 위한 것입니다.
+    sqlglot은 최상위 LIMIT을 찾는 데만 쓰고, 쿼리 문자열은 다시 만들지 않습니다.
+    (다시 만들면 REGEXP, MOD, CONVERT ... USING 같은 MySQL 문법이 바뀔 수 있다)
+    파싱할 수 없거나 끝의 LIMIT을 고칠 수 없는 쿼리는 파생 테이블로 감싸 LIMIT을 붙입니다.
+    """
+    try:
+        tree = sqlglot.parse_one(sql_query, read=dialect)
+    except SqlglotError:
+        tree = None
+    body = strip_comments(sql_query).rstrip(";").rstrip()
+    if not isinstance(tree, exp.Query):
+        return f"SELECT * FROM ({body}) AS bounded_result LIMIT {max_rows}"
+    limit = tree.args.get("limit")
+    if limit is None:
+        return f"{body} LIMIT {max_rows}"
+    value = limit.expression
+    if not (isinstance(value, exp.Literal) and value.is_int):
+        return sql_query
+    if int(value.this) <= max_rows:
+        return sql_query
+    match = BOUNDED_LIMIT_PATTERN.search(body)
+    if match is None:
+        return f"SELECT * FROM ({body}) AS bounded_result LIMIT {max_rows}"
+    return f"{body[: match.start(1)]}{max_rows}{body[match.end(1):]}"
+
+
+def add_max_execution_time(sql_query: str, max_execution_ms: int) -> str:
+    """
+    MySQL 옵티마이저 힌트로 SELECT 문의 최대 실행 시간을 지정합니다.
+    힌트는 최상위 쿼리 블록에만 적용되므로, WITH 절이 있으면 CTE 목록 뒤의 SELECT에,
+    UNION이면 첫 번째 SELECT에 붙입니다. (괄호 밖의 첫 SELECT 키워드 바로 뒤)
+    이미 힌트 주석이 있으면 그 안에 추가하고, 나머지 쿼리 문자열은 바꾸지 않습니다.
+    """
+    if "MAX_EXECUTION_TIME" in sql_query.upper():
+        return sql_query
+    start = find_top_level_keyword(sql_query, "SELECT")
+    if start < 0:
+        return sql_query
+    end = start + len("SELECT")
+    hint = f"MAX_EXECUTION_TIME({max_execution_ms})"
+    existing = HINT_PATTERN.match(sql_query, end)
+    if existing is not None:
+        close = existing.end() - len("*/")
+        return f"{sql_query[:close].rstrip()} {hint} {sql_query[close:]}"
+    return f"{sql_query[:end]} /*+ {hint} */{sql_query[end:]}"
+
+
+def guard_query(
+    sql_query: str, connection: Connection | None = None
+) -> Tuple[str, Dict[str, Any]]:
+    """
+    생성된 SQL을 실행하기 전에 EXPLAIN으로 비용을 추정하여 거부하거나 고쳐 씁니다.
+    - SELECT/WITH 문이 아니면 거부합니다.
+    - 예상 검사 행 수가 QUERY_MAX_EXAMINED_ROWS를 넘으면 거부합니다.
+    - 예상 검사 행 수가 QUERY_LIMIT_ROWS를 넘으면 LIMIT을 붙입니다.
+    - MySQL에서는 MAX_EXECUTION_TIME 힌트를 붙여 실행 시간을 제한합니다.
+    거부 사유는 QueryRejectedError로 전달되어 쿼리 재생성(REGENERATE) 프롬프트에 들어갑니다.
+
+    Args:
+        sql_query: 생성된 SQL
+        connection: EXPLAIN을 실행할 읽기 전용 커넥션. None이면 공유 엔진에서 빌린다.
+
+    Returns:
+        Tuple[str, Dict]: (실행할 SQL, 검사 결과)
+    """
+    config = get_guard_config()
+    report: Dict[str, Any] = {"estimated_rows": None, "rewrites": []}
+    if not config["enabled"]:
+        return sql_query, report
+
+    sql_query = strip_comments(sql_query).rstrip(";").strip()
+    if not re.match(r"^(SELECT|WITH)\b", sql_query, re.IGNORECASE):
+        raise QueryRejectedError("only a single read-only SELECT statement is allowed.")
+
+    with (
+        nullcontext(connection)
+        if connection is not None
+        else read_only_connection(get_engine("INFORMATION_SCHEMA"))
+    ) as connection:
+        dialect = connection.dialect.name
+        if dialect == "sqlite":
+            estimated_rows = estimate_sqlite_rows(connection, sql_query)
+        else:
+            estimated_rows = estimate_mysql_rows(connection, sql_query)
+    report["estimated_rows"] = estimated_rows
+
+    if estimated_rows > config["max_examined_rows"]:
+        raise QueryRejectedError(
+            f"EXPLAIN estimates about {estimated_rows:,} rows examined "
+            f"(limit {config['max_examined_rows']:,}). "
+            "Avoid cross joins, add join conditions and filters on indexed columns, "
+            "or aggregate before joining."
+        )
+
+    rewrites: List[str] = report["rewrites"]
+    if estimated_rows > config["limit_rows"]:
+        limited = add_limit(sql_query, config["auto_limit"])
+        if limited != sql_query:
+            sql_query = limited
+            rewrites.append(f"LIMIT {config['auto_limit']}")
+
+    if dialect == "mysql" and config["max_execution_ms"] > 0:
+        hinted = add_max_execution_time(sql_query, config["max_execution_ms"])
+        if hinted != sql_query:
+            sql_query = hinted
+            rewrites.append(f"MAX_EXECUTION_TIME({config['max_execution_ms']})")
+
+    return sql_query, report
@@ -0,0 +1,251 @@
+import os
+import re
+import json
+import time
+import sqlite3
+import threading
+from typing import List, Dict, Any
+
+import numpy as np
+
+from .utils import str2bool
+
+QUESTION_CACHE_PATH = "question_cache.sqlite"
+
+# SQL의 조건 값이 되는 질문 속 값: 따옴표로 감싼 값, 숫자(2024-01-01, 3.5, 10:30 같은 날짜/시간 포함)
+LITERAL_TOKEN_PATTERN = re.compile(
+    r"'[^']*'|\"[^\"]*\"|‘[^’]*’|“[^”]*”|\d+(?:[.:/-]\d+)*"
+)
+# 숫자 없이 기간을 나타내는 표현 (공백을 지운 질문에서 찾는다)
+RELATIVE_DATE_WORDS = (
+    "오늘",
+    "어제",
+    "그제",
+    "내일",
+    "이번주",
+    "지난주",
+    "다음주",
+    "이번달",
+    "지난달",
+    "다음달",
+    "올해",
+    "작년",
+    "재작년",
+    "내년",
+    "분기",
+    "상반기",
+    "하반기",
+)
+
+
+def get_question_cache_config() -> Dict[str, Any]:
+    """
+    환경변수에서 질문-SQL 캐시 설정을 읽어옵니다.
+
+    - QUESTION_CACHE: 질문-SQL 캐시 사용 여부
+    - QUESTION_CACHE_THRESHOLD: 캐시된 질문과의 코사인 유사도가 이 값 이상이면 저장된 SQL을 재사용
+    - QUESTION_CACHE_PATH: 캐시 파일(sqlite) 경로
+    """
+    return {
+        "enabled": str2bool(os.getenv("QUESTION_CACHE", "true")),
+        "threshold": float(os.getenv("QUESTION_CACHE_THRESHOLD", 0.95)),
+        "path": os.getenv("QUESTION_CACHE_PATH", QUESTION_CACHE_PATH),
+    }
+
+
+def literal_tokens(question: str) -> List[str]:
+    """
+    질문에서 숫자, 날짜, 따옴표로 감싼 값과 기간 표현을 모읍니다.
+    임베딩은 "2023년 매출"과 "2024년 매출"을 거의 같게 보므로, 이 값이 모두 같을 때만 SQL을 재사용합니다.
+    """
+    tokens = set(LITERAL_TOKEN_PATTERN.findall(question))
+    compact = re.sub(r"\s+", "", question)
+    tokens.update(word for word in RELATIVE_DATE_WORDS if word in compact)
+    return sorted(tokens)
+
+
+def normalize_vector(vector: List[float]) -> np.ndarray:
+    vector = np.asarray(vector, dtype=np.float32)
+    return vector / (np.linalg.norm(vector) or 1.0)
+
+
+class QuestionCache:
+    """사용자가 좋아요를 누른 질문과 검증된 SQL을 저장해 두고, 비슷한 질문이 들어오면 SQL을 재사용하는 캐시입니다.
+    원래 질문과 구체화된 질문을 모두 임베딩해 저장하며, 조회는 현재 스키마 버전의 항목만 대상으로 합니다.
+    스키마 버전이 바뀌면 이전 버전의 항목은 지웁니다.
+    """
+
+    def __init__(self, path: str = QUESTION_CACHE_PATH):
+        self.path = path
+        self.hits = 0
+        self.misses = 0
+        self.stores = 0
+        self.literal_mismatches = 0
+
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS questions (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                schema_version TEXT NOT NULL,
+                department TEXT NOT NULL,
+                question TEXT NOT NULL,
+                vector BLOB NOT NULL,
+                entry TEXT NOT NULL,
+                created_at REAL NOT NULL
+            )
+            """)
+        self._conn.commit()
+        # 현재 스키마 버전의 항목을 메모리 행렬로 들고 있는다.
+        self._schema_version: str | None = None
+        self._rows: List[Dict[str, Any]] = []
+        self._literals: List[List[str]] = []
+        self._vectors = np.zeros((0, 0), dtype=np.float32)
+
+    def _load(self, schema_version: str) -> None:
+        # 호출하는 쪽에서 self._lock을 잡고 있어야 한다.
+        deleted = self._conn.execute(
+            "DELETE FROM questions WHERE schema_version != ?", (schema_version,)
+        ).rowcount
+        self._conn.commit()
+        if deleted:
+            print(f"스키마 버전 변경으로 질문-SQL 캐시 {deleted}건 삭제")
+
+        rows = self._conn.execute(
+            "SELECT department, question, vector, entry FROM questions "
+            "WHERE schema_version = ? ORDER BY id",
+            (schema_version,),
+        ).fetchall()
+        self._rows = [
+            {"department": department, "question": question, **json.loads(entry)}
+            for department, question, _, entry in rows
+        ]
+        self._literals = [literal_tokens(row["question"]) for row in self._rows]
+        self._vectors = (
+            np.stack(
+                [np.frombuffer(vector, dtype=np.float32) for *_, vector, _ in rows]
+            )
+            if rows
+            else np.zeros((0, 0), dtype=np.float32)
+        )
+        self._schema_version = schema_version
+
+    def has_candidates(self, schema_version: str, department: str | None) -> bool:
+        """
+        현재 스키마 버전에 같은 부서의 질문이 하나라도 있는지 확인합니다.
+        없으면 조회 실패로 세므로, 호출하는 쪽은 질문을 임베딩하지 않고 바로 넘어가면 됩니다.
+        """
+        with self._lock:
+            if self._schema_version != schema_version:
+                self._load(schema_version)
+            if any(row["department"] == (department or "") for row in self._rows):
+                return True
+            self.misses += 1
+            return False
+
+    def lookup(
+        self,
+        question: str,
+        question_vector: List[float],
+        schema_version: str,
+        department: str | None,
+        threshold: float,
+    ) -> Dict[str, Any] | None:
+        """
+        현재 스키마 버전에서 같은 부서의 가장 비슷한 질문을 찾아 유사도가 threshold 이상이면 반환합니다.
+        숫자, 날짜, 따옴표로 감싼 값, 기간 표현(literal_tokens)이 다른 질문은 유사도가 높아도 재사용하지 않습니다.
+
+        Returns:
+            Dict | None: sql_query, table_contexts, table_contexts_ids, question, similarity
+        """
+        with self._lock:
+            if self._schema_version != schema_version:
+                self._load(schema_version)
+            if not self._rows:
+                self.misses += 1
+                return None
+            scores = self._vectors @ normalize_vector(question_vector)
+            candidates = [
+                idx
+                for idx, row in enumerate(self._rows)
+                if row["department"] == (department or "")
+            ]
+            tokens = literal_tokens(question)
+            matching = [idx for idx in candidates if self._literals[idx] == tokens]
+            best = max(matching, key=lambda idx: scores[idx], default=None)
+            if best is None or scores[best] < threshold:
+                if any(scores[idx] >= threshold for idx in candidates):
+                    # 임베딩으로는 같은 질문이지만 조건 값이 다른 경우
+                    self.literal_mismatches += 1
+                self.misses += 1
+                return None
+            self.hits += 1
+            return {**self._rows[best], "similarity": float(scores[best])}
+
+    def add(
+        self,
+        questions: Dict[str, List[float]],
+        schema_version: str,
+        department: str | None,
+        entry: Dict[str, Any],
+    ) -> None:
+        """
+        검증된 SQL을 질문들(원래 질문, 구체화된 질문)의 임베딩과 함께 저장합니다.
+
+        Args:
+            questions: 질문 -> 임베딩
+            schema_version: SQL이 만들어진 시점의 스키마 버전
+            department: 사용자 부서
+            entry: sql_query, table_contexts, table_contexts_ids
+        """
+        now = time.time()
+        with self._lock:
+            self._conn.executemany(
+                "INSERT INTO questions "
+                "(schema_version, department, question, vector, entry, created_at) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                [
+                    (
+                        schema_version,
+                        department or "",
+                        question,
+                        normalize_vector(vector).tobytes(),
+                        json.dumps(entry, ensure_ascii=False),
+                        now,
+                    )
+                    for question, vector in questions.items()
+                ],
+            )
+            self._conn.commit()
+            # 다음 조회 때 메모리 행렬을 다시 만든다.
+            self._schema_version = None
+            self.stores += 1
+
+    def stats(self) -> Dict[str, Any]:
+        total = self.hits + self.misses
+        return {
+            "entries": len(self._rows),
+            "schema_version": self._schema_version,
+            "hits": self.hits,
+            "misses": self.misses,
+            "stores": self.stores,
+            "literal_mismatches": self.literal_mismatches,
+            "hit_rate": round(self.hits / total, 4) if total else 0.0,
+        }
+
+
+_cache: QuestionCache | None = None
+_cache_lock = threading.Lock()
+
+
+def get_question_cache() -> QuestionCache | None:
+    """프로세스 전역 질문-SQL 캐시를 반환합니다. QUESTION_CACHE가 꺼져 있으면 None을 반환합니다."""
+    global _cache
+    config = get_question_cache_config()
+    if not config["enabled"]:
+        return None
+    if _cache is None:
+        with _cache_lock:
+            if _cache is None:
+                _cache = QuestionCache(config["path"])
+    return _cache
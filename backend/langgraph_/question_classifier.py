@@ -0,0 +1,277 @@
+"""
+질문 평가(question_evaluation)를 LLM 호출 없이 처리하기 위한 로컬 분류기입니다.
+문자 n-gram을 해싱한 특징에 대한 로지스틱 회귀이며, 한 번의 예측은 1ms 이내에 끝납니다.
+
+학습 데이터:
+- logs/user_feedback_*.csv: 저장된 질문은 모두 데이터 관련 질문("1")
+  (구체화된 질문이 아니라 질문 평가가 실제로 받는 원래 질문(original_question)을 사용)
+- logs/question_eval_*.csv: LLM이 질문 평가 노드에서 내린 판단 ("0" / "1")
+
+사용법: (backend 폴더에서)
+    python -m langgraph_.question_classifier              # 정확도와 LLM 판단과의 일치율만 출력
+    python -m langgraph_.question_classifier --save       # 전체 데이터로 다시 학습하여 저장
+"""
+
+import os
+import re
+import csv
+import glob
+import zlib
+import argparse
+import threading
+from typing import List, Dict, Tuple, Any
+
+import numpy as np
+
+from .utils import str2bool, get_log_config
+
+QUESTION_CLASSIFIER_PATH = "question_classifier.npz"
+
+
+def get_classifier_config() -> Dict[str, Any]:
+    """
+    환경변수에서 질문 평가 분류기 설정을 읽어옵니다.
+
+    - QUESTION_CLASSIFIER: 분류기 사용 여부 (모델 파일이 없으면 항상 LLM 사용)
+    - QUESTION_CLASSIFIER_PATH: 학습된 모델 파일 경로
+    - QUESTION_CLASSIFIER_THRESHOLD: 분류기 확신도(0.5~1)가 이 값 이상일 때만 LLM 호출을 생략
+    """
+    return {
+        "enabled": str2bool(os.getenv("QUESTION_CLASSIFIER", "true")),
+        "path": os.getenv("QUESTION_CLASSIFIER_PATH", QUESTION_CLASSIFIER_PATH),
+        "threshold": float(os.getenv("QUESTION_CLASSIFIER_THRESHOLD", 0.9)),
+    }
+
+
+def char_ngrams(question: str, ngram_range: Tuple[int, int]) -> List[str]:
+    text = " " + re.sub(r"\s+", " ", question.strip().lower()) + " "
+    return [
+        text[i : i + n]
+        for n in range(ngram_range[0], ngram_range[1] + 1)
+        for i in range(len(text) - n + 1)
+    ]
+
+
+def featurize(
+    question: str, dim: int, ngram_range: Tuple[int, int]
+) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    질문을 해싱된 문자 n-gram의 희소 벡터(인덱스, 값)로 바꿉니다. 값은 L2 정규화된 빈도입니다.
+    해시는 프로세스마다 달라지지 않도록 crc32를 사용합니다.
+    """
+    counts: Dict[int, float] = {}
+    for gram in char_ngrams(question, ngram_range):
+        idx = zlib.crc32(gram.encode("utf-8")) % dim
+        counts[idx] = counts.get(idx, 0.0) + 1.0
+    indices = np.fromiter(counts.keys(), dtype=np.int64, count=len(counts))
+    values = np.fromiter(counts.values(), dtype=np.float32, count=len(counts))
+    return indices, values / (np.linalg.norm(values) or 1.0)
+
+
+class QuestionClassifier:
+    """질문이 데이터/비즈니스 질문("1")인지 일상 대화("0")인지 판단하는 선형 분류기입니다."""
+
+    def __init__(
+        self,
+        weights: np.ndarray,
+        bias: float,
+        ngram_range: Tuple[int, int] = (1, 3),
+    ):
+        self.weights = weights
+        self.bias = bias
+        self.ngram_range = ngram_range
+        self.fast_path_count = 0  # 분류기로 처리한 질문 수
+        self.fallback_count = 0  # 확신도가 낮아 LLM으로 넘긴 질문 수
+
+    def predict_proba(self, question: str) -> float:
+        """질문이 데이터 관련 질문("1")일 확률을 반환합니다."""
+        indices, values = featurize(question, len(self.weights), self.ngram_range)
+        z = float(self.weights[indices] @ values) + self.bias
+        return 1.0 / (1.0 + np.exp(-z))
+
+    def predict(self, question: str) -> Tuple[str, float]:
+        """
+        Returns:
+            Tuple[str, float]: (판단 결과 "0" / "1", 확신도 0.5~1)
+        """
+        proba = self.predict_proba(question)
+        return ("1", proba) if proba >= 0.5 else ("0", 1.0 - proba)
+
+    @classmethod
+    def train(
+        cls,
+        questions: List[str],
+        labels: List[str],
+        dim: int = 2**18,
+        ngram_range: Tuple[int, int] = (1, 3),
+        epochs: int = 20,
+        learning_rate: float = 0.5,
+        l2: float = 1e-5,
+        seed: int = 0,
+    ) -> "QuestionClassifier":
+        """
+        확률적 경사 하강법으로 로지스틱 회귀를 학습합니다.
+        로그에는 데이터 관련 질문이 훨씬 많으므로 클래스별 가중치를 빈도에 반비례하게 둡니다.
+        """
+        features = [featurize(question, dim, ngram_range) for question in questions]
+        targets = np.array([1.0 if label == "1" else 0.0 for label in labels])
+        positives = max(targets.sum(), 1.0)
+        negatives = max(len(targets) - targets.sum(), 1.0)
+        class_weights = {
+            1.0: len(targets) / (2 * positives),
+            0.0: len(targets) / (2 * negatives),
+        }
+
+        weights = np.zeros(dim, dtype=np.float32)
+        bias = 0.0
+        rng = np.random.default_rng(seed)
+        for epoch in range(epochs):
+            step = learning_rate / (1 + epoch)
+            for i in rng.permutation(len(features)):
+                indices, values = features[i]
+                z = float(weights[indices] @ values) + bias
+                gradient = (1.0 / (1.0 + np.exp(-z)) - targets[i]) * class_weights[
+                    targets[i]
+                ]
+                weights[indices] -= step * (gradient * values + l2 * weights[indices])
+                bias -= step * gradient
+        return cls(weights, bias, ngram_range)
+
+    def save(self, path: str) -> None:
+        np.savez_compressed(
+            path,
+            weights=self.weights,
+            bias=np.array(self.bias),
+            ngram_range=np.array(self.ngram_range),
+        )
+
+    @classmethod
+    def load(cls, path: str) -> "QuestionClassifier":
+        data = np.load(path)
+        return cls(
+            data["weights"],
+            float(data["bias"]),
+            tuple(int(n) for n in data["ngram_range"]),  # type: ignore
+        )
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "fast_path_count": self.fast_path_count,
+            "fallback_count": self.fallback_count,
+        }
+
+
+def load_labeled_questions(log_dir: str = "logs") -> List[Dict[str, str]]:
+    """
+    학습용 질문과 레이블을 로그에서 모읍니다. 같은 질문은 마지막 레이블만 사용합니다.
+
+    Returns:
+        List[Dict]: question, label("0" / "1"), source("feedback" / "llm")
+    """
+    labeled: Dict[str, Dict[str, str]] = {}
+    for path in sorted(glob.glob(os.path.join(log_dir, "user_feedback_*.csv"))):
+        with open(path, newline="", encoding="utf-8") as f:
+            for row in csv.DictReader(f):
+                # original_question 컬럼이 없는 이전 로그의 user_question은 구체화된 질문이므로 건너뜀
+                question = (row.get("original_question") or "").strip()
+                if not question:
+                    continue
+                labeled[question] = {
+                    "question": question,
+                    "label": "1",
+                    "source": "feedback",
+                }
+    for path in sorted(glob.glob(os.path.join(log_dir, "question_eval_*.csv"))):
+        with open(path, newline="", encoding="utf-8") as f:
+            for row in csv.DictReader(f):
+                if row["source"] != "llm" or row["label"] not in ("0", "1"):
+                    continue
+                question = row["user_question"].strip()
+                labeled[question] = {
+                    "question": question,
+                    "label": row["label"],
+                    "source": "llm",
+                }
+    return list(labeled.values())
+
+
+_classifier: QuestionClassifier | None = None
+_classifier_mtime: float | None = None
+_classifier_lock = threading.Lock()
+
+
+def get_question_classifier() -> QuestionClassifier | None:
+    """
+    학습된 분류기를 반환합니다. 꺼져 있거나 모델 파일이 없으면 None을 반환합니다.
+    모델 파일이 다시 저장되면(재학습) 다음 호출 때 새로 불러옵니다.
+    """
+    global _classifier, _classifier_mtime
+    config = get_classifier_config()
+    if not config["enabled"] or not os.path.exists(config["path"]):
+        return None
+    mtime = os.path.getmtime(config["path"])
+    if _classifier is None or mtime != _classifier_mtime:
+        with _classifier_lock:
+            if _classifier is None or mtime != _classifier_mtime:
+                _classifier = QuestionClassifier.load(config["path"])
+                _classifier_mtime = mtime
+    return _classifier
+
+
+def main():
+    parser = argparse.ArgumentParser(description="질문 평가 분류기 학습/평가")
+    parser.add_argument("--log-dir", default=get_log_config()["dir"])
+    parser.add_argument("--test-ratio", type=float, default=0.2)
+    parser.add_argument("--epochs", type=int, default=20)
+    parser.add_argument(
+        "--save", action="store_true", help="전체 데이터로 학습하여 저장"
+    )
+    parser.add_argument("--path", default=get_classifier_config()["path"])
+    args = parser.parse_args()
+
+    rows = load_labeled_questions(args.log_dir)
+    if not rows:
+        print(f"{args.log_dir}에 학습할 로그가 없습니다.")
+        return
+    labels = [row["label"] for row in rows]
+    print(
+        f"학습 데이터 {len(rows)}개 (데이터 질문 {labels.count('1')}개, 일상 대화 {labels.count('0')}개)"
+    )
+
+    # 일부를 떼어 두고 학습하여 정확도와 LLM 판단과의 일치율을 측정
+    order = np.random.default_rng(0).permutation(len(rows))
+    n_test = int(len(rows) * args.test_ratio)
+    test = [rows[i] for i in order[:n_test]]
+    train = [rows[i] for i in order[n_test:]]
+    if test and train:
+        model = QuestionClassifier.train(
+            [row["question"] for row in train],
+            [row["label"] for row in train],
+            epochs=args.epochs,
+        )
+        threshold = get_classifier_config()["threshold"]
+        predictions = [model.predict(row["question"]) for row in test]
+        correct = [pred == row["label"] for (pred, _), row in zip(predictions, test)]
+        confident = [confidence >= threshold for _, confidence in predictions]
+        llm_rows = [i for i, row in enumerate(test) if row["source"] == "llm"]
+        print(f"검증 데이터 {len(test)}개")
+        print(f"- 정확도: {np.mean(correct):.4f}")
+        if llm_rows:
+            print(
+                f"- LLM 판단과의 일치율: {np.mean([correct[i] for i in llm_rows]):.4f} ({len(llm_rows)}개)"
+            )
+        print(
+            f"- 확신도 {threshold} 이상 비율(LLM 호출 생략): {np.mean(confident):.4f}, "
+            f"그 중 정확도: {np.mean([c for c, ok in zip(correct, confident) if ok]) if any(confident) else 0.0:.4f}"
+        )
+
+    if args.save:
+        model = QuestionClassifier.train(
+            [row["question"] for row in rows], labels, epochs=args.epochs
+        )
+        model.save(args.path)
+        print(f"분류기 저장 완료: {args.path}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,338 @@
+import os
+import re
+import json
+import time
+import sqlite3
+import hashlib
+import threading
+from collections import OrderedDict
+from contextlib import nullcontext
+from typing import List, Dict, Any, Callable, Tuple
+
+import sqlglot
+from sqlglot import exp
+from sqlglot.errors import SqlglotError
+from sqlalchemy import text, bindparam
+from sqlalchemy.engine import Connection
+
+from .db_engine import get_engine
+from .sql_text import LITERAL_PATTERN, COMMENT_PATTERN, SQL_KEYWORDS
+from .utils import EmptyQueryResultError, NullQueryResultError, str2bool
+
+# 결과 대신 캐시해 두었다가 그대로 다시 발생시키는 오류
+CACHED_ERRORS = {
+    error.__name__: error for error in (EmptyQueryResultError, NullQueryResultError)
+}
+
+
+def get_result_cache_config() -> Dict[str, Any]:
+    """
+    환경변수에서 쿼리 결과 캐시 설정을 읽어옵니다.
+
+    - QUERY_CACHE: 쿼리 결과 캐시 사용 여부
+    - QUERY_CACHE_SIZE: 메모리(LRU)에 보관할 최대 결과 수
+    - QUERY_CACHE_TTL: 결과를 재사용할 최대 시간(초). 테이블 UPDATE_TIME을 알 수 없을 때의 유일한 만료 기준
+    - QUERY_CACHE_PATH: 디스크(sqlite) 캐시 파일 경로 (비어 있으면 메모리 캐시만 사용)
+    """
+    return {
+        "enabled": str2bool(os.getenv("QUERY_CACHE", "true")),
+        "max_entries": int(os.getenv("QUERY_CACHE_SIZE", 256)),
+        "ttl": int(os.getenv("QUERY_CACHE_TTL", 600)),
+        "path": os.getenv("QUERY_CACHE_PATH", ""),
+    }
+
+
+# 점(db.table)에 붙지 않은 단어와 바로 뒤의 여는 괄호
+WORD_PATTERN = re.compile(r"(?<![.\w])([A-Za-z_]\w*)(?![.\w])(\()?")
+
+
+def lower_keyword(match: re.Match) -> str:
+    word, paren = match.group(1), match.group(2) or ""
+    if paren or word.upper() in SQL_KEYWORDS:
+        return word.lower() + paren
+    return match.group()
+
+
+def normalize_sql(sql_query: str) -> str:
+    """
+    공백, 주석, 키워드/함수 이름 대소문자, 끝의 세미콜론 차이만 있는 SQL이 같은 문자열이 되도록 정규화합니다.
+    문자열/식별자 리터럴은 바꾸지 않습니다. MySQL에서 데이터베이스/테이블 이름과 테이블 별칭은
+    대소문자를 구분하므로, 키워드와 함수 이름(괄호가 바로 뒤에 오는 단어)이 아닌 단어도 그대로 둡니다.
+    """
+    parts = LITERAL_PATTERN.split(sql_query)
+    normalized = []
+    for idx, part in enumerate(parts):
+        if idx % 2:
+            normalized.append(part)
+            continue
+        part = COMMENT_PATTERN.sub(" ", part)
+        part = re.sub(r"\s+", " ", part)
+        part = re.sub(r"\s*([,()=])\s*", r"\1", part)
+        part = WORD_PATTERN.sub(lower_keyword, part)
+        normalized.append(part)
+    return "".join(normalized).strip().rstrip(";").strip()
+
+
+def extract_table_keys(sql_query: str) -> List[str] | None:
+    """
+    쿼리가 참조하는 "DB.테이블" 목록을 반환합니다. (서브쿼리와 콤마 조인의 테이블 포함, CTE 이름 제외)
+    파싱할 수 없거나, 데이터베이스 없이 쓰인 테이블이 있거나, 참조한 테이블이 없으면
+    UPDATE_TIME으로 결과가 바뀌었는지 확인할 수 없으므로 None을 반환합니다.
+    """
+    try:
+        tree = sqlglot.parse_one(sql_query, read="mysql")
+    except SqlglotError:
+        return None
+    cte_names = {cte.alias.lower() for cte in tree.find_all(exp.CTE)}
+    table_keys = set()
+    for table in tree.find_all(exp.Table):
+        if not table.name:
+            continue
+        if not table.db:
+            if table.name.lower() in cte_names:
+                continue
+            return None
+        table_keys.add(f"{table.db}.{table.name}")
+    return sorted(table_keys) or None
+
+
+def get_table_versions(
+    table_keys: List[str], connection: Connection | None = None
+) -> Dict[str, str | None]:
+    """
+    INFORMATION_SCHEMA.TABLES에서 테이블별 UPDATE_TIME을 조회합니다.
+    UPDATE_TIME을 알 수 없는 테이블(또는 INFORMATION_SCHEMA가 없는 sqlite)은 None입니다.
+    connection이 주어지면 그 커넥션으로 조회합니다.
+    """
+    versions: Dict[str, str | None] = {key: None for key in table_keys}
+    engine = get_engine("INFORMATION_SCHEMA") if connection is None else connection
+    if not table_keys or engine.dialect.name == "sqlite":
+        return versions
+
+    query = text("""
+        SELECT CONCAT(TABLE_SCHEMA, '.', TABLE_NAME) AS table_key, UPDATE_TIME
+        FROM TABLES
+        WHERE CONCAT(TABLE_SCHEMA, '.', TABLE_NAME) IN :table_keys;
+        """).bindparams(bindparam("table_keys", expanding=True))
+    with (
+        nullcontext(connection) if connection is not None else engine.connect()
+    ) as connection:
+        for table_key, update_time in connection.execute(
+            query, {"table_keys": table_keys}
+        ):
+            versions[table_key] = None if update_time is None else str(update_time)
+    return versions
+
+
+class QueryResultCache:
+    """정규화한 SQL을 key로 쿼리 결과를 재사용하는 캐시입니다.
+    메모리(LRU)에 먼저 보관하고, QUERY_CACHE_PATH가 주어지면 디스크(sqlite)에도 저장해 서버를 다시 시작해도 재사용합니다.
+    각 결과는 참조한 테이블의 UPDATE_TIME과 함께 저장되며, UPDATE_TIME이 바뀌거나 QUERY_CACHE_TTL이 지나면 버립니다.
+    """
+
+    def __init__(self, max_entries: int = 256, ttl: int = 600, path: str = ""):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.path = path
+        self.memory_hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self.invalidations = 0
+        self.uncacheable = 0
+
+        self._lock = threading.Lock()
+        self._entries: OrderedDict[str, Dict[str, Any]] = OrderedDict()
+        self._conn: sqlite3.Connection | None = None
+        if path:
+            self._conn = sqlite3.connect(path, check_same_thread=False)
+            self._conn.execute("""
+                CREATE TABLE IF NOT EXISTS results (
+                    key TEXT PRIMARY KEY,
+                    entry TEXT NOT NULL,
+                    created_at REAL NOT NULL
+                )
+                """)
+            self._conn.commit()
+
+    @staticmethod
+    def make_key(sql_query: str, options: Dict[str, Any] | None = None) -> str:
+        """정규화한 SQL과 결과에 영향을 주는 설정(행 수 제한 등)으로 캐시 key를 만듭니다."""
+        raw = (
+            normalize_sql(sql_query) + "\0" + json.dumps(options or {}, sort_keys=True)
+        )
+        return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+    def _remember(self, key: str, entry: Dict[str, Any]) -> None:
+        with self._lock:
+            self._entries[key] = entry
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def _forget(self, key: str) -> None:
+        with self._lock:
+            self._entries.pop(key, None)
+            if self._conn is not None:
+                self._conn.execute("DELETE FROM results WHERE key = ?", (key,))
+                self._conn.commit()
+
+    def _lookup(self, key: str) -> Tuple[Dict[str, Any] | None, str]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+                return entry, "memory"
+            if self._conn is None:
+                return None, ""
+            row = self._conn.execute(
+                "SELECT entry FROM results WHERE key = ?", (key,)
+            ).fetchone()
+        if row is None:
+            return None, ""
+        return json.loads(row[0]), "disk"
+
+    def _is_valid(
+        self, entry: Dict[str, Any], connection: Connection | None = None
+    ) -> bool:
+        if time.time() - entry["created_at"] > self.ttl:
+            return False
+        return (
+            get_table_versions(entry["tables"], connection) == entry["table_versions"]
+        )
+
+    def get(
+        self,
+        sql_query: str,
+        options: Dict[str, Any] | None = None,
+        connection: Connection | None = None,
+    ) -> Dict | None:
+        """
+        캐시된 결과를 반환합니다. 없거나 만료된 경우 None을 반환합니다.
+        결과 대신 빈 결과/NULL 결과 오류가 캐시되어 있으면 그 오류를 다시 발생시킵니다.
+        """
+        key = self.make_key(sql_query, options)
+        entry, tier = self._lookup(key)
+        if entry is not None and not self._is_valid(entry, connection):
+            self._forget(key)
+            self.invalidations += 1
+            entry = None
+        if entry is None:
+            self.misses += 1
+            return None
+
+        if tier == "disk":
+            self.disk_hits += 1
+            self._remember(key, entry)
+        else:
+            self.memory_hits += 1
+        if entry["error"]:
+            raise CACHED_ERRORS[entry["error"]]()
+        return entry["payload"]
+
+    def put(
+        self,
+        sql_query: str,
+        payload: Dict[str, Any] | None,
+        options: Dict[str, Any] | None = None,
+        error: str | None = None,
+        connection: Connection | None = None,
+    ) -> None:
+        """
+        쿼리 결과(또는 오류 이름)를 참조한 테이블의 현재 UPDATE_TIME과 함께 저장합니다.
+        참조한 테이블을 알 수 없는 쿼리는 저장하지 않습니다.
+        """
+        tables = extract_table_keys(sql_query)
+        if tables is None:
+            return
+        entry = {
+            "payload": payload,
+            "error": error,
+            "tables": tables,
+            "table_versions": get_table_versions(tables, connection),
+            "created_at": time.time(),
+        }
+        key = self.make_key(sql_query, options)
+        self._remember(key, entry)
+        if self._conn is not None:
+            with self._lock:
+                self._conn.execute(
+                    "DELETE FROM results WHERE created_at < ?",
+                    (entry["created_at"] - self.ttl,),
+                )
+                self._conn.execute(
+                    "INSERT OR REPLACE INTO results VALUES (?, ?, ?)",
+                    (key, json.dumps(entry, ensure_ascii=False), entry["created_at"]),
+                )
+                self._conn.commit()
+
+    def get_or_execute(
+        self,
+        sql_query: str,
+        execute: Callable[[str], Dict[str, Any]],
+        options: Dict[str, Any] | None = None,
+        connection: Connection | None = None,
+    ) -> Tuple[Dict[str, Any], bool]:
+        """
+        캐시된 결과가 있으면 반환하고, 없으면 execute(sql_query)를 실행하여 결과를 저장합니다.
+        빈 결과/NULL 결과 오류도 저장하므로 같은 쿼리가 다시 생성되어도 데이터베이스에 묻지 않습니다.
+        connection이 주어지면 테이블 UPDATE_TIME 조회에 사용합니다.
+
+        Returns:
+            Tuple[Dict, bool]: (결과, 캐시 재사용 여부)
+        """
+        if extract_table_keys(sql_query) is None:
+            # 결과가 바뀌었는지 확인할 수 없으므로 캐시를 거치지 않고 실행한다.
+            self.uncacheable += 1
+            return execute(sql_query), False
+        cached = self.get(sql_query, options, connection)
+        if cached is not None:
+            return cached, True
+        try:
+            payload = execute(sql_query)
+        except tuple(CACHED_ERRORS.values()) as e:
+            self.put(
+                sql_query, None, options, error=type(e).__name__, connection=connection
+            )
+            raise
+        self.put(sql_query, payload, options, connection=connection)
+        return payload, False
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            if self._conn is not None:
+                self._conn.execute("DELETE FROM results")
+                self._conn.commit()
+
+    def stats(self) -> Dict[str, Any]:
+        hits = self.memory_hits + self.disk_hits
+        total = hits + self.misses
+        return {
+            "entries": len(self._entries),
+            "hits": hits,
+            "memory_hits": self.memory_hits,
+            "disk_hits": self.disk_hits,
+            "misses": self.misses,
+            "invalidations": self.invalidations,
+            "uncacheable": self.uncacheable,
+            "hit_rate": round(hits / total, 4) if total else 0.0,
+        }
+
+
+_cache: QueryResultCache | None = None
+_cache_lock = threading.Lock()
+
+
+def get_result_cache() -> QueryResultCache | None:
+    """프로세스 전역 쿼리 결과 캐시를 반환합니다. QUERY_CACHE가 꺼져 있으면 None을 반환합니다."""
+    global _cache
+    config = get_result_cache_config()
+    if not config["enabled"]:
+        return None
+    if _cache is None:
+        with _cache_lock:
+            if _cache is None:
+                _cache = QueryResultCache(
+                    config["max_entries"], config["ttl"], config["path"]
+                )
+    return _cache
@@ -0,0 +1,204 @@
+import os
+import re
+import json
+from collections import Counter, deque
+from typing import List, Dict, Any, Sequence, Tuple
+
+from .context_pruning import count_tokens
+
+# 컬럼 요약에서 값의 종류를 세는 최대 개수. 넘으면 "1000+"로 표시
+DISTINCT_CAP = 1000
+
+
+def get_result_format_config() -> Dict[str, int]:
+    """
+    환경변수에서 쿼리 결과 직렬화 설정을 읽어옵니다.
+
+    - RESULT_CELL_MAX_CHARS: 값 하나의 최대 글자 수
+    - RESULT_TOP_VALUES: 컬럼 요약에 표시할 최빈값 수
+    """
+    return {
+        "cell_max_chars": int(os.getenv("RESULT_CELL_MAX_CHARS", 100)),
+        "top_values": int(os.getenv("RESULT_TOP_VALUES", 3)),
+    }
+
+
+def get_result_token_budget(node: str = "sql_conversation") -> int:
+    """
+    쿼리 결과를 넘겨받는 노드의 결과 토큰 예산을 반환합니다.
+    RESULT_TOKEN_BUDGET이 기본값이고, RESULT_TOKEN_BUDGETS 환경변수(JSON)로 노드별로 바꿀 수 있습니다.
+    예: '{"sql_conversation": 3000}'
+    """
+    budgets = json.loads(os.getenv("RESULT_TOKEN_BUDGETS", "{}"))
+    return int(budgets.get(node, os.getenv("RESULT_TOKEN_BUDGET", 1500)))
+
+
+def format_cell(value: Any, max_chars: int) -> str:
+    """값을 markdown 표 한 칸에 들어가도록 한 줄 문자열로 바꾸고 max_chars로 자릅니다."""
+    if value is None:
+        return "NULL"
+    cell = re.sub(r"\s+", " ", str(value)).replace("|", "\\|")
+    if len(cell) > max_chars:
+        cell = cell[: max_chars - 3] + "..."
+    return cell
+
+
+def render_markdown_row(cells: Sequence[str]) -> str:
+    return "| " + " | ".join(cells) + " |"
+
+
+def render_markdown_header(columns: Sequence[str]) -> List[str]:
+    return [render_markdown_row(columns), render_markdown_row(["---"] * len(columns))]
+
+
+class ColumnSummary:
+    """결과를 읽으면서 컬럼 하나의 최솟값/최댓값, 값 종류 수, 최빈값을 집계합니다."""
+
+    def __init__(self, name: str):
+        self.name = name
+        self.nulls = 0
+        self.min: Any = None
+        self.max: Any = None
+        self.counts: Counter = Counter()
+        self.overflow = False
+
+    def add(self, value: Any, cell: str) -> None:
+        if value is None:
+            self.nulls += 1
+            return
+        if self.min is None:
+            self.min = self.max = value
+        else:
+            try:
+                self.min = min(self.min, value)
+                self.max = max(self.max, value)
+            except TypeError:
+                # 타입이 섞인 컬럼은 문자열로 비교
+                self.min = min(str(self.min), str(value))
+                self.max = max(str(self.max), str(value))
+        if cell in self.counts or len(self.counts) < DISTINCT_CAP:
+            self.counts[cell] += 1
+        else:
+            self.overflow = True
+
+    def render(self, max_chars: int, top_values: int) -> List[str]:
+        distinct = f"{DISTINCT_CAP}+" if self.overflow else str(len(self.counts))
+        most_common = self.counts.most_common(top_values)
+        # 모든 값이 한 번씩만 나오면 최빈값은 의미가 없으므로 생략
+        top = (
+            ", ".join(f"{cell}({count})" for cell, count in most_common)
+            if most_common and most_common[0][1] > 1
+            else "-"
+        )
+        return [
+            self.name,
+            format_cell(self.min, max_chars),
+            format_cell(self.max, max_chars),
+            distinct,
+            str(self.nulls),
+            top,
+        ]
+
+
+class ResultCollector:
+    """
+    스트리밍으로 읽는 결과에서 앞쪽 head_rows개, 뒤쪽 tail_rows개 행과 컬럼 요약만 메모리에 남깁니다.
+    """
+
+    def __init__(self, columns: List[str], head_rows: int, tail_rows: int):
+        config = get_result_format_config()
+        self.cell_max_chars = config["cell_max_chars"]
+        self.top_values = config["top_values"]
+        self.columns = columns
+        self.summaries = [ColumnSummary(column) for column in columns]
+        self.head_rows = head_rows
+        self.head: List[List[str]] = []
+        self.tail: deque = deque(maxlen=tail_rows)
+        self.fetched = 0
+        self.has_value = False
+
+    def add(self, row: Sequence[Any]) -> None:
+        self.fetched += 1
+        # 하나라도 NULL이 아닌 값이 있으면 NULL 결과가 아님
+        self.has_value = self.has_value or not all(value is None for value in row)
+        cells = [format_cell(value, self.cell_max_chars) for value in row]
+        for summary, value, cell in zip(self.summaries, row, cells):
+            summary.add(value, cell)
+        if len(self.head) < self.head_rows:
+            self.head.append(cells)
+        else:
+            self.tail.append(cells)
+
+    def serialize(
+        self, token_budget: int, exhausted: bool = True
+    ) -> Tuple[str, Dict[str, int | bool]]:
+        """
+        결과를 markdown 표로 직렬화합니다.
+        모든 행이 예산 안에 들어가면 표만 반환하고, 넘치면 컬럼 요약과 앞/뒤 행을 예산 안에서 번갈아 채웁니다.
+
+        Args:
+            token_budget: 결과 문자열의 토큰 예산
+            exhausted: 모든 행을 읽었는지 여부 (False이면 이후 행은 조회하지 않음)
+
+        Returns:
+            Tuple[str, Dict]: (결과 문자열, 행 통계)
+                행 통계: kept(표시한 행), dropped(읽었지만 표시하지 않은 행),
+                exhausted(모든 행을 읽었는지 여부), tokens(결과 문자열의 토큰 수)
+        """
+        header = render_markdown_header(self.columns)
+        rows = self.head + list(self.tail)
+        if exhausted and len(rows) == self.fetched:
+            table = "\n".join(header + [render_markdown_row(row) for row in rows])
+            tokens = count_tokens(table)
+            if tokens <= token_budget:
+                return table, {
+                    "kept": len(rows),
+                    "dropped": 0,
+                    "exhausted": True,
+                    "tokens": tokens,
+                }
+
+        summary_lines = render_markdown_header(
+            ["column", "min", "max", "distinct", "nulls", "top values"]
+        ) + [
+            render_markdown_row(summary.render(self.cell_max_chars, self.top_values))
+            for summary in self.summaries
+        ]
+        intro = f"(총 {self.fetched}개 행{'' if exhausted else ' 이상'}. 컬럼 요약과 일부 행만 표시)"
+        used = count_tokens("\n".join([intro, "", *summary_lines, "", *header]))
+
+        # 앞/뒤 행을 번갈아 예산 안에서 추가
+        head: List[str] = []
+        tail: List[str] = []
+        head_iter = iter(rows)
+        tail_iter = reversed(rows)
+        remaining = len(rows)
+        take_head = True
+        while remaining:
+            source = head_iter if take_head else tail_iter
+            line = render_markdown_row(next(source))
+            cost = count_tokens(line) + 1
+            if used + cost > token_budget:
+                break
+            (head if take_head else tail).append(line)
+            used += cost
+            remaining -= 1
+            take_head = not take_head
+
+        kept = len(head) + len(tail)
+        omitted = self.fetched - kept
+        lines = [intro, "", *summary_lines, "", *header, *head]
+        if omitted:
+            lines.append(
+                render_markdown_row(
+                    [f"... {omitted}개 행 생략 ..."] + [""] * (len(self.columns) - 1)
+                )
+            )
+        lines += reversed(tail)
+        result = "\n".join(lines)
+        return result, {
+            "kept": kept,
+            "dropped": omitted,
+            "exhausted": exhausted,
+            "tokens": count_tokens(result),
+        }
@@ -0,0 +1,320 @@
+import os
+import time
+import threading
+from datetime import datetime
+from typing import List, Dict, Any, NamedTuple
+
+
+from .faiss_init import (
+    get_vector_stores,
+    load_vector_store,
+    load_join_graph,
+    load_column_index,
+    load_schema_catalog,
+    LOCAL_FAISS_PATH,
+)
+from .join_graph import JoinGraph
+from .column_index import ColumnIndex
+from .schema_catalog import SchemaCatalog
+from .context_pruning import get_pruning_config, prune_table_contexts, count_tokens
+from .sharded_store import ShardedVectorStore
+from .index_store import get_current_version, rollback_version, version_path
+from .schema_refresh import load_manifest, schema_fingerprint
+
+
+class IndexSnapshot(NamedTuple):
+    vector_store: ShardedVectorStore
+    join_graph: JoinGraph  # 테이블 조인 그래프
+    column_index: ColumnIndex  # 컬럼 단위 임베딩 인덱스
+    catalog: SchemaCatalog  # 테이블별 컬럼 이름 (생성된 SQL 검사용)
+    version: str  # 불러온 인덱스의 버전
+    schema_version: str  # 인덱스가 만들어진 시점의 스키마 지문
+    load_time: float  # 인덱스를 불러오는 데 걸린 시간(초)
+    loaded_at: str
+
+
+def load_schema_version(version: str) -> str:
+    """인덱스 버전의 manifest로 스키마 버전을 계산합니다. manifest가 없으면 인덱스 버전을 그대로 사용합니다."""
+    manifest = load_manifest(version_path(LOCAL_FAISS_PATH, version))
+    if manifest is None:
+        return version
+    return schema_fingerprint(manifest["tables"])
+
+
+class SchemaRetriever:
+    """프로세스 전체에서 공유되는 테이블 스키마 검색 서비스입니다.
+    FastAPI 시작 시점에 한 번만 FAISS 인덱스를 불러오고, 모든 그래프 실행이 이 객체를 공유합니다.
+    새 인덱스 버전이 발행되면 스냅샷 참조만 교체하므로, 진행 중인 검색은 이전 버전으로 끝까지 수행됩니다.
+    """
+
+    def __init__(
+        self,
+        vector_store: ShardedVectorStore,
+        join_graph: JoinGraph,
+        column_index: ColumnIndex,
+        catalog: SchemaCatalog,
+        version: str,
+        load_time: float,
+    ):
+        self._snapshot = IndexSnapshot(
+            vector_store,
+            join_graph,
+            column_index,
+            catalog,
+            version,
+            load_schema_version(version),
+            load_time,
+            datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+        )
+        self._swap_lock = threading.Lock()
+        self.search_count = 0
+        self.reload_count = 0
+        self.join_expand_count = 0  # 조인 그래프로 추가된 테이블 수
+        # 반환한 / 축약하지 않았을 때의 context 누적 토큰 수 (CONTEXT_TOKEN_METRICS가 켜져 있을 때만)
+        self.context_tokens = 0
+        self.full_context_tokens = 0
+
+    @property
+    def vector_store(self) -> ShardedVectorStore:
+        return self._snapshot.vector_store
+
+    @property
+    def catalog(self) -> SchemaCatalog:
+        return self._snapshot.catalog
+
+    @property
+    def version(self) -> str:
+        return self._snapshot.version
+
+    @property
+    def schema_version(self) -> str:
+        return self._snapshot.schema_version
+
+    def search(
+        self,
+        question: str,
+        k: int,
+        department: str | None = None,
+        token_budget: int | None = None,
+    ) -> List[str]:
+        """질문과 관련성이 가장 높은 k개 테이블의 context를 반환합니다.
+        질문과 사용자 부서에 맞는 데이터베이스 shard만 검색하며,
+        검색된 테이블들을 잇는 조인 경로의 중간 테이블을 조인 그래프에서 찾아 뒤에 덧붙입니다.
+        각 테이블의 DDL은 기본키/외래키와 질문 관련 상위 컬럼만 남겨 토큰 예산 안으로 줄입니다.
+
+        Args:
+            question (str): 사용자의 질문
+            k (int): 반환할 context의 개수
+            department (str | None): 사용자 부서
+            token_budget (int | None): context 토큰 예산. None이면 CONTEXT_TOKEN_BUDGET 설정,
+                0이면 축약하지 않은 전체 DDL을 반환
+
+        Returns:
+            List[str]: 테이블 context 리스트
+        """
+        self.search_count += 1
+        # 검색 도중 인덱스가 교체되더라도 시작 시점의 스냅샷을 계속 사용
+        snapshot = self._snapshot
+        # 질문 임베딩은 테이블 검색과 컬럼 점수 계산에 함께 사용
+        query_vector = snapshot.vector_store.embedding_function.embed_query(question)
+        relevant_tables = snapshot.vector_store.similarity_search_by_vector(
+            query_vector, k=k, department=department
+        )
+
+        # 조인에 필요한 중간 테이블이 빠져 재선택 루프에 들어가는 것을 줄이기 위해 추가
+        hit_ids = [
+            f"{doc.metadata['db']}.{doc.metadata['table']}" for doc in relevant_tables
+        ]
+        join_ids = snapshot.join_graph.expand(
+            hit_ids,
+            max_hops=int(os.getenv("JOIN_MAX_HOPS", 3)),
+            max_extra=int(os.getenv("JOIN_MAX_EXTRA", 3)),
+        )
+        # 검색 대상(부서 권한)에 포함된 데이터베이스의 테이블만 추가
+        hit_dbs = {doc.metadata["db"] for doc in relevant_tables}
+        join_ids = [
+            doc_id
+            for doc_id in join_ids
+            if snapshot.vector_store.doc_dbs.get(doc_id) in hit_dbs
+        ]
+        if join_ids:
+            self.join_expand_count += len(join_ids)
+            relevant_tables += snapshot.vector_store.get_documents(join_ids)
+
+        full_contexts = [doc.metadata["context"] for doc in relevant_tables]
+        config = get_pruning_config()
+        if token_budget is None:
+            token_budget = config["token_budget"]
+        if token_budget > 0 and len(snapshot.column_index):
+            column_scores = [
+                snapshot.column_index.score(
+                    query_vector, f"{doc.metadata['db']}.{doc.metadata['table']}"
+                )
+                for doc in relevant_tables
+            ]
+            table_contexts = prune_table_contexts(
+                relevant_tables,
+                column_scores,
+                token_budget,
+                min_columns=config["min_columns"],
+                sample_rows=config["sample_rows"],
+            )
+        else:
+            table_contexts = full_contexts
+
+        if config["token_metrics"]:
+            self.context_tokens += sum(count_tokens(c) for c in table_contexts)
+            self.full_context_tokens += sum(count_tokens(c) for c in full_contexts)
+        return table_contexts
+
+    def reload_if_changed(self) -> bool:
+        """디스크에 발행된 현재 버전이 바뀌었으면 새 버전을 불러와 교체합니다.
+
+        Returns:
+            bool: 인덱스가 교체되었는지 여부
+        """
+        with self._swap_lock:
+            version = get_current_version(LOCAL_FAISS_PATH)
+            if version is None or version == self._snapshot.version:
+                return False
+
+            start = time.perf_counter()
+            vector_store = load_vector_store(version)
+            join_graph = load_join_graph(version)
+            column_index = load_column_index(version)
+            catalog = load_schema_catalog(version)
+            load_time = time.perf_counter() - start
+            previous = self._snapshot.version
+            # 참조 교체는 원자적이므로 검색 중인 요청을 막지 않는다.
+            self._snapshot = IndexSnapshot(
+                vector_store,
+                join_graph,
+                column_index,
+                catalog,
+                version,
+                load_schema_version(version),
+                load_time,
+                datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+            )
+            self.reload_count += 1
+            print(f"FAISS 인덱스 교체: {previous} -> {version} ({load_time:.2f}s)")
+            return True
+
+    def stats(self) -> Dict[str, Any]:
+        snapshot = self._snapshot
+        return {
+            "version": snapshot.version,
+            "schema_version": snapshot.schema_version,
+            "load_time": round(snapshot.load_time, 3),
+            "loaded_at": snapshot.loaded_at,
+            "shard_count": len(snapshot.vector_store.shards),
+            "search_count": self.search_count,
+            "reload_count": self.reload_count,
+            "join_expand_count": self.join_expand_count,
+            "column_count": len(snapshot.column_index),
+            "catalog_tables": len(snapshot.catalog),
+            "context_tokens": self.context_tokens,
+            "full_context_tokens": self.full_context_tokens,
+        }
+
+
+_retriever: SchemaRetriever | None = None
+_retriever_lock = threading.RLock()
+_watcher: threading.Thread | None = None
+_rebuild_lock = threading.Lock()
+
+
+def init_schema_retriever(sample_info: int = 5) -> SchemaRetriever:
+    """스키마 검색 서비스를 생성하여 프로세스 전역에 등록합니다.
+    인덱스를 최신 상태로 갱신(필요 시 새 버전 발행)한 뒤 불러오고, 새 버전 감시를 시작합니다.
+
+    Args:
+        sample_info (int): 각 테이블에서 샘플링할 행 수
+
+    Returns:
+        SchemaRetriever: 등록된 스키마 검색 서비스
+    """
+    global _retriever
+    with _retriever_lock:
+        start = time.perf_counter()
+        vector_store = get_vector_stores(sample_info)
+        version = get_current_version(LOCAL_FAISS_PATH) or "none"
+        join_graph = load_join_graph(version)
+        column_index = load_column_index(version)
+        catalog = load_schema_catalog(version)
+        load_time = time.perf_counter() - start
+        _retriever = SchemaRetriever(
+            vector_store, join_graph, column_index, catalog, version, load_time
+        )
+        print(
+            f"스키마 검색 서비스 준비 완료 (version={_retriever.version}, load_time={load_time:.2f}s)"
+        )
+        start_index_watcher()
+    return _retriever
+
+
+def get_schema_retriever() -> SchemaRetriever:
+    """등록된 스키마 검색 서비스를 반환합니다.
+    서버 시작 과정을 거치지 않은 경우(스크립트 실행 등)에는 처음 호출될 때 생성합니다.
+    """
+    if _retriever is None:
+        with _retriever_lock:
+            if _retriever is None:
+                return init_schema_retriever()
+    return _retriever  # type: ignore
+
+
+def start_index_watcher() -> None:
+    """INDEX_RELOAD_INTERVAL(초, 기본 30) 마다 새로 발행된 인덱스 버전이 있는지 확인하는 스레드를 시작합니다.
+    0 이하로 설정하면 자동 교체를 사용하지 않습니다.
+    """
+    global _watcher
+    interval = float(os.getenv("INDEX_RELOAD_INTERVAL", 30))
+    if interval <= 0 or (_watcher is not None and _watcher.is_alive()):
+        return
+
+    def watch():
+        while True:
+            time.sleep(interval)
+            try:
+                if _retriever is not None:
+                    _retriever.reload_if_changed()
+            except Exception as e:
+                # 새 버전을 불러오지 못하면 기존 버전으로 계속 서비스
+                print(f"FAISS 인덱스 교체 실패: {e}")
+
+    _watcher = threading.Thread(target=watch, name="faiss-index-watcher", daemon=True)
+    _watcher.start()
+
+
+def rebuild_schema_index(sample_info: int = 5) -> bool:
+    """인덱스를 백그라운드에서 갱신하여 새 버전으로 발행한 뒤 즉시 교체합니다.
+
+    Returns:
+        bool: 재생성을 시작했는지 여부 (이미 진행 중이면 False)
+    """
+    if not _rebuild_lock.acquire(blocking=False):
+        return False
+
+    def rebuild():
+        try:
+            get_vector_stores(sample_info)
+            get_schema_retriever().reload_if_changed()
+        except Exception as e:
+            print(f"FAISS 인덱스 재생성 실패: {e}")
+        finally:
+            _rebuild_lock.release()
+
+    threading.Thread(target=rebuild, name="faiss-index-rebuild", daemon=True).start()
+    return True
+
+
+def rollback_schema_index() -> str:
+    """직전 인덱스 버전으로 되돌리고 즉시 교체합니다.
+
+    Returns:
+        str: 되돌아간 버전 id
+    """
+    version = rollback_version(LOCAL_FAISS_PATH)
+    get_schema_retriever().reload_if_changed()
+    return version
@@ -0,0 +1,212 @@
+import os
+import json
+import time
+import sqlite3
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Dict, Tuple
+
+from sqlalchemy import text
+from sqlalchemy.engine import Engine
+from sqlalchemy.exc import SQLAlchemyError
+
+from .schema_refresh import group_by_db
+from .embedding_cache import LOOKUP_CHUNK_SIZE
+from .db_engine import BatchEngines
+
+SAMPLE_STORE_PATH = "sample_rows.sqlite"
+
+
+def get_sample_config() -> Dict[str, int]:
+    """
+    환경변수에서 샘플 행 저장소 설정을 읽어옵니다.
+
+    - SAMPLE_TTL: UPDATE_TIME을 알 수 없는 테이블(NULL)의 샘플을 다시 가져오는 주기(초, 기본 1일)
+    - SAMPLE_CELL_MAX_CHARS: 샘플 값 하나의 최대 글자 수
+    - SAMPLE_FETCH_WORKERS: 샘플 행을 동시에 조회할 스레드(커넥션) 수
+    """
+    return {
+        "ttl": int(os.getenv("SAMPLE_TTL", 86400)),
+        "cell_max_chars": int(os.getenv("SAMPLE_CELL_MAX_CHARS", 100)),
+        "workers": int(
+            os.getenv("SAMPLE_FETCH_WORKERS", min(32, (os.cpu_count() or 1) * 4))
+        ),
+    }
+
+
+def fetch_table_samples(
+    engine: Engine, table_name: str, sample_info: int, cell_max_chars: int
+) -> Tuple[List[str], List[List[str]]]:
+    """
+    테이블에서 sample_info개의 행을 조회합니다. 값은 문자열로 바꾸어 cell_max_chars로 자릅니다.
+
+    Returns:
+        Tuple[List[str], List[List[str]]]: (컬럼 이름 목록, 샘플 행 목록)
+    """
+    quoted = engine.dialect.identifier_preparer.quote(table_name)
+    try:
+        with engine.connect() as connection:
+            result = connection.execute(
+                text(f"SELECT * FROM {quoted} LIMIT :n"), {"n": sample_info}
+            )
+            columns = list(result.keys())
+            rows = [[str(value)[:cell_max_chars] for value in row] for row in result]
+    except SQLAlchemyError as e:
+        # 권한이 없거나 조회할 수 없는 테이블은 샘플 없이 진행
+        print(f"샘플 행 조회 실패 ({table_name}): {e}")
+        return [], []
+    return columns, rows
+
+
+class SampleRowStore:
+    """테이블별 샘플 행을 sqlite에 저장해 두고 재사용하는 저장소입니다.
+    UPDATE_TIME이 바뀐 테이블만 다시 조회하며, UPDATE_TIME이 NULL인 테이블은 SAMPLE_TTL이 지나면 다시 조회합니다.
+    조회는 데이터베이스별 커넥션 풀 위에서 동시에 진행합니다.
+    """
+
+    def __init__(self, store_path: str = SAMPLE_STORE_PATH):
+        self.store_path = store_path
+        self.fetch_count = 0
+        self.hit_count = 0
+
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(store_path, check_same_thread=False)
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS samples (
+                key TEXT PRIMARY KEY,
+                columns TEXT NOT NULL,
+                rows TEXT NOT NULL,
+                sample_info INTEGER NOT NULL,
+                update_time TEXT,
+                fetched_at REAL NOT NULL
+            )
+            """)
+        self._conn.commit()
+
+    def _entries(self, keys: List[str]) -> Dict[str, Tuple]:
+        entries = {}
+        with self._lock:
+            for i in range(0, len(keys), LOOKUP_CHUNK_SIZE):
+                chunk = keys[i : i + LOOKUP_CHUNK_SIZE]
+                placeholders = ",".join("?" * len(chunk))
+                rows = self._conn.execute(
+                    "SELECT key, columns, rows, sample_info, update_time, fetched_at "
+                    f"FROM samples WHERE key IN ({placeholders})",
+                    chunk,
+                ).fetchall()
+                entries.update({row[0]: row[1:] for row in rows})
+        return entries
+
+    def get(self, keys: List[str]) -> Dict[str, Tuple[List[str], List[List[str]]]]:
+        """저장된 샘플을 (컬럼 이름 목록, 샘플 행 목록)으로 반환합니다."""
+        return {
+            key: (json.loads(columns), json.loads(rows))
+            for key, (columns, rows, *_) in self._entries(keys).items()
+        }
+
+    def stale_keys(
+        self, keys: List[str], table_states: Dict[str, Dict], sample_info: int
+    ) -> List[str]:
+        """
+        다시 조회해야 하는 테이블을 고릅니다.
+        - 저장된 샘플이 없거나 sample_info가 바뀐 테이블
+        - UPDATE_TIME이 저장 당시와 달라진 테이블
+        - UPDATE_TIME이 NULL이고 SAMPLE_TTL이 지난 테이블
+        """
+        ttl = get_sample_config()["ttl"]
+        now = time.time()
+        entries = self._entries(keys)
+        stale = []
+        for key in keys:
+            entry = entries.get(key)
+            update_time = table_states[key]["update_time"]
+            if entry is None or entry[2] != sample_info or entry[3] != update_time:
+                stale.append(key)
+            elif update_time is None and now - entry[4] > ttl:
+                stale.append(key)
+        return stale
+
+    def fetch(
+        self,
+        DB_SERVER: str,
+        keys: List[str],
+        table_states: Dict[str, Dict],
+        sample_info: int,
+    ) -> None:
+        """주어진 테이블들의 샘플 행을 동시에 조회하여 저장합니다."""
+        if not keys:
+            return
+        config = get_sample_config()
+        tables_by_db = group_by_db(keys, table_states)
+        with (
+            BatchEngines(DB_SERVER, tables_by_db, config["workers"]) as engines,
+            ThreadPoolExecutor(max_workers=config["workers"]) as executor,
+        ):
+            futures = {
+                f"{db_name}.{table_name}": executor.submit(
+                    engines.run,
+                    db_name,
+                    fetch_table_samples,
+                    table_name,
+                    sample_info,
+                    config["cell_max_chars"],
+                )
+                for db_name, table_names in tables_by_db.items()
+                for table_name in table_names
+            }
+            results = {key: future.result() for key, future in futures.items()}
+
+        now = time.time()
+        with self._lock:
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO samples VALUES (?, ?, ?, ?, ?, ?)",
+                [
+                    (
+                        key,
+                        json.dumps(columns, ensure_ascii=False),
+                        json.dumps(rows, ensure_ascii=False),
+                        sample_info,
+                        table_states[key]["update_time"],
+                        now,
+                    )
+                    for key, (columns, rows) in results.items()
+                ],
+            )
+            self._conn.commit()
+        self.fetch_count += len(results)
+
+    def refresh(
+        self,
+        DB_SERVER: str,
+        table_states: Dict[str, Dict],
+        sample_info: int,
+    ) -> List[str]:
+        """
+        모든 테이블의 샘플 중 오래된 것만 다시 조회하고, 삭제된 테이블의 샘플은 지웁니다.
+
+        Args:
+            DB_SERVER: 데이터베이스 서버 경로
+            table_states: get_table_states의 결과
+            sample_info: 각 테이블에서 샘플링할 행 수
+
+        Returns:
+            List[str]: 샘플을 새로 조회한 테이블 key 목록
+        """
+        keys = list(table_states)
+        if sample_info <= 0:
+            return []
+        stale = self.stale_keys(keys, table_states, sample_info)
+        self.hit_count += len(keys) - len(stale)
+        self.fetch(DB_SERVER, stale, table_states, sample_info)
+
+        with self._lock:
+            stored = [key for (key,) in self._conn.execute("SELECT key FROM samples")]
+            self._conn.executemany(
+                "DELETE FROM samples WHERE key = ?",
+                [(key,) for key in stored if key not in table_states],
+            )
+            self._conn.commit()
+        return stale
+
+    def stats(self) -> Dict[str, int]:
+        return {"fetch_count": self.fetch_count, "hit_count": self.hit_count}
@@ -0,0 +1,67 @@
+import os
+import json
+from typing import List, Dict, Iterable
+
+from langchain_core.documents import Document
+
+SCHEMA_CATALOG_FILE = "catalog.json"
+
+
+class SchemaCatalog:
+    """인덱싱 시점의 "DB.테이블" -> 컬럼 이름 목록입니다.
+    생성된 SQL의 테이블/컬럼 이름을 데이터베이스에 묻지 않고 확인하는 데 사용합니다.
+    MySQL은 컬럼 이름의 대소문자를 구분하지 않으므로 소문자로 비교합니다.
+    """
+
+    def __init__(self, tables: Dict[str, List[str]] | None = None):
+        self.tables = tables or {}
+        self._lower = {key.lower(): key for key in self.tables}
+        self._columns = {
+            key.lower(): {column.lower() for column in columns}
+            for key, columns in self.tables.items()
+        }
+
+    def __len__(self) -> int:
+        return len(self.tables)
+
+    def resolve(self, db_name: str, table_name: str) -> str | None:
+        """테이블의 key("DB.테이블")를 반환합니다. 없으면 None을 반환합니다."""
+        return self._lower.get(f"{db_name}.{table_name}".lower())
+
+    def tables_named(self, table_name: str) -> List[str]:
+        """이름이 같은 테이블의 key를 모든 데이터베이스에서 찾습니다."""
+        suffix = f".{table_name}".lower()
+        return [key for lower, key in self._lower.items() if lower.endswith(suffix)]
+
+    def has_column(self, table_key: str, column_name: str) -> bool:
+        return column_name.lower() in self._columns[table_key.lower()]
+
+    def columns(self, table_key: str) -> List[str]:
+        return self.tables[table_key]
+
+    def save(self, folder_path: str) -> None:
+        with open(
+            os.path.join(folder_path, SCHEMA_CATALOG_FILE), "w", encoding="utf-8"
+        ) as f:
+            json.dump(self.tables, f, ensure_ascii=False)
+
+    @classmethod
+    def load(cls, folder_path: str) -> "SchemaCatalog":
+        path = os.path.join(folder_path, SCHEMA_CATALOG_FILE)
+        if not os.path.exists(path):
+            return cls()
+        with open(path, "r", encoding="utf-8") as f:
+            return cls(json.load(f))
+
+
+def build_schema_catalog(documents: Iterable[Document]) -> SchemaCatalog:
+    """테이블 문서들의 메타데이터로 스키마 카탈로그를 만듭니다."""
+    tables = {}
+    for doc in documents:
+        columns = doc.metadata.get("columns")
+        if columns is None:
+            # 컬럼 정보가 없는 이전 형식의 문서는 카탈로그에 넣지 않는다.
+            continue
+        key = f"{doc.metadata['db']}.{doc.metadata['table']}"
+        tables[key] = [column["name"] for column in columns]
+    return SchemaCatalog(tables)
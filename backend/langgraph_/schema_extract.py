@@ -0,0 +1,193 @@
+import os
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Dict, Tuple
+
+from sqlalchemy import MetaData, Table
+from sqlalchemy.engine import Engine
+from sqlalchemy.schema import CreateTable, CreateColumn
+from sqlalchemy.types import NullType
+
+from .db_engine import BatchEngines
+
+
+def get_max_workers() -> int:
+    """스키마 추출에 사용할 스레드 수. SCHEMA_EXTRACT_WORKERS 환경변수로 조절할 수 있습니다."""
+    default = min(32, (os.cpu_count() or 1) * 4)
+    return int(os.getenv("SCHEMA_EXTRACT_WORKERS", default))
+
+
+def format_sample_rows(
+    table_name: str,
+    column_names: List[str],
+    sample_rows: List[List[str]],
+    sample_info: int,
+) -> str:
+    """샘플 행을 LangChain SQLDatabase의 샘플 행 형식과 동일한 문자열로 만듭니다."""
+    columns_str = "\t".join(column_names)
+    sample_rows_str = "\n".join(["\t".join(row) for row in sample_rows])
+    return (
+        f"{sample_info} rows from {table_name} table:\n"
+        f"{columns_str}\n"
+        f"{sample_rows_str}"
+    )
+
+
+def split_create_table(
+    table_schema: str, column_ddls: List[str]
+) -> Tuple[str, List[str], str]:
+    """
+    CREATE TABLE 문을 머리("CREATE TABLE t ("), 제약조건 목록, 꼬리(")ENGINE=..." 등)로 나눕니다.
+    컬럼 정의 줄은 column_ddls로 따로 저장하므로 제약조건 목록에서 제외합니다.
+    """
+    start = table_schema.index("(\n\t") + 1
+    end = table_schema.rindex("\n)")
+    items = table_schema[start:end].strip().split(", \n\t")
+    constraints = [item for item in items if item not in set(column_ddls)]
+    return table_schema[:start].strip(), constraints, table_schema[end:].strip()
+
+
+def attach_sample_rows(
+    metadata: Dict,
+    table_schema: str,
+    sample_columns: List[str],
+    sample_rows: List[List[str]],
+    sample_info: int,
+) -> Dict:
+    """
+    샘플 행을 테이블 메타데이터의 컬럼별 샘플 값과 전체 context에 반영합니다.
+    스키마는 그대로이고 데이터만 바뀐 테이블은 reflection 없이 이 함수로 샘플만 교체합니다.
+
+    Args:
+        metadata: extract_table_doc이 만든 테이블 메타데이터
+        table_schema: 테이블의 CREATE TABLE 문 (문서의 page_content)
+        sample_columns: 샘플 행의 컬럼 이름 목록
+        sample_rows: 샘플 행 목록
+
+    Returns:
+        Dict: 샘플이 반영된 메타데이터
+    """
+    positions = {name: idx for idx, name in enumerate(sample_columns)}
+    for column in metadata["columns"]:
+        idx = positions.get(column["name"])
+        column["samples"] = [row[idx] for row in sample_rows] if idx is not None else []
+
+    table_context = table_schema
+    if sample_info > 0:
+        column_names = [column["name"] for column in metadata["columns"]]
+        rows = [
+            [row[positions[name]] if name in positions else "" for name in column_names]
+            for row in sample_rows
+        ]
+        sample_rows_str = format_sample_rows(
+            metadata["table"], column_names, rows, sample_info
+        )
+        table_context += f"\n\n/*\n{sample_rows_str}\n*/"
+
+    metadata["context"] = f"DB:{metadata['db']}\nDDL:{table_context}"
+    metadata["sample_info"] = sample_info
+    return metadata
+
+
+def extract_table_doc(
+    engine: Engine,
+    db_name: str,
+    table_name: str,
+    sample_info: int,
+    samples: Tuple[List[str], List[List[str]]] = ([], []),
+) -> Tuple[str, Dict, str]:
+    """
+    테이블을 한 번만 reflection 하여 임베딩할 DDL과 샘플 행이 포함된 메타데이터를 함께 만듭니다.
+    메타데이터에는 전체 context 외에도 질문에 맞춰 DDL을 줄일 수 있도록
+    컬럼별 정의, 키 정보, 샘플 값을 함께 저장합니다.
+
+    Args:
+        samples: 샘플 행 저장소에서 가져온 (컬럼 이름 목록, 샘플 행 목록)
+
+    Returns:
+        Tuple[str, Dict, str]: (임베딩할 DDL, 메타데이터, 문서 id)
+    """
+    table = Table(table_name, MetaData(), autoload_with=engine)
+
+    # 타입을 알 수 없는 컬럼은 DDL 생성이 불가능하므로 제외
+    for column in list(table.columns):
+        if type(column.type) is NullType:
+            table._columns.remove(column)
+
+    table_schema = str(CreateTable(table).compile(engine)).rstrip()
+    columns = [
+        {
+            "name": column.name,
+            "ddl": str(CreateColumn(column).compile(engine)),
+            "comment": column.comment or "",
+            "key": (
+                "PRI" if column.primary_key else ("FOR" if column.foreign_keys else "")
+            ),
+        }
+        for column in table.columns
+    ]
+    ddl_header, constraints, ddl_footer = split_create_table(
+        table_schema, [column["ddl"] for column in columns]
+    )
+
+    metadata = {
+        "db": db_name,
+        "table": table_name,
+        "columns": columns,
+        "constraints": constraints,
+        "ddl_header": ddl_header,
+        "ddl_footer": ddl_footer,
+    }
+    attach_sample_rows(metadata, table_schema, *samples, sample_info)
+    return table_schema, metadata, f"{db_name}.{table_name}"
+
+
+def extract_table_docs(
+    DB_SERVER: str,
+    tables_by_db: Dict[str, List[str]],
+    sample_info: int,
+    samples: Dict[str, Tuple[List[str], List[List[str]]]],
+) -> Tuple[List[str], List[Dict], List[str]]:
+    """
+    여러 데이터베이스의 테이블들에 대해 임베딩할 DDL과 메타데이터를 추출합니다.
+    데이터베이스와 테이블을 제한된 크기의 스레드 풀에서 동시에 처리하며,
+    데이터베이스마다 하나의 커넥션 풀 엔진을 공유하고, 그 데이터베이스의 테이블을 모두 처리하면 바로 정리합니다.
+
+    Args:
+        DB_SERVER: 데이터베이스 서버 경로
+        tables_by_db: 데이터베이스 이름을 key로 하는 테이블 이름 목록
+        sample_info: 각 테이블에서 샘플링할 행 수
+        samples: 샘플 행 저장소에서 가져온 "DB.테이블" -> (컬럼 이름 목록, 샘플 행 목록)
+
+    Returns:
+        Tuple[List[str], List[Dict], List[str]]: (임베딩할 DDL, 메타데이터, 문서 id) 리스트
+    """
+    texts, metadatas, ids = [], [], []
+    if not tables_by_db:
+        return texts, metadatas, ids
+
+    max_workers = get_max_workers()
+    with (
+        BatchEngines(DB_SERVER, tables_by_db, max_workers) as engines,
+        ThreadPoolExecutor(max_workers=max_workers) as executor,
+    ):
+        futures = [
+            executor.submit(
+                engines.run,
+                db_name,
+                extract_table_doc,
+                db_name,
+                table_name,
+                sample_info,
+                samples.get(f"{db_name}.{table_name}", ([], [])),
+            )
+            for db_name, table_names in tables_by_db.items()
+            for table_name in table_names
+        ]
+        # 제출 순서대로 결과를 모아 문서 순서를 유지
+        for future in futures:
+            text, metadata, doc_id = future.result()
+            texts.append(text)
+            metadatas.append(metadata)
+            ids.append(doc_id)
+
+    return texts, metadatas, ids
@@ -0,0 +1,141 @@
+import os
+import json
+import hashlib
+from datetime import datetime
+from typing import List, Dict, Tuple
+
+import pandas as pd
+from sqlalchemy import text, bindparam
+
+MANIFEST_FILE = "manifest.json"
+
+
+def get_table_states(engine, db_names: List[str]) -> Dict[str, Dict[str, str | None]]:
+    """
+    INFORMATION_SCHEMA에서 테이블별 변경 감지 정보를 조회합니다.
+    컬럼 정의로 만든 DDL 지문(fingerprint)과 TABLES.CREATE_TIME/UPDATE_TIME을 함께 사용합니다.
+
+    Args:
+        engine: INFORMATION_SCHEMA에 연결된 SQLAlchemy 엔진 인스턴스
+        db_names: 데이터베이스 이름 목록
+
+    Returns:
+        Dict[str, Dict]: "DB.테이블" 을 key로 하는 테이블 상태 딕셔너리
+    """
+    if not db_names:
+        return {}
+
+    tables_query = text("""
+        SELECT TABLE_SCHEMA AS db, TABLE_NAME AS tbl, CREATE_TIME, UPDATE_TIME
+        FROM TABLES
+        WHERE TABLE_SCHEMA IN :db_names AND TABLE_TYPE = 'BASE TABLE';
+        """).bindparams(bindparam("db_names", expanding=True))
+
+    columns_query = text("""
+        SELECT TABLE_SCHEMA AS db, TABLE_NAME AS tbl, COLUMN_NAME, COLUMN_TYPE,
+               IS_NULLABLE, COLUMN_KEY, COLUMN_DEFAULT, EXTRA, COLUMN_COMMENT
+        FROM COLUMNS
+        WHERE TABLE_SCHEMA IN :db_names
+        ORDER BY TABLE_SCHEMA, TABLE_NAME, ORDINAL_POSITION;
+        """).bindparams(bindparam("db_names", expanding=True))
+
+    tables_df = pd.read_sql(tables_query, engine, params={"db_names": db_names})
+    columns_df = pd.read_sql(columns_query, engine, params={"db_names": db_names})
+
+    # 컬럼 정의를 순서대로 이어 붙여 테이블별 DDL 지문 생성
+    fingerprints = {}
+    for (db, tbl), group in columns_df.groupby(["db", "tbl"], sort=False):
+        column_defs = "\n".join(
+            "|".join("" if pd.isna(v) else str(v) for v in row[2:])
+            for row in group.itertuples(index=False)
+        )
+        fingerprints[f"{db}.{tbl}"] = hashlib.sha1(
+            column_defs.encode("utf-8")
+        ).hexdigest()
+
+    def to_str(value) -> str | None:
+        return None if pd.isna(value) else str(value)
+
+    table_states = {}
+    for row in tables_df.itertuples(index=False):
+        key = f"{row.db}.{row.tbl}"
+        table_states[key] = {
+            "db": row.db,
+            "table": row.tbl,
+            "fingerprint": fingerprints.get(key),
+            "create_time": to_str(row.CREATE_TIME),
+            "update_time": to_str(row.UPDATE_TIME),
+        }
+
+    return table_states
+
+
+def load_manifest(local_path: str) -> Dict | None:
+    """로컬 인덱스 폴더에 저장된 manifest를 불러옵니다. 없으면 None을 반환합니다."""
+    manifest_path = os.path.join(local_path, MANIFEST_FILE)
+    if not os.path.exists(manifest_path):
+        return None
+    with open(manifest_path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def save_manifest(
+    local_path: str,
+    table_states: Dict[str, Dict],
+    index_format: str,
+    index_config: Dict | None = None,
+) -> None:
+    """테이블 상태를 인덱스 저장 형식, 인덱스를 만든 설정(임베딩 모델, ANN 인덱스 종류 등)과 함께 manifest로 저장합니다."""
+    manifest = {
+        "format": index_format,
+        "index_config": index_config or {},
+        "updated_at": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+        "tables": table_states,
+    }
+    with open(os.path.join(local_path, MANIFEST_FILE), "w", encoding="utf-8") as f:
+        json.dump(manifest, f, ensure_ascii=False, indent=2)
+
+
+def diff_table_states(
+    manifest_tables: Dict[str, Dict], table_states: Dict[str, Dict]
+) -> Tuple[List[str], List[str], List[str]]:
+    """
+    manifest에 기록된 테이블 상태와 현재 테이블 상태를 비교합니다.
+    데이터만 바뀐 경우(UPDATE_TIME)는 스키마 변경으로 보지 않습니다. 샘플 행은 SampleRowStore가 따로 갱신합니다.
+
+    Returns:
+        Tuple[List[str], List[str], List[str]]: (새로 생긴 테이블, 스키마가 변경된 테이블, 삭제된 테이블)
+    """
+    compare_keys = ("fingerprint", "create_time")
+
+    added = [key for key in table_states if key not in manifest_tables]
+    changed = [
+        key
+        for key, state in table_states.items()
+        if key in manifest_tables
+        and any(state[k] != manifest_tables[key].get(k) for k in compare_keys)
+    ]
+    dropped = [key for key in manifest_tables if key not in table_states]
+
+    return added, changed, dropped
+
+
+def schema_fingerprint(table_states: Dict[str, Dict]) -> str:
+    """
+    전체 테이블의 스키마(DDL 지문, CREATE_TIME)로 스키마 버전 문자열을 만듭니다.
+    데이터만 바뀐 경우(UPDATE_TIME, 샘플 행)에는 바뀌지 않습니다.
+    """
+    schema = "\n".join(
+        f"{key}|{state.get('fingerprint')}|{state.get('create_time')}"
+        for key, state in sorted(table_states.items())
+    )
+    return hashlib.sha1(schema.encode("utf-8")).hexdigest()
+
+
+def group_by_db(keys: List[str], table_states: Dict[str, Dict]) -> Dict[str, List[str]]:
+    """DB.테이블 형태의 key 목록을 데이터베이스별 테이블 이름 목록으로 묶습니다."""
+    grouped: Dict[str, List[str]] = {}
+    for key in keys:
+        state = table_states[key]
+        grouped.setdefault(state["db"], []).append(state["table"])
+    return grouped
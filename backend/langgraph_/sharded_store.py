@@ -0,0 +1,294 @@
+import os
+import json
+from typing import List, Dict, Tuple, Iterator
+
+import faiss
+import numpy as np
+from langchain_core.documents import Document
+from langchain_core.embeddings import Embeddings
+from langchain_community.vectorstores import FAISS
+from langchain_community.vectorstores.utils import DistanceStrategy
+
+from .ann_index import build_search_index, get_index_config, set_search_params
+from .mmap_index import MmapFlatIndex
+from .docstore import (
+    DOCSTORE_FILE,
+    SqliteDocstore,
+    write_docstore,
+    read_index_to_docstore_id,
+    read_in_memory_docstore,
+)
+
+SHARDS_DIR = "shards"
+INDEX_FILE = "index.faiss"  # 증분 갱신의 기준이 되는 flat 인덱스
+# 검색 전용으로 불러올 때 메모리 매핑하는 flat 인덱스의 벡터
+VECTORS_FILE = "vectors.npy"
+CENTROID_FILE = "centroid.npy"
+SEARCH_INDEX_FILE = "search.faiss"  # 설정된 종류(IVF/HNSW/PQ)로 학습된 검색용 인덱스
+
+
+def get_department_databases() -> Dict[str, List[str]]:
+    """
+    부서별로 검색할 데이터베이스 목록을 DEPARTMENT_DATABASES 환경변수(JSON)에서 읽어옵니다.
+    예: '{"accounting": ["acc_db", "common_db"], "cs": ["cs_db", "common_db"]}'
+    목록에 없는 부서(common 등)는 모든 데이터베이스를 검색합니다.
+    """
+    return json.loads(os.getenv("DEPARTMENT_DATABASES", "{}"))
+
+
+class ShardedVectorStore:
+    """데이터베이스마다 하나의 FAISS 인덱스(shard)를 두는 벡터 스토어입니다.
+    질문 임베딩과 shard 중심 벡터(centroid)의 유사도, 사용자 부서를 기준으로 검색할 shard를 고른 뒤
+    선택된 shard들의 결과를 하나의 top-k로 합칩니다.
+    """
+
+    def __init__(
+        self,
+        shards: Dict[str, FAISS],
+        embedding_function: Embeddings,
+        centroids: Dict[str, np.ndarray] | None = None,
+    ):
+        self.shards = shards
+        self.embedding_function = embedding_function
+        self.centroids: Dict[str, np.ndarray] = dict(centroids or {})
+        # 문서 id -> 문서가 저장된 shard(metadata["db"]).
+        # 데이터베이스 이름에 점이 있을 수 있으므로 id("DB.테이블")를 나누어 shard를 찾지 않는다.
+        self.doc_dbs: Dict[str, str] = {
+            doc_id: db_name
+            for db_name, shard in shards.items()
+            for doc_id in shard.index_to_docstore_id.values()
+        }
+        for db_name in shards:
+            if db_name not in self.centroids:
+                self._update_centroid(db_name)
+
+    def _update_centroid(self, db_name: str) -> None:
+        if db_name not in self.shards or self.shards[db_name].index.ntotal == 0:
+            self.centroids.pop(db_name, None)
+            return
+        index = self.shards[db_name].index
+        vectors = index.reconstruct_n(0, index.ntotal)
+        centroid = vectors.mean(axis=0)
+        self.centroids[db_name] = centroid / (np.linalg.norm(centroid) or 1.0)
+
+    def iter_documents(self) -> Iterator[Document]:
+        for shard in self.shards.values():
+            for doc_id in shard.index_to_docstore_id.values():
+                yield shard.docstore.search(doc_id)  # type: ignore
+
+    def get_documents(self, ids: List[str]) -> List[Document]:
+        """문서 id("DB.테이블")로 문서를 가져옵니다. 존재하지 않는 id는 건너뜁니다."""
+        documents = []
+        for doc_id in ids:
+            shard = self.shards.get(self.doc_dbs.get(doc_id, ""))
+            if shard is None:
+                continue
+            doc = shard.docstore.search(doc_id)
+            if isinstance(doc, Document):
+                documents.append(doc)
+        return documents
+
+    def update_documents(self, documents: List[Document]) -> None:
+        """벡터는 그대로 두고 문서 내용(메타데이터)만 교체합니다.
+        증분 갱신을 위해 메모리로 불러온(search_only=False) 경우에만 사용할 수 있습니다.
+        """
+        for doc in documents:
+            doc_id = f"{doc.metadata['db']}.{doc.metadata['table']}"
+            shard = self.shards.get(doc.metadata["db"])
+            if shard is None or not isinstance(shard.docstore.search(doc_id), Document):
+                continue
+            shard.docstore.delete([doc_id])  # type: ignore
+            shard.docstore.add({doc_id: doc})  # type: ignore
+
+    def route(
+        self,
+        query_vector: List[float],
+        department: str | None = None,
+        top_n: int | None = None,
+    ) -> List[str]:
+        """
+        질문과 사용자 부서를 기준으로 검색할 shard(데이터베이스)를 고릅니다.
+
+        Args:
+            query_vector: 질문 임베딩
+            department: 사용자 부서
+            top_n: 선택할 최대 shard 수. 기본값은 SHARD_ROUTE_TOP 환경변수(기본 3)
+
+        Returns:
+            List[str]: 검색할 데이터베이스 이름 목록
+        """
+        top_n = top_n or int(os.getenv("SHARD_ROUTE_TOP", 3))
+        candidates = list(self.centroids)
+
+        # 부서에 허용된 데이터베이스만 검색
+        allowed = get_department_databases().get(department or "")
+        if allowed is not None:
+            candidates = [db_name for db_name in candidates if db_name in allowed]
+
+        if len(candidates) <= top_n:
+            return candidates
+
+        query = np.asarray(query_vector, dtype=np.float32)
+        query = query / (np.linalg.norm(query) or 1.0)
+        scores = {
+            db_name: float(self.centroids[db_name] @ query) for db_name in candidates
+        }
+        return sorted(candidates, key=scores.get, reverse=True)[:top_n]  # type: ignore
+
+    def similarity_search(
+        self, query: str, k: int = 4, department: str | None = None
+    ) -> List[Document]:
+        query_vector = self.embedding_function.embed_query(query)
+        return self.similarity_search_by_vector(query_vector, k, department)
+
+    def similarity_search_by_vector(
+        self, query_vector: List[float], k: int = 4, department: str | None = None
+    ) -> List[Document]:
+        results: List[Tuple[Document, float]] = []
+        for db_name in self.route(query_vector, department):
+            results.extend(
+                self.shards[db_name].similarity_search_with_score_by_vector(
+                    query_vector, k=k
+                )
+            )
+        # 모든 shard가 같은 임베딩 공간을 쓰므로 거리 값으로 바로 합칠 수 있다.
+        results.sort(key=lambda pair: pair[1])
+        return [doc for doc, _ in results[:k]]
+
+    def add_texts(
+        self, texts: List[str], metadatas: List[Dict], ids: List[str]
+    ) -> None:
+        grouped: Dict[str, Tuple[List[str], List[Dict], List[str]]] = {}
+        for text, metadata, doc_id in zip(texts, metadatas, ids):
+            group = grouped.setdefault(metadata["db"], ([], [], []))
+            group[0].append(text)
+            group[1].append(metadata)
+            group[2].append(doc_id)
+
+        for db_name, (db_texts, db_metadatas, db_ids) in grouped.items():
+            self.doc_dbs.update(dict.fromkeys(db_ids, db_name))
+            if db_name in self.shards:
+                self.shards[db_name].add_texts(
+                    texts=db_texts, metadatas=db_metadatas, ids=db_ids
+                )
+            else:
+                self.shards[db_name] = FAISS.from_texts(
+                    texts=db_texts,
+                    embedding=self.embedding_function,
+                    metadatas=db_metadatas,
+                    ids=db_ids,
+                    distance_strategy=DistanceStrategy.COSINE,
+                )
+            self._update_centroid(db_name)
+
+    def delete(self, ids: List[str]) -> None:
+        # 문서가 저장된 shard(metadata["db"])별로 나누어 삭제
+        grouped: Dict[str, List[str]] = {}
+        for doc_id in ids:
+            db_name = self.doc_dbs.pop(doc_id, None)
+            if db_name is not None:
+                grouped.setdefault(db_name, []).append(doc_id)
+
+        for db_name, db_ids in grouped.items():
+            shard = self.shards.get(db_name)
+            if shard is None:
+                continue
+            stored_ids = set(shard.index_to_docstore_id.values())
+            db_ids = [doc_id for doc_id in db_ids if doc_id in stored_ids]
+            if db_ids:
+                shard.delete(ids=db_ids)
+            if shard.index.ntotal == 0:
+                del self.shards[db_name]
+            self._update_centroid(db_name)
+
+    def save_local(self, folder_path: str) -> None:
+        """
+        shard마다 원본 flat 인덱스(증분 갱신용)와 그 벡터(.npy, 검색용), sqlite docstore, 중심 벡터를 저장하고,
+        FAISS_INDEX_TYPE이 설정된 경우 학습된 검색용 ANN 인덱스를 함께 저장합니다.
+        docstore는 pickle이 아닌 sqlite로 저장하여 불러올 때 역직렬화가 필요 없습니다.
+        """
+        for db_name, shard in self.shards.items():
+            shard_path = os.path.join(folder_path, SHARDS_DIR, db_name)
+            os.makedirs(shard_path, exist_ok=True)
+            faiss.write_index(shard.index, os.path.join(shard_path, INDEX_FILE))
+            np.save(
+                os.path.join(shard_path, VECTORS_FILE),
+                shard.index.reconstruct_n(0, shard.index.ntotal),
+            )
+            write_docstore(
+                os.path.join(shard_path, DOCSTORE_FILE),
+                shard.docstore,
+                shard.index_to_docstore_id,
+            )
+            np.save(os.path.join(shard_path, CENTROID_FILE), self.centroids[db_name])
+
+            search_index = build_search_index(shard.index)
+            if search_index is not None:
+                faiss.write_index(
+                    search_index, os.path.join(shard_path, SEARCH_INDEX_FILE)
+                )
+
+    @classmethod
+    def from_texts(
+        cls,
+        texts: List[str],
+        embedding: Embeddings,
+        metadatas: List[Dict],
+        ids: List[str],
+    ) -> "ShardedVectorStore":
+        store = cls({}, embedding)
+        store.add_texts(texts=texts, metadatas=metadatas, ids=ids)
+        return store
+
+    @classmethod
+    def load_local(
+        cls, folder_path: str, embeddings: Embeddings, search_only: bool = False
+    ) -> "ShardedVectorStore":
+        """
+        저장된 shard들을 불러옵니다.
+
+        Args:
+            folder_path: 인덱스 버전 폴더 경로
+            embeddings: 임베딩 객체
+            search_only: True이면 검색 전용으로 불러옵니다.
+                flat 벡터는 .npy를 메모리 매핑(mmap)하고, 문서는 sqlite에서 id로 필요할 때만 읽으므로
+                거의 즉시 불러와지며 여러 워커가 OS 페이지를 공유합니다.
+                검색용 ANN 인덱스가 있는 shard는 그것을 사용하며, faiss는 IVF/HNSW/PQ 인덱스를
+                메모리 매핑하지 못하므로 ANN 인덱스는 워커마다 메모리로 읽습니다.
+                False이면 증분 갱신을 위해 인덱스와 문서를 모두 메모리로 불러옵니다.
+        """
+        config = get_index_config()
+        shards_path = os.path.join(folder_path, SHARDS_DIR)
+        shards, centroids = {}, {}
+        for db_name in sorted(os.listdir(shards_path)):
+            shard_path = os.path.join(shards_path, db_name)
+            docstore_path = os.path.join(shard_path, DOCSTORE_FILE)
+            index_path = os.path.join(shard_path, INDEX_FILE)
+            search_index_path = os.path.join(shard_path, SEARCH_INDEX_FILE)
+
+            if search_only and os.path.exists(search_index_path):
+                # ANN 인덱스도 flat 인덱스와 같은 순서로 벡터를 추가했으므로 id 매핑을 그대로 쓴다.
+                index = faiss.read_index(search_index_path)
+                set_search_params(index, **config)
+                docstore = SqliteDocstore(docstore_path)
+            elif search_only:
+                index = MmapFlatIndex.load(os.path.join(shard_path, VECTORS_FILE))
+                docstore = SqliteDocstore(docstore_path)
+            else:
+                index = faiss.read_index(index_path)
+                docstore = read_in_memory_docstore(docstore_path)
+
+            shard = FAISS(
+                embedding_function=embeddings,
+                index=index,
+                docstore=docstore,
+                index_to_docstore_id=read_index_to_docstore_id(docstore_path),
+                distance_strategy=DistanceStrategy.COSINE,
+            )
+
+            centroid_path = os.path.join(shard_path, CENTROID_FILE)
+            if os.path.exists(centroid_path):
+                centroids[db_name] = np.load(centroid_path)
+
+            shards[db_name] = shard
+        return cls(shards, embeddings, centroids)
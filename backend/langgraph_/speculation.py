@@ -0,0 +1,248 @@
+import os
+import time
+import asyncio
+import inspect
+import threading
+import contextvars
+from collections import Counter, deque
+from concurrent.futures import Future, ThreadPoolExecutor
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Dict, Any, Callable, Hashable, Iterator, List
+
+from .utils import str2bool
+
+# 최근 그래프 실행의 노드별 소요 시간을 몇 개까지 보관할지
+RUN_HISTORY_SIZE = 20
+
+
+def get_speculation_config() -> Dict[str, Any]:
+    """
+    환경변수에서 추측 실행 설정을 읽어옵니다.
+
+    - SPECULATIVE_EXECUTION: 질문 평가와 동시에 질문 분석을 미리 시작할지 여부
+    - SPECULATION_WORKERS: 추측 실행에 사용할 스레드 수 (프로세스 전체 공유)
+    """
+    return {
+        "enabled": str2bool(os.getenv("SPECULATIVE_EXECUTION", "true")),
+        "workers": int(os.getenv("SPECULATION_WORKERS", 8)),
+    }
+
+
+class SpeculativeRun:
+    """그래프 실행 한 번 동안 미리 시작한 작업과 노드별 소요 시간입니다."""
+
+    def __init__(self, run_id: str):
+        self.run_id = run_id
+        self._lock = threading.Lock()
+        # key -> (Future 또는 asyncio.Task, 시작 시각)
+        self.futures: Dict[Hashable, tuple[Future | asyncio.Task, float]] = {}
+        self.counts: Counter = Counter()  # started, used, discarded, failed
+        self.saved_ms = 0.0  # 미리 실행해서 줄어든 대기 시간
+        self.node_timings: List[tuple[str, float]] = []  # (노드, ms) 실행 순서대로
+
+    def discard(self) -> None:
+        """아직 사용하지 않은 작업을 버립니다. 시작 전이면 취소하고, 실행 중이면 결과만 버립니다."""
+        with self._lock:
+            futures, self.futures = self.futures, {}
+        # asyncio 작업은 취소하면 진행 중인 LLM 호출도 중단된다.
+        for future, _ in futures.values():
+            future.cancel()
+        self.counts["discarded"] += len(futures)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "run_id": self.run_id,
+            **{
+                key: self.counts[key]
+                for key in ("started", "used", "discarded", "failed")
+            },
+            "saved_ms": round(self.saved_ms, 1),
+            "node_ms": [(node, round(ms, 1)) for node, ms in self.node_timings],
+            "total_ms": round(sum(ms for _, ms in self.node_timings), 1),
+        }
+
+
+_current_run: ContextVar[SpeculativeRun | None] = ContextVar(
+    "speculative_run", default=None
+)
+_history: deque = deque(maxlen=RUN_HISTORY_SIZE)
+_totals: Counter = Counter()
+_node_totals: Dict[str, List[float]] = {}  # 노드 -> [실행 횟수, 누적 ms]
+_stats_lock = threading.Lock()
+_executor: ThreadPoolExecutor | None = None
+_executor_lock = threading.Lock()
+
+
+def get_speculation_executor() -> ThreadPoolExecutor:
+    global _executor
+    if _executor is None:
+        with _executor_lock:
+            if _executor is None:
+                _executor = ThreadPoolExecutor(
+                    max_workers=get_speculation_config()["workers"],
+                    thread_name_prefix="speculation",
+                )
+    return _executor
+
+
+@contextmanager
+def speculative_run(run_id: str) -> Iterator[SpeculativeRun]:
+    """
+    그래프 실행 한 번을 감싸 추측 실행 범위를 정합니다.
+    실행이 끝날 때 사용하지 않은 작업은 버립니다.
+    """
+    run = SpeculativeRun(run_id)
+    token = _current_run.set(run)
+    try:
+        yield run
+    finally:
+        _current_run.reset(token)
+        run.discard()
+        with _stats_lock:
+            _totals.update(run.counts)
+            _totals["saved_ms"] += run.saved_ms
+            for node, ms in run.node_timings:
+                totals = _node_totals.setdefault(node, [0, 0.0])
+                totals[0] += 1
+                totals[1] += ms
+            _history.append(run.stats())
+
+
+def speculate(key: Hashable, func: Callable, *args, **kwargs) -> bool:
+    """
+    결과가 필요할지 아직 모르는 작업을 백그라운드에서 미리 시작합니다.
+    현재 contextvars를 그대로 넘기므로 LLM 호출 memo와 호출 횟수는 같은 그래프 실행에 기록됩니다.
+
+    Args:
+        key: 작업을 찾을 key. 작업의 입력을 모두 포함해야 claim에서 잘못된 결과를 가져오지 않는다.
+
+    Returns:
+        bool: 작업을 시작했는지 여부 (꺼져 있거나 그래프 실행 밖이면 False)
+    """
+    run = _current_run.get()
+    if run is None or not get_speculation_config()["enabled"]:
+        return False
+
+    future: Future | asyncio.Task
+    if inspect.iscoroutinefunction(func):
+        # 비동기 그래프: 스레드 대신 이벤트 루프의 작업으로 실행 (contextvars는 자동으로 복사됨)
+        async def atask():
+            return await func(*args, **kwargs), time.perf_counter()
+
+        future = asyncio.ensure_future(atask())
+    else:
+
+        def task():
+            return func(*args, **kwargs), time.perf_counter()
+
+        context = contextvars.copy_context()
+        future = get_speculation_executor().submit(context.run, task)
+    with run._lock:
+        run.futures[key] = (future, time.perf_counter())
+    run.counts["started"] += 1
+    return True
+
+
+def _take(key: Hashable) -> tuple[SpeculativeRun, Future | asyncio.Task, float] | None:
+    run = _current_run.get()
+    if run is None:
+        return None
+    with run._lock:
+        entry = run.futures.pop(key, None)
+    return None if entry is None else (run, *entry)
+
+
+def _failed(run: SpeculativeRun, key: Hashable, error: Exception) -> None:
+    print(f"추측 실행 실패 ({key}): {error}")
+    run.counts["failed"] += 1
+
+
+def _used(run: SpeculativeRun, started: float, waiting: float, outcome) -> Any:
+    result, finished = outcome
+    run.counts["used"] += 1
+    # 작업 시간 중 노드가 기다리기 전에 이미 진행된 부분만큼 임계 경로가 줄어든다.
+    run.saved_ms += (min(waiting, finished) - started) * 1000
+    return result
+
+
+def claim(key: Hashable) -> Any | None:
+    """
+    미리 시작한 작업의 결과를 가져옵니다. 아직 실행 중이면 끝날 때까지 기다립니다.
+    작업이 없거나 실패했으면 None을 반환하며, 호출한 쪽에서 직접 실행합니다.
+    """
+    taken = _take(key)
+    if taken is None:
+        return None
+    run, future, started = taken
+    waiting = time.perf_counter()
+    try:
+        outcome = future.result()
+    except Exception as e:
+        return _failed(run, key, e)
+    return _used(run, started, waiting, outcome)
+
+
+async def aclaim(key: Hashable) -> Any | None:
+    """claim의 비동기 버전입니다. 비동기 그래프에서 미리 시작한 작업을 기다립니다."""
+    taken = _take(key)
+    if taken is None:
+        return None
+    run, future, started = taken
+    waiting = time.perf_counter()
+    try:
+        outcome = await future
+    except Exception as e:
+        return _failed(run, key, e)
+    return _used(run, started, waiting, outcome)
+
+
+def discard_speculation() -> None:
+    """질문이 일상 대화로 판단되는 등 미리 시작한 작업이 필요 없어졌을 때 버립니다."""
+    run = _current_run.get()
+    if run is not None:
+        run.discard()
+
+
+def timed_node(name: str, node: Callable) -> Callable:
+    """노드의 실행 시간을 현재 그래프 실행의 기록에 남기도록 감쌉니다. 비동기 노드도 지원합니다."""
+
+    def record(start: float) -> None:
+        run = _current_run.get()
+        if run is not None:
+            run.node_timings.append((name, (time.perf_counter() - start) * 1000))
+
+    if inspect.iscoroutinefunction(node):
+
+        async def async_wrapper(state):
+            start = time.perf_counter()
+            try:
+                return await node(state)
+            finally:
+                record(start)
+
+        return async_wrapper
+
+    def wrapper(state):
+        start = time.perf_counter()
+        try:
+            return node(state)
+        finally:
+            record(start)
+
+    return wrapper
+
+
+def get_speculation_stats() -> Dict[str, Any]:
+    """추측 실행 누적 횟수, 노드별 평균 소요 시간, 최근 그래프 실행별 기록을 반환합니다."""
+    with _stats_lock:
+        return {
+            "enabled": get_speculation_config()["enabled"],
+            **{key: _totals[key] for key in ("started", "used", "discarded", "failed")},
+            "saved_ms": round(_totals["saved_ms"], 1),
+            "node_avg_ms": {
+                node: round(total / count, 1)
+                for node, (count, total) in _node_totals.items()
+            },
+            "recent_runs": list(_history),
+        }
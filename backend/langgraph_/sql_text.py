@@ -0,0 +1,37 @@
+import re
+
+from sqlglot.dialects.mysql import MySQL
+
+# 문자열/식별자 리터럴 (대소문자와 공백을 그대로 유지)
+LITERAL_PATTERN = re.compile(
+    r"('(?:[^'\\]|\\.|'')*'|\"(?:[^\"\\]|\\.)*\"|`[^`]*`)", re.DOTALL
+)
+# 주석 (옵티마이저 힌트 /*+ ... */ 제외)
+COMMENT_PATTERN = re.compile(r"--[^\n]*|#[^\n]*|/\*(?!\+).*?\*/", re.DOTALL)
+# MySQL 키워드 (대소문자를 구분하지 않는 단어)
+SQL_KEYWORDS = frozenset(
+    word for keyword in MySQL.Tokenizer.KEYWORDS for word in keyword.split()
+)
+# 키워드와 괄호를 찾을 때 가릴 부분 (리터럴, 힌트를 포함한 모든 주석)
+MASK_PATTERN = re.compile(
+    rf"{LITERAL_PATTERN.pattern}|--[^\n]*|#[^\n]*|/\*.*?\*/", re.DOTALL
+)
+
+
+def mask_literals(sql_query: str) -> str:
+    """리터럴과 주석을 같은 길이의 공백으로 바꿉니다. (위치를 그대로 둔 채 키워드와 괄호만 찾기 위해)"""
+    return MASK_PATTERN.sub(lambda match: " " * len(match.group()), sql_query)
+
+
+def find_top_level_keyword(sql_query: str, keyword: str) -> int:
+    """괄호 밖(최상위)에서 처음 나오는 keyword의 위치를 반환합니다. 없으면 -1을 반환합니다."""
+    depth = 0
+    pattern = re.compile(rf"[()]|\b{keyword}\b", re.IGNORECASE)
+    for match in pattern.finditer(mask_literals(sql_query)):
+        if match.group() == "(":
+            depth += 1
+        elif match.group() == ")":
+            depth -= 1
+        elif depth == 0:
+            return match.start()
+    return -1
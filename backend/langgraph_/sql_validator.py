@@ -0,0 +1,225 @@
+import difflib
+import weakref
+from typing import List, Dict
+
+import sqlglot
+from sqlglot import exp
+from sqlglot.errors import ParseError, OptimizeError
+from sqlglot.optimizer.qualify import qualify
+from sqlglot.optimizer.scope import traverse_scope
+from sqlglot.schema import MappingSchema
+
+from .schema_catalog import SchemaCatalog
+from .utils import SqlValidationError
+
+# 카탈로그에 없는 시스템 데이터베이스 (검사하지 않음)
+SYSTEM_DATABASES = {"information_schema", "mysql", "performance_schema", "sys"}
+# MySQL은 컬럼(및 대부분의 환경에서 테이블) 이름의 대소문자를 구분하지 않으므로 소문자로 맞춰 해석한다.
+CHECK_DIALECT = "mysql, normalization_strategy=lowercase"
+
+# 카탈로그 -> sqlglot 스키마 (인덱스 버전마다 한 번만 만든다)
+_schemas: "weakref.WeakKeyDictionary[SchemaCatalog, MappingSchema]" = (
+    weakref.WeakKeyDictionary()
+)
+
+
+def suggest(name: str, candidates: List[str]) -> List[str]:
+    """이름이 비슷한 후보를 최대 3개 반환합니다."""
+    lowered = {candidate.lower(): candidate for candidate in candidates}
+    matches = difflib.get_close_matches(name.lower(), list(lowered), n=3, cutoff=0.6)
+    return [lowered[match] for match in matches]
+
+
+def issue(kind: str, message: str, suggestions: List[str] | None = None) -> Dict:
+    return {"kind": kind, "message": message, "suggestions": suggestions or []}
+
+
+def parse_sql(sql_query: str) -> exp.Expression:
+    """
+    MySQL 문법으로 SQL을 파싱합니다. 문장이 하나가 아니거나 파싱할 수 없으면 SqlValidationError를 발생시킵니다.
+    """
+    try:
+        statements = [
+            statement
+            for statement in sqlglot.parse(sql_query, read="mysql")
+            if statement is not None
+        ]
+    except ParseError as e:
+        raise SqlValidationError(
+            [
+                issue(
+                    "syntax",
+                    f"{error['description']} (line {error['line']}, column {error['col']}, "
+                    f"near '{error['highlight']}')",
+                )
+                for error in e.errors[:3]
+            ]
+        )
+    if len(statements) != 1:
+        raise SqlValidationError(
+            [issue("syntax", f"expected one statement, found {len(statements)}.")]
+        )
+    if isinstance(statements[0], exp.Command):
+        # sqlglot이 해석하지 못하고 그대로 넘긴 문장
+        raise SqlValidationError(
+            [issue("syntax", f"could not parse '{statements[0].sql()[:50]}'.")]
+        )
+    return statements[0]
+
+
+def catalog_schema(catalog: SchemaCatalog) -> MappingSchema:
+    """컬럼이 어느 테이블의 것인지 해석할 때 쓰는 sqlglot 스키마입니다. (컬럼 타입은 알 수 없으므로 TEXT)"""
+    schema = _schemas.get(catalog)
+    if schema is None:
+        nested: Dict[str, Dict[str, Dict[str, str]]] = {}
+        for key, columns in catalog.tables.items():
+            db_name, table_name = key.split(".", 1)
+            nested.setdefault(db_name, {})[table_name] = {
+                column: "TEXT" for column in columns
+            }
+        schema = MappingSchema(nested, dialect=CHECK_DIALECT)
+        _schemas[catalog] = schema
+    return schema
+
+
+def qualify_columns(tree: exp.Expression, catalog: SchemaCatalog) -> exp.Expression:
+    """
+    각 컬럼에 그 컬럼이 속한 범위의 테이블 별칭을 붙인 복사본을 반환합니다.
+    서브쿼리 안의 컬럼은 서브쿼리의 테이블로, 상관 서브쿼리에서 바깥 테이블을 가리키는 컬럼은 바깥 테이블로 해석되며,
+    어느 테이블에서도 찾을 수 없는 컬럼은 그대로 둡니다.
+    """
+    return qualify(
+        tree.copy(),
+        schema=catalog_schema(catalog),
+        dialect=CHECK_DIALECT,
+        expand_stars=False,
+        validate_qualify_columns=False,
+        quote_identifiers=False,
+        identify=False,
+    )
+
+
+def check_identifiers(tree: exp.Expression, catalog: SchemaCatalog) -> List[Dict]:
+    """
+    쿼리의 테이블/컬럼 이름을 스키마 카탈로그와 비교합니다.
+    컬럼은 그 컬럼이 속한 범위(서브쿼리/CTE 포함)의 테이블과만 비교하며,
+    서브쿼리/CTE에서 나온 컬럼처럼 카탈로그로 확인할 수 없는 이름은 검사하지 않습니다.
+    """
+    issues: List[Dict] = []
+    try:
+        tree = qualify_columns(tree, catalog)
+        qualified = True
+    except OptimizeError:
+        # 테이블 별칭이 붙은 컬럼 중 없는 컬럼이 있으면 해석이 중단된다. 이때는 별칭이 붙은 컬럼만 검사한다.
+        qualified = False
+    try:
+        scopes = traverse_scope(tree)
+    except OptimizeError:
+        # 범위를 해석할 수 없는 쿼리는 데이터베이스의 검사에 맡긴다.
+        return issues
+
+    for scope in scopes:
+        # 별칭 -> 카탈로그 테이블 key (서브쿼리/CTE는 None)
+        sources: Dict[str, str | None] = {}
+        for alias, source in scope.sources.items():
+            if not isinstance(source, exp.Table):
+                sources[alias.lower()] = None
+                continue
+            if not source.db:
+                candidates = catalog.tables_named(source.name)
+                issues.append(
+                    issue(
+                        "unqualified_table",
+                        f"table '{source.name}' must be qualified with its database "
+                        "(queries run on the INFORMATION_SCHEMA connection).",
+                        candidates or suggest(source.name, list(catalog.tables)),
+                    )
+                )
+                sources[alias.lower()] = None
+                continue
+            if source.db.lower() in SYSTEM_DATABASES:
+                sources[alias.lower()] = None
+                continue
+            table_key = catalog.resolve(source.db, source.name)
+            if table_key is None:
+                issues.append(
+                    issue(
+                        "unknown_table",
+                        f"table '{source.db}.{source.name}' does not exist.",
+                        suggest(f"{source.db}.{source.name}", list(catalog.tables)),
+                    )
+                )
+            sources[alias.lower()] = table_key
+
+        # qualify가 붙인 "컬럼 AS 컬럼" 별칭은 제외
+        select_aliases = (
+            {
+                select.alias.lower()
+                for select in scope.expression.selects
+                if isinstance(select, exp.Alias)
+                and not (
+                    isinstance(select.this, exp.Column)
+                    and select.this.name.lower() == select.alias.lower()
+                )
+            }
+            if isinstance(scope.expression, exp.Select)
+            else set()
+        )
+        for column in scope.columns:
+            name = column.name
+            if not name or name == "*":
+                continue
+            if column.table:
+                # 바깥 범위의 테이블을 가리키는 컬럼은 그 범위에서 검사한다.
+                table_key = sources.get(column.table.lower())
+                candidates = [table_key] if table_key else []
+            elif (
+                not qualified
+                or column.find_ancestor(exp.Select) is not scope.expression
+                or name.lower() in select_aliases
+                or not sources
+                or None in sources.values()
+            ):
+                # 서브쿼리에 속한 컬럼(그 범위에서 검사), SELECT 별칭, 서브쿼리/CTE 컬럼일 수 있으면 검사하지 않음
+                continue
+            else:
+                # 범위의 테이블이 모두 카탈로그에 있는데도 해석되지 않은 컬럼
+                candidates = [key for key in sources.values() if key]
+            if not candidates or any(
+                catalog.has_column(key, name) for key in candidates  # type: ignore
+            ):
+                continue
+            columns = [c for key in candidates for c in catalog.columns(key)]  # type: ignore
+            issues.append(
+                issue(
+                    "unknown_column",
+                    f"column '{column.sql(dialect='mysql')}' does not exist in "
+                    + ", ".join(candidates)  # type: ignore
+                    + ".",
+                    suggest(name, columns),
+                )
+            )
+    return issues
+
+
+def validate_sql(sql_query: str, catalog: SchemaCatalog) -> exp.Expression:
+    """
+    생성된 SQL을 데이터베이스에 보내기 전에 로컬에서 검사합니다.
+    - MySQL 문법으로 파싱되는지
+    - 테이블이 데이터베이스 이름과 함께 쓰였고 카탈로그에 있는지
+    - 컬럼이 참조한 테이블에 있는지
+    문제가 있으면 비슷한 이름 제안과 함께 SqlValidationError를 발생시키며, 오류 메시지는 쿼리 재생성 프롬프트에 들어갑니다.
+
+    Args:
+        sql_query: 생성된 SQL
+        catalog: 인덱싱 시점에 만든 스키마 카탈로그 (비어 있으면 문법만 검사)
+
+    Returns:
+        exp.Expression: 파싱된 SQL
+    """
+    tree = parse_sql(sql_query)
+    if len(catalog):
+        issues = check_identifiers(tree, catalog)
+        if issues:
+            raise SqlValidationError(issues)
+    return tree
@@ -0,0 +1,75 @@
+import json
+from typing import Dict, Any, AsyncIterator, List
+
+from langgraph.graph.state import CompiledStateGraph
+
+from .utils import extract_context_tables
+
+# 노드가 끝날 때 클라이언트로 보낼 상태 key (query_result, table_contexts처럼 큰 값은 보내지 않는다)
+NODE_EVENT_FIELDS: Dict[str, List[str]] = {
+    "question_cache": ["question_cache_hit", "sql_query"],
+    "question_evaluation": ["user_question_eval"],
+    "general_conversation": [],
+    "question_analysis": ["need_clarification"],
+    "additional_questions": ["ask_user"],
+    "question_refinement": ["user_question"],
+    "table_selection": ["table_contexts_ids", "flow_status"],
+    "sql_query_generation": ["sql_query", "query_fix_cnt", "query_candidate"],
+    "sql_query_validation": [
+        "flow_status",
+        "error_msg",
+        "query_cache_hit",
+        "query_result_stats",
+    ],
+    "response": [],
+}
+# 답변을 만드는 노드. 이 노드의 LLM 출력은 토큰 단위로 보낸다.
+ANSWER_NODES = {"general_conversation", "response"}
+
+
+def format_sse(event: str, data: Any) -> str:
+    """server-sent event 한 개를 text/event-stream 형식으로 만듭니다."""
+    payload = json.dumps(data, ensure_ascii=False, default=str)
+    return f"event: {event}\ndata: {payload}\n\n"
+
+
+def node_event(node: str, output: Dict[str, Any]) -> Dict[str, Any]:
+    """노드 출력에서 진행 상황 표시에 필요한 값만 골라냅니다."""
+    event: Dict[str, Any] = {"node": node}
+    for key in NODE_EVENT_FIELDS[node]:
+        if key in output:
+            event[key] = output[key]
+    if node == "table_selection":
+        event["tables"] = extract_context_tables(
+            output["table_contexts"], output["table_contexts_ids"]
+        )
+    return event
+
+
+async def astream_workflow(
+    workflow: CompiledStateGraph, inputs: Dict[str, Any] | None, config, **kwargs
+) -> AsyncIterator[str]:
+    """
+    비동기 그래프를 실행하면서 노드가 끝날 때마다 node 이벤트를, 답변 노드의 LLM 출력은 token 이벤트로 보냅니다.
+    그래프 실행이 끝난 뒤의 최종 상태는 호출한 쪽에서 aget_state로 가져와 보냅니다.
+
+    Args:
+        workflow: make_graph(asynchronous=True)로 만든 그래프
+        inputs: 그래프 입력 (중단된 그래프를 이어서 실행하면 None)
+        kwargs: astream_events에 그대로 넘길 인자 (interrupt_before 등)
+    """
+    async for event in workflow.astream_events(
+        inputs, config=config, version="v2", **kwargs
+    ):
+        node = event.get("metadata", {}).get("langgraph_node")
+        if node not in NODE_EVENT_FIELDS:
+            continue
+        # 노드 안의 체인이 아니라 노드 자체의 종료 이벤트만 사용
+        if event["event"] == "on_chain_end" and event["name"] == node:
+            output = event["data"].get("output")
+            if isinstance(output, dict):
+                yield format_sse("node", node_event(node, output))
+        elif event["event"] == "on_chat_model_stream" and node in ANSWER_NODES:
+            content = event["data"]["chunk"].content
+            if content:
+                yield format_sse("token", {"node": node, "content": content})
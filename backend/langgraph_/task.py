@@ -1,30 +1,33 @@
-from langchain_openai import ChatOpenAI
-from langchain_core.prompts import ChatPromptTemplate
-from langchain_core.output_parsers import StrOutputParser
-from langchain_core.vectorstores import VectorStore
-from langchain_core.messages import SystemMessage, HumanMessage
-
-from sqlalchemy import create_engine, text
+from sqlalchemy import text
 from sqlalchemy.sql.expression import Executable
-from sqlalchemy.engine import Result
-
+from sqlalchemy.engine import Result, Connection
+from contextlib import nullcontext
 
 from .utils import (
     EmptyQueryResultError,
     NullQueryResultError,
-    load_prompt,
+    save_question_evaluation,
 )
 
-from .utils import EmptyQueryResultError, NullQueryResultError, load_prompt
-from typing import List, Any, Union, Sequence, Dict
-from pydantic import BaseModel, Field
-import os, re, requests
+from .retriever import SchemaRetriever
+from .prompt_registry import get_prompt_registry
+from .db_engine import get_engine, read_only_connection
+from .query_guard import guard_query, get_guard_config, bound_rows
+from .result_cache import get_result_cache
+from .question_cache import get_question_cache, get_question_cache_config
+from .result_format import ResultCollector, get_result_token_budget
+from .question_classifier import get_question_classifier, get_classifier_config
+from .llm_memo import memoize_llm
+from langchain_core.runnables import Runnable
+from typing import List, Any, Union, Sequence, Dict, Tuple
+import os, re
 
 
 def evaluate_user_question(user_question: str) -> str:
     """사용자의 질문이 일상적인 대화문인지, 데이터 및 비즈니스와 관련된 질문인지를
     판단하는 역할을 담당하고 있는 함수입니다.
-    현재는 LLM(gpt-4o-mini)을 통해 사용자의 질문을 판단하고 있습니다.
+    학습된 로컬 분류기가 있으면 먼저 사용하고, 확신도가 QUESTION_CLASSIFIER_THRESHOLD보다 낮을 때만
+    LLM(gpt-4o-mini)으로 판단합니다. LLM의 판단은 분류기 학습을 위해 로그로 남깁니다.
 
     Args:
         user_question (str): 사용자의 질문
@@ -32,25 +35,37 @@ def evaluate_user_question(user_question: str) -> str:
     Returns:
         str: "1" : 데이터 또는 비즈니스와 관련된 질문, "0" : 일상적인 대화문
     """
-    output_parser = StrOutputParser()
-    prompt = ChatPromptTemplate.from_messages(
-        [
-            SystemMessage(
-                content=load_prompt("prompts/question_evaluation/main_v1.prompt")
-            ),
-            (
-                "human",
-                "질문(user_question): {user_question}",
-            ),
-        ]
-    )
-    llm = ChatOpenAI(model_name="gpt-4o-mini")  # type: ignore
-    chain = prompt | llm | output_parser
+    label = classify_user_question(user_question)
+    if label is not None:
+        return label
+
+    return judge_user_question(user_question)
+
+
+def classify_user_question(user_question: str) -> str | None:
+    """학습된 로컬 분류기의 확신도가 충분하면 판단 결과를, 아니면 None을 반환합니다."""
+    classifier = get_question_classifier()
+    if classifier is None:
+        return None
+    label, confidence = classifier.predict(user_question)
+    if confidence >= get_classifier_config()["threshold"]:
+        classifier.fast_path_count += 1
+        return label
+    classifier.fallback_count += 1
+    return None
+
+
+@memoize_llm("question_evaluation")
+def judge_user_question(user_question: str) -> str:
+    """LLM으로 질문을 평가하고, 분류기 학습을 위해 판단을 로그로 남깁니다."""
+    chain = get_prompt_registry().chain("question_evaluation")
 
     output = chain.invoke({"user_question": user_question})
+    save_question_evaluation(user_question, output.strip(), "llm")
     return output
 
 
+@memoize_llm("general_conversation")
 def simple_conversation(user_question: str) -> str:
     """사용자의 질문이 일상적인 대화문이라고 판단되었을 경우
     사용자와 일상적인 대화를 진행하는 함수입니다.
@@ -62,69 +77,25 @@ def simple_conversation(user_question: str) -> str:
     Returns:
         str: 사용자의 일상적인 질문에 대한 AI의 대답
     """
-    output_parser = StrOutputParser()
-
-    prompt = ChatPromptTemplate.from_messages(
-        [
-            SystemMessage(
-                content=load_prompt("prompts/general_conversation/main_v1.prompt")
-            ),
-            (
-                "human",
-                "{user_question}",
-            ),
-        ]
-    )
-    llm = ChatOpenAI(model_name="gpt-4o-mini")  # type: ignore
-    chain = prompt | llm | output_parser
+    chain = get_prompt_registry().chain("general_conversation")
 
     output = chain.invoke({"user_question": user_question})
     return output
 
 
+@memoize_llm("question_analysis")
 def analyze_user_question(user_question: str) -> str:
-    output_parser = StrOutputParser()
-    llm = ChatOpenAI(model="gpt-4o-mini", temperature=0)
-
-    ANALYZE_PROMPT = ChatPromptTemplate.from_messages(
-        [
-            SystemMessage(
-                content=load_prompt("prompts/question_analysis/main_v1.prompt")
-            ),
-            (
-                "human",
-                "사용자 질문: {user_question}"
-                + load_prompt("prompts/question_analysis/human_v1.prompt"),
-            ),
-        ]
-    )
-
-    analyze_chain = ANALYZE_PROMPT | llm | output_parser
+    analyze_chain = get_prompt_registry().chain("question_analysis")
     analyze_question = analyze_chain.invoke({"user_question": user_question})
 
     return analyze_question
 
 
+@memoize_llm("additional_question")
 def clarify_user_question(
     user_question: str, user_question_analyze: str, collected_questions: List[str]
 ) -> str:
-    output_parser = StrOutputParser()
-    llm = ChatOpenAI(model="gpt-4o", temperature=0)
-
-    prompt = ChatPromptTemplate.from_messages(
-        [
-            SystemMessage(
-                content=load_prompt("prompts/additional_question/main_v1.prompt")
-            ),
-            (
-                "human",
-                "원래 사용자 질문:\n{user_question}\n\n초기 질문 분석:\n{user_question_analyze}\n\n이전 질문 기록:\n{collected_questions}\n\n"
-                + load_prompt("prompts/additional_question/human_postfix_v1.prompt"),
-            ),
-        ]
-    )
-
-    chain = prompt | llm | output_parser
+    chain = get_prompt_registry().chain("additional_question")
     chat_history = "\n".join(f"{i+1}. {q}" for i, q in enumerate(collected_questions))
 
     leading_question = chain.invoke(
@@ -138,6 +109,12 @@ def clarify_user_question(
     return leading_question
 
 
+def check_need_clarification(user_question_analyze: str) -> bool:
+    """질문 분석 결과에 불명확/확인 필요/에러 표시가 있으면 추가 질문이 필요하다고 판단합니다."""
+    keywords = ["[불명확]", "[확인필요]", "[에러]"]
+    return any(keyword in user_question_analyze for keyword in keywords)
+
+
 def check_leading_question(leading_question: str) -> int:
     if leading_question.startswith("종료") or leading_question.startswith('"종료'):
         return 0
@@ -145,28 +122,9 @@ def check_leading_question(leading_question: str) -> int:
         return 1
 
 
+@memoize_llm("question_refinement")
 def refine_user_question(user_question: str, user_question_analyze: str) -> str:
-    output_parser = StrOutputParser()
-    llm = ChatOpenAI(model="gpt-4o-mini", temperature=0)
-    REFINE_PROMPT = ChatPromptTemplate.from_messages(
-        [
-            SystemMessage(
-                content=load_prompt("prompts/question_refinement/main_v1.prompt")
-            ),
-            (
-                "human",
-                """사용자 질문: 
-                {user_question}
-                
-                사용자 질문 분석: 
-                {user_question_analyze}
-                
-                구체화된 질문:""",
-            ),
-        ]
-    )
-
-    refine_chain = REFINE_PROMPT | llm | output_parser
+    refine_chain = get_prompt_registry().chain("question_refinement")
     refine_question = refine_chain.invoke(
         {"user_question": user_question, "user_question_analyze": user_question_analyze}
     )
@@ -174,27 +132,135 @@ def refine_user_question(user_question: str, user_question_analyze: str) -> str:
     return refine_question
 
 
+def find_cached_query(
+    user_question: str, retriever: SchemaRetriever, department: str | None = None
+) -> Dict[str, Any] | None:
+    """이전에 좋아요를 받은 질문 중 user_question과 충분히 비슷한 질문이 있으면 그 때의 SQL과 context를 반환합니다.
+
+    Args:
+        user_question (str): 사용자의 질문
+        retriever (SchemaRetriever): 질문 임베딩과 현재 스키마 버전을 제공하는 스키마 검색 서비스
+        department (str | None): 사용자 부서
+
+    Returns:
+        Dict | None: sql_query, table_contexts, table_contexts_ids, question, similarity
+    """
+    cache = get_question_cache()
+    if cache is None:
+        return None
+    # 비교할 질문이 없으면 질문을 임베딩하지 않는다.
+    if not cache.has_candidates(retriever.schema_version, department):
+        return None
+    question_vector = retriever.vector_store.embedding_function.embed_query(
+        user_question
+    )
+    return cache.lookup(
+        user_question,
+        question_vector,
+        retriever.schema_version,
+        department,
+        get_question_cache_config()["threshold"],
+    )
+
+
+def cache_validated_query(snapshot: Dict[str, Any], retriever: SchemaRetriever) -> bool:
+    """사용자가 좋아요를 누른 답변의 SQL이 검증된 경우(재생성 한도 이내, 결과 있음) 질문-SQL 캐시에 저장합니다.
+
+    Args:
+        snapshot (Dict): 그래프 상태
+        retriever (SchemaRetriever): 질문 임베딩과 현재 스키마 버전을 제공하는 스키마 검색 서비스
+
+    Returns:
+        bool: 저장 여부
+    """
+    cache = get_question_cache()
+    if cache is None or snapshot.get("question_cache_hit"):
+        return False
+    if (
+        not snapshot.get("sql_query")
+        or snapshot.get("flow_status") != "KEEP"
+        or snapshot.get("query_fix_cnt", 0) > snapshot.get("max_query_fix", 0)
+        or not snapshot.get("query_result_stats", {}).get("kept")
+    ):
+        return False
+
+    # 원래 질문과 구체화된 질문 모두로 찾을 수 있도록 둘 다 저장
+    questions = {
+        question: retriever.vector_store.embedding_function.embed_query(question)
+        for question in {
+            snapshot.get("original_question") or snapshot["user_question"],
+            snapshot["user_question"],
+        }
+    }
+    cache.add(
+        questions,
+        retriever.schema_version,
+        snapshot.get("user_department"),
+        {
+            "sql_query": snapshot["sql_query"],
+            "table_contexts": snapshot["table_contexts"],
+            "table_contexts_ids": snapshot["table_contexts_ids"],
+        },
+    )
+    return True
+
+
 def select_relevant_tables(
-    user_question: str, context_cnt: int, vector_store: VectorStore
+    user_question: str,
+    context_cnt: int,
+    retriever: SchemaRetriever,
+    department: str | None = None,
 ) -> List[str]:
-    """user_question과 관련성이 가장 높은 k(context_cnt)개의 document에서 page_content만 추출하여 리스트의 형태로 반환하는 함수입니다.
-    입력으로 들어오는 vector_store는 반드시 MySQL 서버 내 테이블에 대한 메타데이터가 임베딩 되어 있어야 정상적으로 작동 합니다.
+    """user_question과 관련성이 가장 높은 k(context_cnt)개의 document에서 context만 추출하여 리스트의 형태로 반환하는 함수입니다.
+    입력으로 들어오는 retriever는 반드시 MySQL 서버 내 테이블에 대한 메타데이터가 임베딩 된 인덱스를 불러온 상태여야 정상적으로 작동 합니다.
     관련성은 vetor store에 기본으로 내장된 유사도 검색 알고리즘을 사용합니다.
 
     Args:
         user_question (str): 사용자의 질문
         context_cnt (int): 반환할 context의 개수
-        vector_store (VectorStore): MySQL 서버 내 테이블에 대한 메타데이터가 임베딩 되어있는 벡터 스토어
+        retriever (SchemaRetriever): 프로세스 전역에서 공유되는 스키마 검색 서비스
+        department (str | None): 사용자 부서, 검색할 데이터베이스 shard를 고르는 데 사용
 
     Returns:
         List[str]: context가 포함된 리스트
     """
-    relevant_tables = vector_store.similarity_search(query=user_question, k=context_cnt)
-    table_contexts = [doc.metadata["context"] for doc in relevant_tables]
+    table_contexts = retriever.search(
+        user_question, k=context_cnt, department=department
+    )
 
     return table_contexts
 
 
+def build_table_selection_inputs(
+    user_question: str,
+    table_contexts: List[str],
+    flow_status: str = "KEEP",
+    prev_list: List[int] = [],
+    prev_query: str = "",
+    error_msg: str = "",
+) -> Dict[str, str]:
+    """테이블 선택 체인의 입력을 만듭니다."""
+    registry = get_prompt_registry()
+    system_instruction = registry.prompt("table_selection", "main")
+
+    if flow_status == "RESELECT":
+        print("검색된 테이블 스키마 재검수")
+        system_instruction += registry.prompt(
+            "table_selection", "regen_postfix", "v1"
+        ).format(prev_list=prev_list, prev_query=prev_query, error_msg=error_msg)
+
+    context = ""
+    for idx, table_info in enumerate(table_contexts):
+        context += f"{idx}.\n{table_info}\n\n"
+
+    return {
+        "system_prompt": system_instruction,
+        "user_question": user_question,
+        "context": context,
+    }
+
+
+@memoize_llm("table_selection")
 def extract_context(
     user_question: str,
     table_contexts: List[str],
@@ -217,42 +283,17 @@ def extract_context(
         # 평가할 context가 없다면 빈 리스트 반환
         return []
 
-    system_instruction = load_prompt("prompts/table_selection/main_v2.prompt")
+    chain = get_prompt_registry().chain("table_selection")
 
-    if flow_status == "RESELECT":
-        print("검색된 테이블 스키마 재검수")
-        system_instruction += load_prompt(
-            "prompts/table_selection/regen_postfix_v1.prompt"
-        ).format(prev_list=prev_list, prev_query=prev_query, error_msg=error_msg)
-
-    prompt = ChatPromptTemplate.from_messages(
-        [
-            SystemMessage(content=system_instruction),
-            (
-                "human",
-                "user_question:\n{user_question}\n\ncontext:\n{context}",
-            ),
-        ]
+    output = chain.invoke(
+        build_table_selection_inputs(
+            user_question, table_contexts, flow_status, prev_list, prev_query, error_msg
+        )
     )
-
-    llm = ChatOpenAI(model="gpt-4o-mini")
-
-    class context_list(BaseModel):
-        """Index list of the context which is necessary for answering user_question."""
-
-        ids: List[int | None] = Field(description="Ids of contexts.")
-
-    structured_llm = llm.with_structured_output(context_list)
-    context = ""
-    for idx, table_info in enumerate(table_contexts):
-        context += f"{idx}.\n{table_info}\n\n"
-
-    chain = prompt | structured_llm
-
-    output = chain.invoke({"user_question": user_question, "context": context})
     return output.ids  # type: ignore
 
 
+@memoize_llm("query_creation")
 def create_query(
     user_question,
     table_contexts,
@@ -261,40 +302,22 @@ def create_query(
     flow_status="KEEP",
     prev_query="",
     error_msg="",
+    temperature=None,
 ):
     try:
-        # 컨텍스트 생성
-        context = ""
-        for idx, table_info in enumerate(table_contexts):
-            if idx in set(table_contexts_ids):
-                context += table_info + "\n\n"
-
-        # 프롬프트 로드 및 구성
-        prefix = load_prompt("prompts/query_creation/prefix_v1.prompt").format(
-            context=context
+        registry = get_prompt_registry()
+        system_prompt = build_query_creation_prompt(
+            table_contexts, table_contexts_ids, flow_status, prev_query, error_msg
         )
-        postfix = load_prompt("prompts/query_creation/postfix_v1.prompt")
-
-        # flow_status에 따른 프롬프트 생성
-        if flow_status == "KEEP":
-            main_prompt = load_prompt("prompts/query_creation/generate_v1.prompt")
-            system_prompt = prefix + main_prompt + postfix
-        else:
-            regen_prompt = load_prompt(
-                "prompts/query_creation/regenerate_v1.prompt"
-            ).format(prev_query=prev_query, result_msg=error_msg)
-            system_prompt = prefix + regen_prompt + postfix
+        chain = query_creation_chain(temperature)
+        inputs = {"system_prompt": system_prompt, "user_question": user_question}
 
         # GPU를 사용 가능하며, 사용자가 로컬 LLM 사용을 원할 경우
         if llm_api == "Local":
 
-            response = requests.post(
-                f"http://{os.getenv('MODEL_HOST')}:8001/qwen",
-                json={
-                    "input_dict": {"user_question": user_question},
-                    "system_prompt": system_prompt,
-                    "human_prompt": "user_question: {user_question}",
-                },
+            response = registry.http_session.post(
+                get_local_model_url(),
+                json=build_local_model_payload(user_question, system_prompt),
             )
             if response.status_code == 200:
                 processed_info = response.json()
@@ -303,38 +326,11 @@ def create_query(
                 print(
                     f"Got Unexpected Response from Model Server, Status Code={response.status_code}"
                 )
-                output_parser = StrOutputParser()
-                prompt = ChatPromptTemplate.from_messages(
-                    [
-                        SystemMessage(content=system_prompt),
-                        ("human", """user_question: {user_question}"""),
-                    ]
-                )
-
-                llm = ChatOpenAI(model="gpt-4o-mini", temperature=0)
-                chain = prompt | llm | output_parser
-
-                output = chain.invoke({"user_question": user_question})
+                output = chain.invoke(inputs)
         else:
-            output_parser = StrOutputParser()
-            prompt = ChatPromptTemplate.from_messages(
-                [
-                    SystemMessage(content=system_prompt),
-                    ("human", """user_question: {user_question}"""),
-                ]
-            )
+            output = chain.invoke(inputs)
 
-            llm = ChatOpenAI(model="gpt-4o-mini", temperature=0)
-            chain = prompt | llm | output_parser
-
-            output = chain.invoke({"user_question": user_question})
-
-        try:
-            sql_query = re.search(r"```sql\s*(.*?)\s*```", output, re.DOTALL).group(1)
-        except:
-            sql_query = re.search(r"SELECT.*?;", output, re.DOTALL).group(0)
-
-        return sql_query.strip()
+        return extract_sql(output)
 
     except Exception as e:
         print("\n=== 에러 발생 ===")
@@ -343,6 +339,65 @@ def create_query(
         raise
 
 
+def query_creation_chain(temperature: float | None = None) -> Runnable:
+    """쿼리 생성 체인. 온도를 주면 (SQL 후보 생성 시) 그 온도로 LLM을 호출한다."""
+    chain = get_prompt_registry().chain("query_creation")
+    if temperature is None:
+        return chain
+    return chain.with_config(configurable={"temperature": temperature})
+
+
+def build_query_creation_prompt(
+    table_contexts,
+    table_contexts_ids,
+    flow_status="KEEP",
+    prev_query="",
+    error_msg="",
+) -> str:
+    """선택된 context와 flow_status로 쿼리 생성 체인의 system prompt를 만듭니다."""
+    # 컨텍스트 생성
+    context = ""
+    for idx, table_info in enumerate(table_contexts):
+        if idx in set(table_contexts_ids):
+            context += table_info + "\n\n"
+
+    # 프롬프트 구성 (프롬프트와 체인은 registry에서 재사용)
+    registry = get_prompt_registry()
+    prefix = registry.prompt("query_creation", "prefix").format(context=context)
+    postfix = registry.prompt("query_creation", "postfix")
+
+    # flow_status에 따른 프롬프트 생성
+    if flow_status == "KEEP":
+        main_prompt = registry.prompt("query_creation", "generate")
+        return prefix + main_prompt + postfix
+    regen_prompt = registry.prompt("query_creation", "regenerate").format(
+        prev_query=prev_query, result_msg=error_msg
+    )
+    return prefix + regen_prompt + postfix
+
+
+def get_local_model_url() -> str:
+    return f"http://{os.getenv('MODEL_HOST')}:8001/qwen"
+
+
+def build_local_model_payload(user_question: str, system_prompt: str) -> Dict:
+    return {
+        "input_dict": {"user_question": user_question},
+        "system_prompt": system_prompt,
+        "human_prompt": "user_question: {user_question}",
+    }
+
+
+def extract_sql(output: str) -> str:
+    """LLM 응답에서 SQL을 꺼냅니다."""
+    try:
+        sql_query = re.search(r"```sql\s*(.*?)\s*```", output, re.DOTALL).group(1)  # type: ignore
+    except:
+        sql_query = re.search(r"SELECT.*?;", output, re.DOTALL).group(0)  # type: ignore
+
+    return sql_query.strip()
+
+
 def check_query_result(result: Sequence[Dict[str, Any]]) -> Exception | None:
 
     if not result:
@@ -365,10 +420,10 @@ def execute_query(command: str | Executable, fetch="all") -> Union[Sequence[Dict
     """
     parameters = {}
     execution_options = {}
-    db_path = os.path.join(os.getenv("URL"), "INFORMATION_SCHEMA")  # type: ignore
-    engine = create_engine(db_path)
+    # 공유 커넥션 풀에서 커넥션을 빌려 읽기 전용 트랜잭션으로 실행
+    engine = get_engine("INFORMATION_SCHEMA")
 
-    with engine.begin() as connection:
+    with read_only_connection(engine) as connection:
         if isinstance(command, str):
             command = text(command)
         elif isinstance(command, Executable):
@@ -413,6 +468,14 @@ def truncate_word(content: Any, *, length: int = 300, suffix: str = "...") -> st
 
 
 def get_query_result(command, fetch, include_columns=False):
+    if fetch == "stream":
+        # 스트리밍 결과는 컬럼 요약과 markdown 표 머리글에 컬럼 이름이 필요하므로 항상 포함한다.
+        if not include_columns:
+            raise ValueError(
+                "fetch='stream' always includes column names; pass include_columns=True"
+            )
+        return stream_query_result(command)[0]
+
     result = execute_query(command, fetch)
     if fetch == "cursor":
         return result
@@ -434,25 +497,148 @@ def get_query_result(command, fetch, include_columns=False):
         return str(res)
 
 
+def get_fetch_config() -> Dict[str, int]:
+    """
+    환경변수에서 쿼리 결과 스트리밍 설정을 읽어옵니다.
+
+    - QUERY_MAX_ROWS: 결과에서 보관할 최대 행 수 (앞/뒤 절반씩). 실제로 표시할 행은 토큰 예산으로 정함
+    - QUERY_SCAN_ROWS: NULL/빈 결과 확인과 컬럼 요약을 위해 읽을 최대 행 수. 넘으면 나머지 행은 읽지 않음
+    - QUERY_FETCH_BATCH: 서버 측 커서에서 한 번에 가져올 행 수
+    """
+    return {
+        "max_rows": int(os.getenv("QUERY_MAX_ROWS", 200)),
+        "scan_rows": int(os.getenv("QUERY_SCAN_ROWS", 10000)),
+        "batch_size": int(os.getenv("QUERY_FETCH_BATCH", 500)),
+    }
+
+
+def stream_query_result(
+    command: str | Executable,
+    token_budget: int | None = None,
+    connection: Connection | None = None,
+) -> Tuple[str, Dict[str, int | bool]]:
+    """
+    서버 측 커서로 결과를 나누어 가져오면서 앞/뒤 행과 컬럼 요약만 남기고, 토큰 예산 안의 markdown 표로 직렬화합니다.
+    NULL/빈 결과 검사도 행을 읽으면서 함께 진행하므로 결과 크기와 관계없이 메모리 사용량이 일정합니다.
+
+    Args:
+        command: 실행할 SQL
+        token_budget: 결과 문자열의 토큰 예산. None이면 답변 생성(sql_conversation) 노드의 예산
+        connection: 쿼리를 실행할 읽기 전용 커넥션. None이면 공유 엔진에서 빌린다.
+
+    Returns:
+        Tuple[str, Dict]: (답변 생성에 넘길 결과 문자열, 행 통계)
+            행 통계: kept(표시한 행), dropped(읽었지만 표시하지 않은 행),
+            exhausted(모든 행을 읽었는지 여부, False이면 scan_rows 이후의 행은 서버에서 만들지 않음), tokens(결과 토큰 수)
+    """
+    config = get_fetch_config()
+    if token_budget is None:
+        token_budget = get_result_token_budget("sql_conversation")
+
+    exhausted = True
+    with (
+        nullcontext(connection)
+        if connection is not None
+        else read_only_connection(get_engine("INFORMATION_SCHEMA"))
+    ) as connection:
+        if isinstance(command, str):
+            # 커서를 닫을 때 드라이버는 남은 행을 모두 받아 버리므로(pymysql SSCursor),
+            # 서버에서부터 scan_rows보다 한 행만 더 만들도록 제한한다. (한 행은 남은 행이 있는지 확인용)
+            command = text(
+                bound_rows(command, config["scan_rows"] + 1, connection.dialect.name)
+            )
+        cursor = connection.execute(
+            command,
+            execution_options={
+                "stream_results": True,
+                "max_row_buffer": config["batch_size"],
+            },
+        )
+        if not cursor.returns_rows:
+            return "", {"kept": 0, "dropped": 0, "exhausted": True, "tokens": 0}
+
+        collector = ResultCollector(
+            list(cursor.keys()),
+            head_rows=(config["max_rows"] + 1) // 2,
+            tail_rows=config["max_rows"] // 2,
+        )
+        for partition in cursor.partitions(config["batch_size"]):
+            for row in partition:
+                if collector.fetched >= config["scan_rows"]:
+                    exhausted = False
+                    break
+                collector.add(row)
+            if not exhausted:
+                # 쿼리에 붙인 LIMIT 때문에 서버에 남은 행은 없으므로 바로 닫아도 된다.
+                break
+        cursor.close()
+
+    if collector.fetched == 0:
+        raise EmptyQueryResultError()
+    if not collector.has_value:
+        raise NullQueryResultError()
+
+    return collector.serialize(token_budget, exhausted)
+
+
+def run_query(sql_query: str, connection: Connection | None = None) -> Dict[str, Any]:
+    """
+    생성된 SQL을 실행 전 검사(guard_query)를 거쳐 실행하고, 결과를 캐시에서 재사용합니다.
+    같은 SQL(정규화 기준)의 결과가 캐시에 있고 참조한 테이블이 바뀌지 않았다면 데이터베이스에 묻지 않습니다.
+
+    Args:
+        sql_query: 생성된 SQL
+        connection: 읽기 전용 커넥션. 주어지면 EXPLAIN, 테이블 UPDATE_TIME 조회, 실행을 모두 이 커넥션에서 한다.
+            (비동기 그래프는 AsyncConnection.run_sync로 이 함수를 실행)
+
+    Returns:
+        Dict: query_result, query_result_stats, query_guard, query_cache_hit
+    """
+    # 결과는 답변 생성(sql_conversation) 노드의 토큰 예산에 맞춰 직렬화
+    token_budget = get_result_token_budget("sql_conversation")
+
+    def execute(sql_query: str) -> Dict[str, Any]:
+        # EXPLAIN으로 비용을 추정해 너무 비싼 쿼리는 거부하고, LIMIT/실행 시간 제한을 붙인다.
+        guarded_query, query_guard = guard_query(sql_query, connection)
+        # 서버 측 커서로 읽으면서 토큰 예산 안의 결과만 남기기
+        query_result, query_result_stats = stream_query_result(
+            command=guarded_query, token_budget=token_budget, connection=connection
+        )
+        return {
+            "query_result": query_result,
+            "query_result_stats": query_result_stats,
+            "query_guard": query_guard,
+        }
+
+    cache = get_result_cache()
+    if cache is None:
+        return {**execute(sql_query), "query_cache_hit": False}
+
+    # 결과에 영향을 주는 설정이 바뀌면 다른 key가 되도록 함께 넣는다.
+    options = {
+        "fetch": get_fetch_config(),
+        "guard": get_guard_config(),
+        "token_budget": token_budget,
+    }
+    payload, hit = cache.get_or_execute(sql_query, execute, options, connection)
+    return {**payload, "query_cache_hit": hit}
+
+
+@memoize_llm("sql_conversation")
 def business_conversation(user_question, sql_query, query_result) -> str:
-    output_parser = StrOutputParser()
+    registry = get_prompt_registry()
+    instruction = build_sql_conversation_prompt(sql_query, query_result)
+    chain = registry.chain("sql_conversation")
 
-    instruction = load_prompt("prompts/sql_conversation/main_v1.prompt").format(
-        sql_query=sql_query, query_result=query_result
-    )
-    prompt = ChatPromptTemplate.from_messages(
-        [
-            SystemMessage(content=instruction),
-            (
-                "human",
-                """user_question: {user_question}""",
-            ),
-        ]
+    output = chain.invoke(
+        {"system_prompt": instruction, "user_question": user_question}
     )
-    llm = ChatOpenAI(
-        model="gpt-4o-mini",
-    )
-    chain = prompt | llm | output_parser
-
-    output = chain.invoke({"user_question": user_question})
     return output
+
+
+def build_sql_conversation_prompt(sql_query, query_result) -> str:
+    return (
+        get_prompt_registry()
+        .prompt("sql_conversation", "main")
+        .format(sql_query=sql_query, query_result=query_result)
+    )
@@ -1,6 +1,7 @@
 from langchain_core.runnables import RunnableConfig
-import argparse, os, re, csv
+import argparse, os, re, csv, threading
 from datetime import datetime
+from typing import List, Dict, Any, Tuple
 
 
 def get_runnable_config(recursion_limit: int, thread_id: str) -> RunnableConfig:
@@ -37,6 +38,38 @@ class NullQueryResultError(Exception):
         return self.msg
 
 
+class QueryRejectedError(Exception):
+    def __init__(self, reason: str):
+        self.msg = f"The SQL query was rejected before execution: {reason}"
+
+    def __str__(self):
+        return self.msg
+
+    # SQLAlchemy 에서 에러메시지를 출력하기 위한 메서드
+    def _message(self):
+        return self.msg
+
+
+class SqlValidationError(Exception):
+    def __init__(self, issues: List[Dict[str, Any]]):
+        # issues: [{"kind": syntax | unqualified_table | unknown_table | unknown_column, "message", "suggestions"}]
+        self.issues = issues
+        lines = []
+        for issue in issues:
+            line = f"- [{issue['kind']}] {issue['message']}"
+            if issue["suggestions"]:
+                line += f" Did you mean: {', '.join(issue['suggestions'])}?"
+            lines.append(line)
+        self.msg = "The SQL query failed local validation:\n" + "\n".join(lines)
+
+    def __str__(self):
+        return self.msg
+
+    # SQLAlchemy 에서 에러메시지를 출력하기 위한 메서드
+    def _message(self):
+        return self.msg
+
+
 def load_prompt(prompt_path: str) -> str:
     """
     입력된 경로에 존재하는 프롬프트 파일을 로드합니다.
@@ -75,48 +108,121 @@ def extract_context_tables(table_contexts, table_contexts_ids):
     return context_table_list
 
 
-def save_conversation(snapshot, feedback):
-    os.makedirs("logs", exist_ok=True)
+def get_log_config() -> Dict[str, Any]:
+    """
+    환경변수에서 대화/질문 평가 로그 설정을 읽어옵니다.
 
-    # CSV 파일명 생성 (현재 시간 포함)
+    - LOG_DIR: 사용자 피드백과 질문 평가 CSV를 저장할 폴더 (질문 평가 분류기의 학습 데이터)
+    - QUESTION_EVAL_LOG: 질문 평가 결과를 기록할지 여부 (부하 테스트 등에서는 끔)
+    """
+    return {
+        "dir": os.getenv("LOG_DIR", "logs"),
+        "question_eval": str2bool(os.getenv("QUESTION_EVAL_LOG", "true")),
+    }
+
+
+# 여러 요청이 같은 로그 CSV에 동시에 쓰면 행이 섞이므로 파일 선택과 쓰기를 직렬화
+_log_lock = threading.Lock()
+
+FEEDBACK_LOG_HEADER = [
+    "user_question",
+    "original_question",
+    "collected_questions",
+    # "table_contexts",
+    # "table_contexts_ids",
+    "table_names",
+    "sql_query",
+    "query_result",
+    "final_answer",
+    "feedback",
+    "timestamp",
+]
+
+
+def log_csv_path(log_dir: str, prefix: str, header: List[str]) -> Tuple[str, bool]:
+    """
+    오늘 날짜의 로그 CSV 경로와 헤더를 새로 써야 하는지를 반환합니다.
+    같은 날 먼저 만든 파일의 헤더가 다르면(컬럼이 바뀌기 전 버전이 쓴 파일) 이어 쓰지 않고
+    번호를 붙인 새 파일(prefix_YYYYMMDD_2.csv ...)에 씁니다.
+    """
     timestamp = datetime.now().strftime("%Y%m%d")
-    csv_filename = f"logs/user_feedback_{timestamp}.csv"
-    # 파일을 새로 만들지, 이어 쓸지 확인
-    if os.path.isfile(f"./logs/user_feedback_{timestamp}.csv"):
-        mode = "a"
-    else:
-        mode = "w"
+    count = 1
+    while True:
+        suffix = f"_{count}" if count > 1 else ""
+        csv_filename = os.path.join(log_dir, f"{prefix}_{timestamp}{suffix}.csv")
+        if not os.path.isfile(csv_filename):
+            return csv_filename, True
+        with open(csv_filename, newline="", encoding="utf-8") as csvfile:
+            if next(csv.reader(csvfile), None) == header:
+                return csv_filename, False
+        count += 1
+
+
+def save_conversation(snapshot, feedback):
+    log_dir = get_log_config()["dir"]
+    os.makedirs(log_dir, exist_ok=True)
+
+    # CSV 파일명 생성 (현재 날짜 포함, 헤더가 다른 파일에는 이어 쓰지 않음)
+    with _log_lock:
+        csv_filename, write_header = log_csv_path(
+            log_dir, "user_feedback", FEEDBACK_LOG_HEADER
+        )
+        write_feedback_row(csv_filename, write_header, snapshot, feedback)
+    print("Save Completed!")
+
+
+def write_feedback_row(csv_filename: str, write_header: bool, snapshot, feedback):
     # CSV 파일 생성
-    with open(csv_filename, mode=mode, newline="", encoding="utf-8") as csvfile:
+    with open(csv_filename, mode="a", newline="", encoding="utf-8") as csvfile:
         writer = csv.writer(csvfile, delimiter=",", quotechar='"')
         # 첫 작성 시 헤더 작성
-        if mode == "w":
-            writer.writerow(
-                [
-                    "user_question",
-                    "collected_questions",
-                    # "table_contexts",
-                    # "table_contexts_ids",
-                    "table_names",
-                    "query_result",
-                    "final_answer",
-                    "feedback",
-                    "timestamp",
-                ]
-            )
+        if write_header:
+            writer.writerow(FEEDBACK_LOG_HEADER)
         writer.writerow(
             [
                 snapshot["user_question"],
+                # 구체화되기 전 사용자가 입력한 질문 (질문 평가 분류기 학습용)
+                snapshot.get("original_question", snapshot["user_question"]),
                 snapshot["collected_questions"],
                 # snapshot["table_contexts"],
                 # snapshot["table_contexts_ids"],
                 extract_context_tables(
                     snapshot["table_contexts"], snapshot["table_contexts_ids"]
                 ),
+                snapshot.get("sql_query", ""),
                 snapshot["query_result"],
                 snapshot["final_answer"],
                 feedback,
                 datetime.now().strftime("%Y-%m-%d %H:%M:%S"),  # 현재 시간 기록
             ]
         )
-    print("Save Completed!")
+
+
+QUESTION_EVAL_LOG_HEADER = ["user_question", "label", "source", "timestamp"]
+
+
+def save_question_evaluation(user_question: str, label: str, source: str) -> None:
+    """
+    질문 평가 결과를 LOG_DIR/question_eval_YYYYMMDD.csv에 기록합니다.
+    LLM의 판단(source="llm")은 질문 평가 분류기의 학습 데이터로 사용됩니다.
+    """
+    config = get_log_config()
+    if not config["question_eval"]:
+        return
+    os.makedirs(config["dir"], exist_ok=True)
+    with _log_lock:
+        csv_filename, write_header = log_csv_path(
+            config["dir"], "question_eval", QUESTION_EVAL_LOG_HEADER
+        )
+        with open(csv_filename, mode="a", newline="", encoding="utf-8") as csvfile:
+            writer = csv.writer(csvfile, delimiter=",", quotechar='"')
+            if write_header:
+                writer.writerow(QUESTION_EVAL_LOG_HEADER)
+            writer.writerow(
+                [
+                    user_question,
+                    label,
+                    source,
+                    datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+                ]
+            )
@@ -1,5 +1,9 @@
-from fastapi import FastAPI
+from fastapi import FastAPI, HTTPException
+from fastapi.responses import StreamingResponse
 from pydantic import BaseModel
+from langgraph.graph.state import CompiledStateGraph
+from contextlib import asynccontextmanager
+import asyncio
 import uvicorn
 
 from langgraph_.graph import make_graph, multiturn_test, make_graph_for_test
@@ -8,12 +12,53 @@ from langgraph_.utils import (
     extract_context_tables,
     save_conversation,
 )
+from langgraph_.retriever import (
+    init_schema_retriever,
+    get_schema_retriever,
+    rebuild_schema_index,
+    rollback_schema_index,
+)
+from langgraph_.prompt_registry import init_prompt_registry, get_prompt_registry
+from langgraph_.db_engine import (
+    get_engine,
+    get_async_engine,
+    get_pool_stats,
+    adispose_engines,
+)
+from langgraph_.result_cache import get_result_cache
+from langgraph_.question_cache import get_question_cache
+from langgraph_.task import cache_validated_query
+from langgraph_.question_classifier import get_question_classifier
+from langgraph_.llm_memo import llm_run, get_llm_call_stats
+from langgraph_.speculation import speculative_run, get_speculation_stats
+from langgraph_.stream import astream_workflow, format_sse
+from langgraph_.query_candidates import get_query_candidates_stats
 from dotenv import load_dotenv
 
-app = FastAPI()
+SAMPLE_INFO = 5
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # 스키마 검색 서비스(FAISS 인덱스)는 서버 시작 시 한 번만 불러온다.
+    init_schema_retriever(SAMPLE_INFO)
+    # 프롬프트, LLM 클라이언트, 체인도 요청마다 만들지 않도록 미리 만들어 둔다.
+    init_prompt_registry()
+    # 쿼리 실행용 커넥션 풀을 미리 만들어 첫 요청이 접속 비용을 치르지 않게 한다.
+    get_engine("INFORMATION_SCHEMA").connect().close()
+    async with get_async_engine("INFORMATION_SCHEMA").connect():
+        pass
+    yield
+    await get_prompt_registry().aclose()
+    await adispose_engines()
+
+
+app = FastAPI(lifespan=lifespan)
 
 # make_graph: 전체 과정, make_graph_for_test: 질문 구체화 생략, multiturn_test: 질문 구체화만 진행
-workflow = make_graph()
+# 엔드포인트는 비동기 그래프(ainvoke)를 사용하여 LLM/DB 응답을 기다리는 동안 스레드를 점유하지 않는다.
+# 그래프와 대화 기록(MemorySaver)은 서버 시작 시 한 번만 만들고, 대화는 thread_id로 구분한다.
+workflow = make_graph(asynchronous=True)
 print("LLM WORKFLOW STARTED.")
 
 
@@ -23,6 +68,7 @@ class LLMWorkflowInput(BaseModel):
     thread_id: str
     last_snapshot_values: dict | None
     llm_api: str
+    user_department: str | None = None
 
 
 class UserFeedbackInput(BaseModel):
@@ -30,19 +76,14 @@ class UserFeedbackInput(BaseModel):
     thread_id: str
 
 
-@app.post("/llm_workflow")
-def llm_workflow(workflow_input: LLMWorkflowInput):
-    global workflow
-    processed_input = workflow_input.model_dump()
+async def start_workflow(
+    graph: CompiledStateGraph, processed_input: dict
+) -> tuple[dict, dict | None]:
+    """
+    요청에 맞게 그래프 실행을 준비하고 (config, 그래프 입력)을 반환합니다.
+    추가 질문에 대한 사용자 답변이면 이전 상태에 답변을 기록하고, 입력 없이(None) 이어서 실행합니다.
+    """
     config = get_runnable_config(30, processed_input["thread_id"])
-    inputs = {
-        "user_question": processed_input["user_question"],
-        "context_cnt": 10,
-        "max_query_fix": 2,
-        "query_fix_cnt": -1,
-        "sample_info": 5,
-        "llm_api": processed_input["llm_api"],
-    }
     # 초기 질문이 아닌 경우
     if processed_input["initial_question"] == 0:
         values = processed_input["last_snapshot_values"]
@@ -50,25 +91,31 @@ def llm_workflow(workflow_input: LLMWorkflowInput):
             -1
         ] += f"\n답변: {processed_input['user_question']}"
         values["llm_api"] = processed_input["llm_api"]
-        workflow.update_state(
+        await graph.aupdate_state(
             config,
             values,
             "additional_questions",
         )
-        outputs = workflow.invoke(
-            input=None,
-            config=config,
-            interrupt_before=["human_feedback"],
-        )
-    else:  # 초기 질문인 경우
-        # TODO
-        workflow = make_graph()
-        # 첫 번째 초기질문은 잘 작동하나 두번째 초기질문에서 GraphState가 초기화되지 않는 문제 발생
-        outputs = workflow.invoke(
-            input=inputs,
-            config=config,
-            interrupt_before=["human_feedback"],
-        )
+        return config, None
+
+    # 초기 질문인 경우: 같은 세션(thread_id)의 이전 대화 상태만 지우고 새 대화를 시작한다.
+    # (그래프와 checkpointer는 모든 대화가 공유하므로 다시 만들지 않는다)
+    await graph.checkpointer.adelete_thread(processed_input["thread_id"])
+    inputs = {
+        "user_question": processed_input["user_question"],
+        "context_cnt": 10,
+        "max_query_fix": 2,
+        "query_fix_cnt": -1,
+        "sample_info": SAMPLE_INFO,
+        "llm_api": processed_input["llm_api"],
+        "user_department": processed_input["user_department"],
+    }
+    return config, inputs
+
+
+def log_workflow_run(run, speculation, outputs: dict) -> None:
+    print("LLM 호출 횟수:", run.stats()["calls"])
+    print("노드별 소요 시간(ms):", speculation.stats()["node_ms"])
     # print(outputs)
     if "final_answer" in outputs and outputs["user_question_eval"] == "1":
         print(
@@ -77,22 +124,133 @@ def llm_workflow(workflow_input: LLMWorkflowInput):
                 outputs["table_contexts"], outputs["table_contexts_ids"]
             ),
         )
+
+
+@app.post("/llm_workflow")
+async def llm_workflow(workflow_input: LLMWorkflowInput):
+    processed_input = workflow_input.model_dump()
+    # 그래프 실행 한 번 동안 같은 입력의 LLM 호출은 한 번만 하고, 노드별 호출 횟수를 기록한다.
+    # 질문 평가와 동시에 미리 시작한 작업은 실행이 끝날 때 정리한다.
+    with llm_run(processed_input["thread_id"]) as run, speculative_run(
+        processed_input["thread_id"]
+    ) as speculation:
+        config, inputs = await start_workflow(workflow, processed_input)
+        outputs = await workflow.ainvoke(
+            input=inputs,
+            config=config,
+            interrupt_before=["human_feedback"],
+        )
+    log_workflow_run(run, speculation, outputs)
     return outputs
 
 
+@app.post("/llm_workflow/stream")
+async def llm_workflow_stream(workflow_input: LLMWorkflowInput):
+    """
+    /llm_workflow와 같은 그래프를 실행하면서 진행 상황을 server-sent events로 보냅니다.
+
+    - node: 노드가 끝날 때마다 (질문 평가, 선택한 테이블, 생성한 SQL, 검증 결과 등)
+    - token: 답변 노드의 LLM 출력 토큰
+    - end: 최종 그래프 상태 (/llm_workflow의 응답과 같음)
+    - error: 실행 중 오류
+    """
+    processed_input = workflow_input.model_dump()
+    queue: asyncio.Queue[str | None] = asyncio.Queue()
+    # 실행부터 최종 상태 조회까지 요청을 받은 시점의 그래프 하나만 사용한다.
+    graph = workflow
+
+    async def run_workflow():
+        try:
+            with llm_run(processed_input["thread_id"]) as run, speculative_run(
+                processed_input["thread_id"]
+            ) as speculation:
+                config, inputs = await start_workflow(graph, processed_input)
+                async for event in astream_workflow(
+                    graph, inputs, config, interrupt_before=["human_feedback"]
+                ):
+                    await queue.put(event)
+                outputs = (await graph.aget_state(config)).values
+            if not outputs.get("final_answer") and outputs.get("ask_user") != 1:
+                raise RuntimeError("그래프가 답변이나 추가 질문 없이 종료되었습니다.")
+            log_workflow_run(run, speculation, outputs)
+            await queue.put(format_sse("end", outputs))
+        except Exception as e:
+            print(f"그래프 스트리밍 중 오류 발생: {e}")
+            await queue.put(format_sse("error", {"message": str(e)}))
+        finally:
+            await queue.put(None)
+
+    async def events():
+        # 그래프는 별도 작업에서 실행하여, 클라이언트 연결이 끊기면 응답 생성과 함께 취소한다.
+        task = asyncio.create_task(run_workflow())
+        try:
+            while (event := await queue.get()) is not None:
+                yield event
+        finally:
+            task.cancel()
+
+    return StreamingResponse(
+        events(), media_type="text/event-stream", headers={"Cache-Control": "no-cache"}
+    )
+
+
 @app.post("/user_feedback")
-def user_feedback(feedback_input: UserFeedbackInput):
+async def user_feedback(feedback_input: UserFeedbackInput):
     processed_input = feedback_input.model_dump()
     feedback = processed_input["user_feedback"]
     config = get_runnable_config(30, processed_input["thread_id"])
-    snapshot = list(workflow.get_state_history(config))[0].values
+    snapshot = (await workflow.aget_state(config)).values
 
-    if snapshot["user_question_eval"] == "1":
-        save_conversation(snapshot, feedback)
+    # 대화 기록이 없는 thread_id(서버 재시작 등)면 저장하지 않는다.
+    if snapshot.get("user_question_eval") == "1":
+        # 로그 파일 잠금을 기다리는 동안 이벤트 루프가 멈추지 않도록 스레드에서 기록
+        await asyncio.to_thread(save_conversation, snapshot, feedback)
+        # 좋아요를 받은 검증된 SQL은 비슷한 질문에 재사용
+        # (질문 임베딩 API 호출이 있으므로 스레드에서 실행)
+        if feedback == 1 and await asyncio.to_thread(
+            cache_validated_query, snapshot, get_schema_retriever()
+        ):
+            print("question-SQL cache stored.")
     else:
         print("simple conversation would not be saved.")
 
 
+@app.get("/metrics")
+def metrics():
+    return {
+        "schema_index": get_schema_retriever().stats(),
+        "prompt_registry": get_prompt_registry().stats(),
+        "db_pool": get_pool_stats(),
+        "query_result_cache": cache.stats() if (cache := get_result_cache()) else None,
+        "question_classifier": (
+            classifier.stats() if (classifier := get_question_classifier()) else None
+        ),
+        "question_cache": (
+            question_cache.stats() if (question_cache := get_question_cache()) else None
+        ),
+        "llm_calls": get_llm_call_stats(),
+        "speculation": get_speculation_stats(),
+        "query_candidates": get_query_candidates_stats(),
+    }
+
+
+@app.post("/schema_index/rebuild")
+def schema_index_rebuild():
+    # 서비스 중단 없이 백그라운드에서 새 인덱스 버전을 만들어 교체한다.
+    started = rebuild_schema_index(SAMPLE_INFO)
+    return {"started": started}
+
+
+@app.post("/schema_index/rollback")
+def schema_index_rollback():
+    try:
+        version = rollback_schema_index()
+    except ValueError as e:
+        # 발행된 버전이 없거나 되돌릴 이전 버전이 없음
+        raise HTTPException(status_code=404, detail=str(e))
+    return {"version": version}
+
+
 if __name__ == "__main__":
     load_dotenv(override=True)
     uvicorn.run("main:app", host="0.0.0.0", port=8000, reload=False)
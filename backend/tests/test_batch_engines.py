@@ -0,0 +1,36 @@
+import sqlite3
+from concurrent.futures import ThreadPoolExecutor
+
+from sqlalchemy import text
+
+from langgraph_.db_engine import BatchEngines
+
+TABLES_BY_DB = {"a": ["t1", "t2", "t3"], "b": ["t1"]}
+
+
+def count_rows(engine, table_name):
+    with engine.connect() as connection:
+        return connection.execute(text(f"SELECT COUNT(*) FROM {table_name}")).scalar()
+
+
+def test_engine_is_disposed_after_last_table(tmp_path):
+    for db_name, tables in TABLES_BY_DB.items():
+        connection = sqlite3.connect(tmp_path / db_name)
+        for table in tables:
+            connection.execute(f"CREATE TABLE {table} (id INTEGER)")
+        connection.close()
+
+    with (
+        BatchEngines(f"sqlite:///{tmp_path}", TABLES_BY_DB, 2) as engines,
+        ThreadPoolExecutor(max_workers=2) as executor,
+    ):
+        assert engines.run("b", count_rows, "t1") == 0
+        # b의 테이블을 모두 처리했으므로 엔진(과 커넥션)이 남아 있지 않다.
+        assert list(engines._engines) == []
+
+        futures = [
+            executor.submit(engines.run, "a", count_rows, table)
+            for table in TABLES_BY_DB["a"]
+        ]
+        assert [future.result() for future in futures] == [0, 0, 0]
+        assert list(engines._engines) == []
@@ -0,0 +1,47 @@
+import csv
+
+from langgraph_.question_classifier import load_labeled_questions
+from langgraph_.utils import FEEDBACK_LOG_HEADER, save_conversation
+
+SNAPSHOT = {
+    "user_question": "지역별 매출",
+    "collected_questions": [],
+    "table_contexts": ["CREATE TABLE shop.orders (id INT)"],
+    "table_contexts_ids": [0],
+    "sql_query": "SELECT 1",
+    "query_result": "1",
+    "final_answer": "답변",
+}
+
+
+def read_rows(path):
+    with open(path, newline="", encoding="utf-8") as f:
+        return list(csv.DictReader(f))
+
+
+def test_rotates_file_when_header_changed(tmp_path, monkeypatch):
+    monkeypatch.setenv("LOG_DIR", str(tmp_path))
+    save_conversation(SNAPSHOT, 1)
+    (path,) = tmp_path.glob("user_feedback_*.csv")
+    # sql_query 컬럼이 생기기 전 버전이 같은 날 만든 파일
+    old_header = [name for name in FEEDBACK_LOG_HEADER if name != "sql_query"]
+    path.write_text(",".join(old_header) + "\n", encoding="utf-8")
+
+    save_conversation(SNAPSHOT, 1)
+    save_conversation(SNAPSHOT, 0)
+
+    assert read_rows(path) == []
+    (rotated,) = set(tmp_path.glob("user_feedback_*.csv")) - {path}
+    assert rotated.name.endswith("_2.csv")
+    rows = read_rows(rotated)
+    assert [row["feedback"] for row in rows] == ["1", "0"]
+    assert rows[0]["sql_query"] == "SELECT 1"
+
+
+def test_classifier_trains_on_original_question(tmp_path, monkeypatch):
+    monkeypatch.setenv("LOG_DIR", str(tmp_path))
+    save_conversation({**SNAPSHOT, "original_question": "매출 알려줘"}, 1)
+
+    assert load_labeled_questions(str(tmp_path)) == [
+        {"question": "매출 알려줘", "label": "1", "source": "feedback"}
+    ]
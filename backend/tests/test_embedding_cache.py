@@ -0,0 +1,85 @@
+from typing import List
+
+import numpy as np
+import pytest
+from langchain_core.embeddings import DeterministicFakeEmbedding
+
+from langgraph_.embedding_cache import CachedEmbeddings, make_cache_key
+from langgraph_.faiss_init import get_embeddings
+
+
+class RecordingEmbedding(DeterministicFakeEmbedding):
+    """실제로 임베딩 요청된 문서 배치를 기록하는 가짜 임베딩입니다."""
+
+    batches: List[List[str]] = []
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        self.batches.append(list(texts))
+        return super().embed_documents(texts)
+
+
+@pytest.fixture
+def embedder():
+    return RecordingEmbedding(size=8, batches=[])
+
+
+@pytest.fixture
+def cache(tmp_path, embedder):
+    return CachedEmbeddings(
+        embedder, "fake", cache_path=str(tmp_path / "cache.sqlite"), batch_size=2
+    )
+
+
+def test_cache_key_is_stable():
+    key = make_cache_key("fake", "CREATE TABLE shop.orders (id INT)")
+    assert key == make_cache_key("fake", "CREATE TABLE shop.orders (id INT)")
+    assert key != make_cache_key("fake", "CREATE TABLE shop.orders (id BIGINT)")
+    assert key != make_cache_key("other", "CREATE TABLE shop.orders (id INT)")
+
+
+def test_get_embeddings_uses_fake_model(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setenv("EMBEDDING_MODEL", "fake")
+    embeddings = get_embeddings()
+    vector = embeddings.embed_documents(["a"])[0]
+    # 다시 만들어도 디스크 캐시에서 같은 벡터를 읽는다.
+    again = get_embeddings()
+    assert np.allclose(again.embed_documents(["a"])[0], vector)
+    assert again.stats()["hits"] == 1
+
+
+def test_only_misses_are_embedded_in_batches(cache, embedder):
+    cache.embed_documents(["a", "b"])
+    embedder.batches.clear()
+
+    vectors = cache.embed_documents(["a", "c", "d", "c", "e", "b"])
+
+    # 캐시에 없는 c, d, e만 중복 없이 batch_size(2)씩 요청
+    assert embedder.batches == [["c", "d"], ["e"]]
+    assert len(vectors) == 6
+    assert np.allclose(vectors[1], vectors[3])
+    assert np.allclose(vectors[0], embedder.embed_documents(["a"])[0], atol=1e-6)
+
+
+def test_hit_and_miss_counts(cache):
+    cache.embed_documents(["a", "b", "a"])
+    assert cache.stats() == {"hits": 0, "misses": 2, "hit_rate": 0.0}
+
+    # 같은 문서가 여러 번 있어도 적중은 한 번으로 센다.
+    cache.embed_documents(["a", "b", "a", "c", "a"])
+    assert cache.stats() == {"hits": 2, "misses": 3, "hit_rate": 0.4}
+
+
+def test_embed_query_is_not_cached(cache, embedder):
+    cache.embed_query("question")
+    assert cache.stats()["misses"] == 0
+    assert embedder.batches == []
+
+
+def test_evict_unreferenced(cache, embedder):
+    cache.embed_documents(["a", "b", "c"])
+
+    assert cache.evict_unreferenced(["a", "c"]) == 1
+    embedder.batches.clear()
+    cache.embed_documents(["a", "b", "c"])
+    assert embedder.batches == [["b"]]
@@ -0,0 +1,83 @@
+import os
+
+import pytest
+
+from langgraph_ import faiss_init
+from langgraph_.join_graph import JoinGraph
+from langgraph_.index_store import version_path
+from langgraph_.sharded_store import SHARDS_DIR, SEARCH_INDEX_FILE
+
+TABLES = [f"shop.t{i}" for i in range(30)]
+STATES = {
+    key: {
+        "db": key.split(".")[0],
+        "table": key.split(".")[1],
+        "fingerprint": key,
+        "create_time": "2026-01-01",
+        "update_time": None,
+    }
+    for key in TABLES
+}
+
+
+class NoSamples:
+    """샘플 행을 조회하지 않는 SampleRowStore 대용입니다."""
+
+    def refresh(self, DB_SERVER, table_states, sample_info):
+        return []
+
+    def get(self, keys):
+        return {}
+
+    def stats(self):
+        return {}
+
+
+def extract_table_docs(DB_SERVER, tables_by_db, sample_info, samples):
+    texts, metadatas, ids = [], [], []
+    for db_name, tables in tables_by_db.items():
+        for table in tables:
+            texts.append(f"CREATE TABLE {db_name}.{table} (id INT)")
+            metadatas.append({"db": db_name, "table": table})
+            ids.append(f"{db_name}.{table}")
+    return texts, metadatas, ids
+
+
+@pytest.fixture
+def embed(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setenv("EMBEDDING_MODEL", "fake")
+    monkeypatch.setenv("FAISS_MIN_ANN_SIZE", "1")
+    monkeypatch.setattr(faiss_init, "get_table_states", lambda engine, dbs: STATES)
+    monkeypatch.setattr(faiss_init, "SampleRowStore", NoSamples)
+    monkeypatch.setattr(faiss_init, "extract_table_docs", extract_table_docs)
+    monkeypatch.setattr(faiss_init, "build_join_graph", lambda engine, dbs: JoinGraph())
+    return lambda: faiss_init.embed_db_info(["shop"], "", 0, None)
+
+
+def has_search_index(version):
+    return os.path.exists(
+        os.path.join(
+            version_path(faiss_init.LOCAL_FAISS_PATH, version),
+            SHARDS_DIR,
+            "shop",
+            SEARCH_INDEX_FILE,
+        )
+    )
+
+
+def test_index_config_change_builds_new_version(embed, monkeypatch):
+    version = embed()
+    assert embed() == version
+    assert not has_search_index(version)
+
+    # 테이블이 그대로여도 인덱스 종류가 바뀌면 새 버전을 만든다.
+    monkeypatch.setenv("FAISS_INDEX_TYPE", "hnsw")
+    hnsw_version = embed()
+    assert hnsw_version != version
+    assert has_search_index(hnsw_version)
+    assert embed() == hnsw_version
+
+    # 검색 시점에 적용되는 설정은 다시 만들 필요가 없다.
+    monkeypatch.setenv("FAISS_EF_SEARCH", "128")
+    assert embed() == hnsw_version
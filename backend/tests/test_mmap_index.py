@@ -0,0 +1,38 @@
+import numpy as np
+import pytest
+
+from langgraph_.mmap_index import MmapFlatIndex
+
+
+@pytest.fixture
+def vectors(tmp_path):
+    rng = np.random.default_rng(0)
+    path = tmp_path / "vectors.npy"
+    np.save(path, rng.standard_normal((200, 16), dtype=np.float32))
+    return str(path)
+
+
+def test_search_matches_exact_l2(vectors):
+    index = MmapFlatIndex.load(vectors)
+    assert isinstance(index.vectors, np.memmap)
+
+    queries = np.random.default_rng(1).standard_normal((3, 16), dtype=np.float32)
+    distances, indices = index.search(queries, 5)
+
+    exact = ((np.load(vectors)[None] - queries[:, None]) ** 2).sum(-1)
+    expected = np.argsort(exact, axis=1)[:, :5]
+    assert (indices == expected).all()
+    assert np.allclose(distances, np.take_along_axis(exact, expected, 1), rtol=1e-4)
+
+
+def test_search_pads_missing_results(vectors):
+    # faiss처럼 벡터 수보다 많이 요청하면 나머지는 -1
+    index = MmapFlatIndex(np.load(vectors)[:2])
+    _, indices = index.search(np.zeros((1, 16), dtype=np.float32), 4)
+    assert sorted(indices[0][:2]) == [0, 1]
+    assert list(indices[0][2:]) == [-1, -1]
+
+
+def test_reconstruct_n(vectors):
+    index = MmapFlatIndex.load(vectors)
+    assert np.array_equal(index.reconstruct_n(10, 3), np.load(vectors)[10:13])
@@ -0,0 +1,113 @@
+import pytest
+
+from langgraph_.query_guard import (
+    add_limit,
+    add_max_execution_time,
+    bound_rows,
+    strip_comments,
+)
+
+
+@pytest.mark.parametrize(
+    "sql_query, expected",
+    [
+        ("SELECT a FROM db.t", "SELECT a FROM db.t LIMIT 101"),
+        # 기존 LIMIT이 더 작으면 그대로, 더 크면 줄인다.
+        ("SELECT a FROM db.t LIMIT 5", "SELECT a FROM db.t LIMIT 5"),
+        ("SELECT a FROM db.t LIMIT 5000", "SELECT a FROM db.t LIMIT 101"),
+        ("SELECT a FROM db.t LIMIT 10, 5000", "SELECT a FROM db.t LIMIT 10, 101"),
+        (
+            "SELECT a FROM db.t LIMIT 5000 OFFSET 10",
+            "SELECT a FROM db.t LIMIT 101 OFFSET 10",
+        ),
+        ("SELECT a FROM db.t LIMIT 5;", "SELECT a FROM db.t LIMIT 5;"),
+        # 끝의 주석 때문에 LIMIT이 주석 처리되지 않는다.
+        ("SELECT a FROM db.t -- 전체", "SELECT a FROM db.t LIMIT 101"),
+        # MySQL 문법을 다른 표현으로 바꾸지 않는다.
+        (
+            "SELECT a FROM db.t WHERE a REGEXP '^x' AND MOD(b, 2) = 0",
+            "SELECT a FROM db.t WHERE a REGEXP '^x' AND MOD(b, 2) = 0 LIMIT 101",
+        ),
+        (
+            "SELECT CONVERT(a USING utf8mb4) FROM db.t LIMIT 5000",
+            "SELECT CONVERT(a USING utf8mb4) FROM db.t LIMIT 101",
+        ),
+        (
+            "WITH x AS (SELECT a FROM db.t) SELECT a FROM x",
+            "WITH x AS (SELECT a FROM db.t) SELECT a FROM x LIMIT 101",
+        ),
+        (
+            "SELECT a FROM db.t UNION ALL SELECT b FROM db.u",
+            "SELECT a FROM db.t UNION ALL SELECT b FROM db.u LIMIT 101",
+        ),
+        (
+            "SELECT /*+ MAX_EXECUTION_TIME(1000) */ a FROM db.t",
+            "SELECT /*+ MAX_EXECUTION_TIME(1000) */ a FROM db.t LIMIT 101",
+        ),
+    ],
+)
+def test_bound_rows(sql_query, expected):
+    assert bound_rows(sql_query, 101) == expected
+
+
+@pytest.mark.parametrize(
+    "sql_query, expected",
+    [
+        ("SELECT a FROM db.t", "SELECT a FROM db.t LIMIT 10"),
+        ("SELECT a FROM db.t LIMIT 5", "SELECT a FROM db.t LIMIT 5"),
+        # 끝의 주석을 지운 뒤에 붙이므로 LIMIT이 주석 처리되지 않는다.
+        ("SELECT a FROM db.t -- 전체 조회", "SELECT a FROM db.t LIMIT 10"),
+        ("SELECT a FROM db.t LIMIT 5 # 상위 5개", "SELECT a FROM db.t LIMIT 5"),
+        ("SELECT '-- x' AS a FROM db.t", "SELECT '-- x' AS a FROM db.t LIMIT 10"),
+    ],
+)
+def test_add_limit_after_strip_comments(sql_query, expected):
+    assert add_limit(strip_comments(sql_query), 10) == expected
+
+
+def test_strip_comments_keeps_optimizer_hints():
+    assert (
+        strip_comments("SELECT /*+ BKA(t) */ a /* 설명 */ FROM db.t")
+        == "SELECT /*+ BKA(t) */ a   FROM db.t"
+    )
+
+
+@pytest.mark.parametrize(
+    "sql_query, expected",
+    [
+        (
+            "SELECT a FROM db.t",
+            "SELECT /*+ MAX_EXECUTION_TIME(500) */ a FROM db.t",
+        ),
+        # CTE 목록 뒤의 최상위 SELECT에 붙인다.
+        (
+            "WITH x AS (SELECT a FROM db.t) SELECT a FROM x",
+            "WITH x AS (SELECT a FROM db.t) SELECT /*+ MAX_EXECUTION_TIME(500) */ a FROM x",
+        ),
+        (
+            "SELECT a FROM db.t UNION SELECT b FROM db.u",
+            "SELECT /*+ MAX_EXECUTION_TIME(500) */ a FROM db.t UNION SELECT b FROM db.u",
+        ),
+        (
+            "SELECT /*+ BKA(t) */ a FROM db.t",
+            "SELECT /*+ BKA(t) MAX_EXECUTION_TIME(500) */ a FROM db.t",
+        ),
+        (
+            "SELECT /*+ MAX_EXECUTION_TIME(100) */ a FROM db.t",
+            "SELECT /*+ MAX_EXECUTION_TIME(100) */ a FROM db.t",
+        ),
+        # 리터럴 안의 SELECT는 건너뛰고, MySQL 문법은 그대로 둔다.
+        (
+            "select 'SELECT' AS a FROM db.t WHERE a REGEXP '^x' AND MOD(b, 2) = 0",
+            "select /*+ MAX_EXECUTION_TIME(500) */ 'SELECT' AS a FROM db.t "
+            "WHERE a REGEXP '^x' AND MOD(b, 2) = 0",
+        ),
+        (
+            "WITH x AS (SELECT CONVERT(a USING utf8mb4) AS a FROM db.t)\nSELECT a FROM x",
+            "WITH x AS (SELECT CONVERT(a USING utf8mb4) AS a FROM db.t)\n"
+            "SELECT /*+ MAX_EXECUTION_TIME(500) */ a FROM x",
+        ),
+    ],
+)
+def test_add_max_execution_time(sql_query, expected):
+    assert add_max_execution_time(sql_query, 500) == expected
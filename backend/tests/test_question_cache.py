@@ -0,0 +1,62 @@
+import pytest
+
+from langgraph_.question_cache import QuestionCache, literal_tokens
+
+# 임베딩은 값만 다른 질문을 거의 같게 보므로, 모든 질문에 같은 벡터를 쓴다.
+VECTOR = [0.6, 0.8, 0.0]
+ENTRY = {"sql_query": "SELECT 1", "table_contexts": [], "table_contexts_ids": []}
+
+
+@pytest.fixture
+def cache(tmp_path):
+    cache = QuestionCache(str(tmp_path / "question_cache.sqlite"))
+    cache.add({"2023년 지역별 매출 합계": VECTOR}, "v1", None, ENTRY)
+    cache.add({"'서울' 지점의 지난달 매출": VECTOR}, "v1", None, ENTRY)
+    return cache
+
+
+def lookup(cache, question):
+    return cache.lookup(question, VECTOR, "v1", None, 0.95)
+
+
+def test_literal_tokens():
+    assert literal_tokens("'서울' 지점의 2024-01-01 매출 top 10") == [
+        "'서울'",
+        "10",
+        "2024-01-01",
+    ]
+    assert literal_tokens("지난 달 매출") == ["지난달"]
+    assert literal_tokens("지역별 매출 합계") == []
+
+
+@pytest.mark.parametrize(
+    "question",
+    [
+        "2023년 지역별 매출 합계",
+        "2023년 지역별 매출 총합",
+        "'서울' 지점의 지난 달 매출",
+    ],
+)
+def test_reuses_question_with_same_values(cache, question):
+    assert lookup(cache, question)["sql_query"] == "SELECT 1"
+
+
+@pytest.mark.parametrize(
+    "question",
+    [
+        "2024년 지역별 매출 합계",
+        "지역별 매출 합계",
+        "'부산' 지점의 지난달 매출",
+        "'서울' 지점의 이번 달 매출",
+    ],
+)
+def test_rejects_question_with_different_values(cache, question):
+    assert lookup(cache, question) is None
+    assert cache.stats()["literal_mismatches"] == 1
+
+
+def test_has_candidates_only_for_same_department(cache):
+    assert cache.has_candidates("v1", None)
+    assert not cache.has_candidates("v1", "영업팀")
+    assert not cache.has_candidates("v2", None)
+    assert cache.stats()["misses"] == 2
@@ -0,0 +1,71 @@
+import pytest
+from sqlalchemy import create_engine
+
+from langgraph_.result_cache import QueryResultCache, extract_table_keys, normalize_sql
+
+
+@pytest.mark.parametrize(
+    "sql_query, expected",
+    [
+        ("SELECT * FROM shop.a, shop.b WHERE a.id = b.id", ["shop.a", "shop.b"]),
+        (
+            "SELECT * FROM shop.a a, shop.b AS b JOIN shop.c ON b.id = c.id",
+            ["shop.a", "shop.b", "shop.c"],
+        ),
+        (
+            "SELECT * FROM shop.a WHERE id IN (SELECT id FROM `other`.`t`)",
+            ["other.t", "shop.a"],
+        ),
+        # CTE 이름은 테이블이 아니다.
+        (
+            "WITH x AS (SELECT * FROM shop.a) SELECT * FROM x, shop.b",
+            ["shop.a", "shop.b"],
+        ),
+        # 변경 여부를 확인할 수 없는 쿼리
+        ("SELECT * FROM a", None),
+        ("SELECT * FROM shop.a, b", None),
+        ("SELECT 1", None),
+    ],
+)
+def test_extract_table_keys(sql_query, expected):
+    assert extract_table_keys(sql_query) == expected
+
+
+@pytest.fixture
+def connection():
+    with create_engine("sqlite://").connect() as connection:
+        yield connection
+
+
+def test_normalize_sql_keeps_identifier_case():
+    assert normalize_sql("SELECT COUNT(*) FROM db.Users u -- 전체\n;") == normalize_sql(
+        "select count( * )\nfrom db.Users u"
+    )
+    # MySQL 테이블 이름과 별칭은 대소문자를 구분한다.
+    assert normalize_sql("SELECT * FROM db.Users") != normalize_sql(
+        "SELECT * FROM db.users"
+    )
+    assert normalize_sql("SELECT U.id FROM db.t U") != normalize_sql(
+        "SELECT u.id FROM db.t u"
+    )
+
+
+def test_caches_only_queries_with_known_tables(connection):
+    cache = QueryResultCache()
+    calls = []
+
+    def execute(sql_query):
+        calls.append(sql_query)
+        return {"query_result": "ok"}
+
+    for _ in range(2):
+        cache.get_or_execute("SELECT * FROM shop.a, shop.b", execute, None, connection)
+        cache.get_or_execute("SELECT * FROM a", execute, None, connection)
+
+    assert calls == [
+        "SELECT * FROM shop.a, shop.b",
+        "SELECT * FROM a",
+        "SELECT * FROM a",
+    ]
+    assert cache.stats()["hits"] == 1
+    assert cache.stats()["uncacheable"] == 2
@@ -0,0 +1,97 @@
+import pytest
+from sqlalchemy import create_engine
+
+from langgraph_.context_pruning import count_tokens
+from langgraph_.result_format import ResultCollector
+from langgraph_.task import get_query_result, stream_query_result
+from langgraph_.utils import EmptyQueryResultError, NullQueryResultError
+
+
+def collect(rows, head_rows=50, tail_rows=50):
+    collector = ResultCollector(["id", "name"], head_rows, tail_rows)
+    for row in rows:
+        collector.add(row)
+    return collector
+
+
+ROWS = [(i, f"name_{i}") for i in range(100)]
+
+
+def test_small_result_is_plain_table():
+    result, stats = collect(ROWS[:3]).serialize(token_budget=1000)
+
+    assert result.splitlines() == [
+        "| id | name |",
+        "| --- | --- |",
+        "| 0 | name_0 |",
+        "| 1 | name_1 |",
+        "| 2 | name_2 |",
+    ]
+    assert stats == {
+        "kept": 3,
+        "dropped": 0,
+        "exhausted": True,
+        "tokens": count_tokens(result),
+    }
+
+
+@pytest.mark.parametrize("token_budget", [200, 400])
+def test_large_result_is_cut_to_token_budget(token_budget):
+    result, stats = collect(ROWS).serialize(token_budget)
+
+    assert result.startswith("(총 100개 행. 컬럼 요약과 일부 행만 표시)")
+    assert stats["tokens"] <= token_budget
+    assert 0 < stats["kept"] < 100
+    assert stats["kept"] + stats["dropped"] == 100
+    # 앞/뒤 행을 번갈아 남기고, 사이에 생략 표시
+    lines = result.splitlines()
+    marker = lines.index(f"| ... {stats['dropped']}개 행 생략 ... |  |")
+    assert lines[marker - 1].startswith("| ")
+    assert lines[marker + 1].startswith("| ")
+    assert "| 0 | name_0 |" in lines[:marker]
+    assert lines[-1] == "| 99 | name_99 |"
+
+
+def test_unfinished_scan_is_marked():
+    # 모든 행을 읽지 않았으면 예산이 남아도 요약과 함께 "이상"으로 표시
+    result, stats = collect(ROWS[:3]).serialize(token_budget=1000, exhausted=False)
+
+    assert result.startswith("(총 3개 행 이상. 컬럼 요약과 일부 행만 표시)")
+    assert stats["exhausted"] is False
+    assert stats["dropped"] == 0
+
+
+def test_dropped_middle_rows_are_counted():
+    # 보관하지 않은 중간 행도 생략한 행 수에 들어간다.
+    result, stats = collect(ROWS, head_rows=2, tail_rows=2).serialize(1000)
+
+    assert stats == {
+        "kept": 4,
+        "dropped": 96,
+        "exhausted": True,
+        "tokens": count_tokens(result),
+    }
+    assert "| ... 96개 행 생략 ... |  |" in result
+
+
+@pytest.fixture
+def connection():
+    with create_engine("sqlite://").connect() as connection:
+        connection.exec_driver_sql("CREATE TABLE t (a INTEGER, b TEXT)")
+        yield connection
+
+
+def test_empty_result_raises(connection):
+    with pytest.raises(EmptyQueryResultError):
+        stream_query_result("SELECT a, b FROM t", connection=connection)
+
+
+def test_null_result_raises(connection):
+    connection.exec_driver_sql("INSERT INTO t VALUES (NULL, NULL)")
+    with pytest.raises(NullQueryResultError):
+        stream_query_result("SELECT a, b FROM t", connection=connection)
+
+
+def test_stream_result_always_includes_columns():
+    with pytest.raises(ValueError):
+        get_query_result("SELECT 1", fetch="stream")
@@ -0,0 +1,52 @@
+from langchain_core.embeddings import DeterministicFakeEmbedding
+
+from langgraph_.sharded_store import ShardedVectorStore
+
+# 점이 들어간 데이터베이스 이름: "shop.v2.orders"는 shop.v2 데이터베이스의 orders 테이블
+DOCS = [
+    ("shop", "orders"),
+    ("shop.v2", "orders"),
+    ("shop.v2", "users"),
+]
+
+
+def make_store():
+    return ShardedVectorStore.from_texts(
+        texts=[f"CREATE TABLE {db}.{table} (id INT)" for db, table in DOCS],
+        embedding=DeterministicFakeEmbedding(size=8),
+        metadatas=[{"db": db, "table": table} for db, table in DOCS],
+        ids=[f"{db}.{table}" for db, table in DOCS],
+    )
+
+
+def test_routes_documents_by_metadata_db(tmp_path):
+    store = make_store()
+    docs = store.get_documents(["shop.v2.orders", "shop.orders", "shop.v2.missing"])
+    assert [doc.metadata for doc in docs] == [
+        {"db": "shop.v2", "table": "orders"},
+        {"db": "shop", "table": "orders"},
+    ]
+
+    # 저장한 뒤 다시 불러와도 shard를 찾는다.
+    store.save_local(str(tmp_path))
+    loaded = ShardedVectorStore.load_local(
+        str(tmp_path), DeterministicFakeEmbedding(size=8), search_only=True
+    )
+    assert [doc.page_content for doc in loaded.get_documents(["shop.v2.users"])] == [
+        "CREATE TABLE shop.v2.users (id INT)"
+    ]
+
+
+def test_delete_routes_by_metadata_db():
+    store = make_store()
+    store.delete(["shop.v2.orders"])
+
+    assert store.shards["shop"].index.ntotal == 1
+    assert store.shards["shop.v2"].index.ntotal == 1
+    assert store.get_documents(["shop.v2.orders"]) == []
+
+    store.delete(["shop.v2.users"])
+    assert "shop.v2" not in store.shards
+    assert [doc.metadata["db"] for doc in store.get_documents(["shop.orders"])] == [
+        "shop"
+    ]
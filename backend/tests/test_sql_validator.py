@@ -0,0 +1,66 @@
+import pytest
+
+from langgraph_.schema_catalog import SchemaCatalog
+from langgraph_.sql_validator import validate_sql
+from langgraph_.utils import SqlValidationError
+
+CATALOG = SchemaCatalog(
+    {
+        "shop.customers": ["id", "name"],
+        "shop.orders": ["id", "customer_id", "amount"],
+    }
+)
+
+
+@pytest.mark.parametrize(
+    "sql_query",
+    [
+        # IN / NOT IN 서브쿼리의 컬럼은 서브쿼리의 테이블에서 찾는다.
+        "SELECT name FROM shop.customers WHERE id IN "
+        "(SELECT customer_id FROM shop.orders WHERE amount > 10)",
+        "SELECT name FROM shop.customers WHERE id NOT IN "
+        "(SELECT customer_id FROM shop.orders)",
+        # 스칼라 서브쿼리
+        "SELECT name, (SELECT MAX(amount) FROM shop.orders o "
+        "WHERE o.customer_id = c.id) AS max_amount FROM shop.customers c",
+        "SELECT name, (SELECT COUNT(*) FROM shop.orders) AS total FROM shop.customers",
+        # 상관 EXISTS (별칭 없는 바깥 테이블 컬럼 포함)
+        "SELECT name FROM shop.customers c WHERE EXISTS "
+        "(SELECT 1 FROM shop.orders WHERE customer_id = c.id)",
+        "SELECT id FROM shop.customers c WHERE EXISTS "
+        "(SELECT 1 FROM shop.orders WHERE name = 'kim')",
+        "WITH t AS (SELECT customer_id, SUM(amount) AS s FROM shop.orders "
+        "GROUP BY customer_id) SELECT c.name, t.s FROM shop.customers c "
+        "JOIN t ON t.customer_id = c.id",
+        "SELECT name AS n FROM shop.customers ORDER BY n",
+        "SELECT Name FROM SHOP.Customers",
+    ],
+)
+def test_valid_queries(sql_query):
+    validate_sql(sql_query, CATALOG)
+
+
+@pytest.mark.parametrize(
+    "sql_query, message",
+    [
+        (
+            "SELECT namex FROM shop.customers",
+            "'namex' does not exist in shop.customers",
+        ),
+        (
+            "SELECT o.amountx FROM shop.orders o",
+            "'o.amountx' does not exist in shop.orders",
+        ),
+        (
+            "SELECT name FROM shop.customers WHERE id IN "
+            "(SELECT customer_idx FROM shop.orders)",
+            "'customer_idx' does not exist in shop.orders",
+        ),
+        ("SELECT id FROM shop.nope", "table 'shop.nope' does not exist"),
+        ("SELECT id FROM customers", "must be qualified"),
+    ],
+)
+def test_invalid_queries(sql_query, message):
+    with pytest.raises(SqlValidationError) as error:
+        validate_sql(sql_query, CATALOG)
+    assert message in error.value._message()
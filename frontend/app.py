@@ -4,12 +4,29 @@ from mysql.connector import Error
 import bcrypt
 from dotenv import load_dotenv
 import os
+import json
 import requests
 import threading
 import time
 
 load_dotenv()
 API_URL = f"http://{os.getenv('BACKEND_HOST')}:8000/llm_workflow"
+# 노드 진행 상황과 답변 토큰을 server-sent events로 받는 엔드포인트
+STREAM_API_URL = f"{API_URL}/stream"
+
+# 진행 상황에 표시할 노드 이름
+NODE_LABELS = {
+    "question_cache": "질문-SQL 캐시 조회",
+    "question_evaluation": "질문 평가",
+    "general_conversation": "일반 대화",
+    "question_analysis": "질문 분석",
+    "additional_questions": "추가 질문 확인",
+    "question_refinement": "질문 구체화",
+    "table_selection": "테이블 선택",
+    "sql_query_generation": "SQL 쿼리 생성",
+    "sql_query_validation": "SQL 쿼리 검증",
+    "response": "답변 생성",
+}
 
 st.set_page_config(page_title="SQL Query Generator", page_icon="🔒", layout="wide")
 
@@ -195,6 +212,47 @@ def register_user(username, password, department, role):
             conn.close()
 
 
+def iter_sse_events(response):
+    """백엔드의 server-sent events 응답을 (event, data) 순서대로 읽습니다."""
+    event, data = None, []
+    for line in response.iter_lines():
+        line = line.decode("utf-8")
+        if not line:
+            if event is not None:
+                yield event, json.loads("\n".join(data))
+            event, data = None, []
+        elif line.startswith("event:"):
+            event = line[len("event:") :].strip()
+        elif line.startswith("data:"):
+            data.append(line[len("data:") :].strip())
+
+
+def describe_node_event(event):
+    """노드 진행 이벤트를 화면에 보여줄 문장으로 바꿉니다."""
+    node = event["node"]
+    label = NODE_LABELS.get(node, node)
+    if node == "question_cache" and event.get("question_cache_hit"):
+        return f"{label}: 이전에 검증된 SQL을 재사용합니다"
+    if node == "question_evaluation":
+        kind = "데이터 질문" if event.get("user_question_eval") == "1" else "일반 대화"
+        return f"{label}: {kind}"
+    if node == "table_selection":
+        return f"{label}: {', '.join(event.get('tables', [])) or '없음'}"
+    if node == "sql_query_generation":
+        return f"{label}:\n```sql\n{event.get('sql_query', '')}\n```"
+    if node == "sql_query_validation" and event.get("flow_status") != "KEEP":
+        return f"{label}: 실패, 다시 시도합니다 ({event.get('error_msg', '')})"
+    return f"{label} 완료"
+
+
+def show_error(error_message):
+    st.error(error_message)
+    st.chat_message("assistant").write(error_message)
+    st.session_state.conversation_history.append(
+        {"role": "assistant", "content": error_message}
+    )
+
+
 def process_chat(prompt, llm_api):
     st.chat_message("user").write(prompt)
     st.session_state.conversation_history.append({"role": "user", "content": prompt})
@@ -211,50 +269,76 @@ def process_chat(prompt, llm_api):
     #     return
 
     try:
+        # 전체 과정이 끝날 때까지 기다리지 않고 노드 진행 상황과 답변 토큰을 받는 대로 보여준다.
         response = requests.post(
-            API_URL,
+            STREAM_API_URL,
             json={
                 "user_question": prompt,
                 "initial_question": st.session_state.initial_question,
                 "thread_id": st.session_state.thread_id,
                 "last_snapshot_values": st.session_state.snapshot_values,
                 "llm_api": llm_api,
+                "user_department": st.session_state.user["department"],
             },
+            stream=True,
         )
 
-        if response.status_code == 200:
-            processed_info = response.json()
-            st.session_state.snapshot_values = processed_info
-            ask_user = processed_info.get("ask_user", 0)
-            st.session_state.initial_question = 0
-
-            output = (
-                processed_info["final_answer"]
-                if ask_user == 0
-                else processed_info["collected_questions"][-1]
-            )
-            st.session_state.initial_question = 1 if ask_user == 0 else 0
-
-            st.chat_message("assistant").write(output)
-            if ask_user == 0:
-                st.session_state.is_end = 1
-            st.session_state.conversation_history.append(
-                {"role": "assistant", "content": output}
-            )
-        else:
-            error_message = "서버 처리 중 오류가 발생했습니다."
-            st.error(error_message)
-            st.chat_message("assistant").write(error_message)
-            st.session_state.conversation_history.append(
-                {"role": "assistant", "content": error_message}
-            )
-    except requests.exceptions.RequestException as e:
-        error_message = f"서버 연결 오류: {str(e)}"
-        st.error(error_message)
-        st.chat_message("assistant").write(error_message)
+        if response.status_code != 200:
+            show_error("서버 처리 중 오류가 발생했습니다.")
+            return
+
+        processed_info = None
+        with st.chat_message("assistant"):
+            status = st.status("질문을 처리하는 중입니다...")
+            answer_placeholder = st.empty()
+            answer = ""
+            for event, data in iter_sse_events(response):
+                if event == "node":
+                    progress = describe_node_event(data)
+                    status.write(progress)
+                    status.update(label=progress.split("\n")[0])
+                elif event == "token":
+                    answer += data["content"]
+                    answer_placeholder.markdown(answer + "▌")
+                elif event == "end":
+                    # 최종 답변이나 추가 질문이 없는 상태는 처리 실패로 본다.
+                    if data.get("final_answer") or (
+                        data.get("ask_user") == 1 and data.get("collected_questions")
+                    ):
+                        processed_info = data
+                    else:
+                        print(f"답변 없이 종료된 응답: {data}")
+                elif event == "error":
+                    print(f"서버 처리 중 오류: {data['message']}")
+
+            if processed_info is None:
+                status.update(label="처리 중 오류가 발생했습니다.", state="error")
+            else:
+                st.session_state.snapshot_values = processed_info
+                ask_user = processed_info.get("ask_user", 0)
+                st.session_state.initial_question = 0
+
+                output = (
+                    processed_info.get("final_answer")
+                    if ask_user == 0
+                    else processed_info["collected_questions"][-1]
+                )
+                st.session_state.initial_question = 1 if ask_user == 0 else 0
+
+                status.update(label="처리 완료", state="complete")
+                answer_placeholder.write(output)
+
+        if processed_info is None:
+            show_error("서버 처리 중 오류가 발생했습니다.")
+            return
+
+        if ask_user == 0:
+            st.session_state.is_end = 1
         st.session_state.conversation_history.append(
-            {"role": "assistant", "content": error_message}
+            {"role": "assistant", "content": output}
         )
+    except requests.exceptions.RequestException as e:
+        show_error(f"서버 연결 오류: {str(e)}")
 
 
 # 백엔드 서버에 유저 피드백 전달